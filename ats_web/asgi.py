@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ats_web.settings')
 
 application = get_asgi_application()
+
+
+# Same as wsgi.py: under gunicorn's preload_app the models are loaded once in
+# the master process and shared by the forked workers
+if os.environ.get('SCANNER_PRELOAD_MODELS') == '1':
+    from scanner import model_registry
+    model_registry.preload()
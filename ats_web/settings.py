@@ -51,6 +51,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Per-stage scan timings: /metrics, Server-Timing header, optional profiler
+    'scanner.tracing.TracingMiddleware',
 ]
 
 ROOT_URLCONF = 'ats_web.urls'
@@ -79,7 +81,8 @@ WSGI_APPLICATION = 'ats_web.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # DATABASE_PATH points a server at another file (e.g. the load test's throwaway one)
+        'NAME': os.environ.get('DATABASE_PATH') or BASE_DIR / 'db.sqlite3',
     }
 }
 
@@ -126,3 +129,108 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# ATS scanner
+# Skill taxonomy used for resume/JD skill extraction (reloaded when the file changes)
+SKILL_TAXONOMY_PATH = BASE_DIR / 'dataset' / 'skill_taxonomy.csv'
+
+# Local caches and build artifacts (safe to delete, rebuilt on demand)
+SCANNER_CACHE_DIR = BASE_DIR / '.cache'
+
+# Skill embeddings, persisted per model so taxonomy skills never hit the model twice
+EMBEDDING_CACHE_DIR = SCANNER_CACHE_DIR / 'embeddings'
+EMBEDDING_LRU_SIZE = 4096
+
+# How the SBERT model runs: 'torch' (fp32), 'onnx' (ONNX Runtime, needs optimum[onnxruntime])
+# or 'int8' (dynamically quantized PyTorch). Compare them with `python manage.py bench_encoder`
+SBERT_BACKEND = os.environ.get('SBERT_BACKEND', 'torch')
+SBERT_ONNX_FILE = os.environ.get('SBERT_ONNX_FILE') or None
+# Encode calls from concurrent requests are merged into one forward pass: a batch
+# waits at most SBERT_BATCH_WAIT_MS for company (0 turns this off) and is run once
+# it holds SBERT_BATCH_MAX texts
+SBERT_BATCH_WAIT_MS = float(os.environ.get('SBERT_BATCH_WAIT_MS', 5))
+SBERT_BATCH_MAX = int(os.environ.get('SBERT_BATCH_MAX', 64))
+
+# Precomputed similarity between every pair of taxonomy skills, per taxonomy/model
+SKILL_SIMILARITY_DIR = SCANNER_CACHE_DIR / 'skill_similarity'
+
+# Job descriptions used for recommendations, and their compiled index
+# (build it with `python manage.py build_jd_index`)
+JD_SOURCE_DIR = BASE_DIR / 'dataset' / 'sample_jds'
+JD_INDEX_DIR = SCANNER_CACHE_DIR / 'jd_index'
+
+# Batch scans: processes spaCy's nlp.pipe uses to find the candidates' names
+# (each one loads the model)
+NAME_N_PROCESS = int(os.environ.get('NAME_N_PROCESS', 1))
+
+# Sampling profiler (off unless SCAN_PROFILE_SLOWEST > 0): the folded stacks of the
+# slowest SCAN_PROFILE_SLOWEST requests are kept in SCAN_PROFILE_DIR, for flame graphs
+SCAN_PROFILE_SLOWEST = int(os.environ.get('SCAN_PROFILE_SLOWEST', 0))
+SCAN_PROFILE_INTERVAL_MS = float(os.environ.get('SCAN_PROFILE_INTERVAL_MS', 5))
+SCAN_PROFILE_DIR = SCANNER_CACHE_DIR / 'profiles'
+
+# Async scans: uploads are queued in the ScanJob table and processed by
+# SCAN_WORKERS background threads per process; at most SCAN_QUEUE_MAX jobs wait or run
+SCAN_ASYNC = os.environ.get('SCAN_ASYNC') == '1'
+SCAN_WORKERS = int(os.environ.get('SCAN_WORKERS', 2))
+SCAN_QUEUE_MAX = int(os.environ.get('SCAN_QUEUE_MAX', 20))
+SCAN_JOB_POLL_SECONDS = 2.0
+# A running job's worker marks it alive every SCAN_JOB_HEARTBEAT_SECONDS; jobs without a
+# mark for SCAN_JOB_TIMEOUT seconds are assumed lost and queued again, at most
+# SCAN_JOB_MAX_ATTEMPTS runs in all (a job that keeps killing its worker then fails)
+SCAN_JOB_HEARTBEAT_SECONDS = 30
+SCAN_JOB_TIMEOUT = 300
+SCAN_JOB_MAX_ATTEMPTS = 3
+
+# Batch scans from the web page: at most BATCH_MAX_FILES resumes (uploaded files plus
+# zip members), each at most BATCH_MAX_FILE_BYTES and BATCH_MAX_TOTAL_BYTES in all once
+# unzipped; zip members that inflate more than BATCH_MAX_ZIP_RATIO times are refused.
+# Batches of up to BATCH_INLINE_MAX resumes are scanned in the request, bigger ones are
+# queued as a ScanJob, whose text extraction runs in BATCH_WORKERS processes.
+# BATCH_MAX_FILE_BYTES also caps a single upload queued by SCAN_ASYNC
+BATCH_MAX_FILES = 100
+BATCH_MAX_FILE_BYTES = 10 * 1024 * 1024
+BATCH_MAX_TOTAL_BYTES = 200 * 1024 * 1024
+BATCH_MAX_ZIP_RATIO = 100
+BATCH_INLINE_MAX = 10
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 1))
+
+# Limits for uploaded PDFs: bigger files are rejected, longer ones are cut off
+PDF_MAX_BYTES = 10 * 1024 * 1024
+PDF_MAX_PAGES = 30
+PDF_TIME_BUDGET = 15.0
+# PDF pages are read by long-lived reader processes (PDF_WORKERS of them, default: CPU
+# count); one stuck on a single page for longer than PDF_PAGE_TIMEOUT is killed
+PDF_PAGE_TIMEOUT = 5.0
+# PDFs with this many pages are split across several readers
+PDF_PARALLEL_MIN_PAGES = 8
+PDF_WORKERS = None
+# A resume's header and skills come first: stop after this much text (None reads every page)
+PDF_STOP_AFTER_CHARS = 40000
+
+# Uploads up to this size stay in memory and are scanned from there; bigger ones
+# are spooled by Django to FILE_UPLOAD_TEMP_DIR (tmpfs when the host has one)
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('SCAN_UPLOAD_MEMORY_MAX', 5 * 1024 * 1024))
+if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+    FILE_UPLOAD_TEMP_DIR = '/dev/shm'
+
+# Repeat scans of the same resume (and JD) are answered from a content-hash cache:
+# SCAN_CACHE_SIZE entries per level in each process, plus the Django cache named by
+# SCAN_CACHE_ALIAS (None keeps it in-process only)
+SCAN_CACHE_SIZE = int(os.environ.get('SCAN_CACHE_SIZE', 256))
+SCAN_CACHE_ALIAS = None
+SCAN_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# Rendered PDF reports, stored per scan and template version
+REPORT_CACHE_DIR = SCANNER_CACHE_DIR / 'reports'
+# How long a download waits for a report being rendered before showing a "preparing" page
+REPORT_RENDER_WAIT = 10.0
+# Processes rendering reports for a bulk export (default: CPU count)
+REPORT_WORKERS = None
+
+# Scans per history page
+HISTORY_PAGE_SIZE = 50
+
+# Candidate ranking: the skill index of this many users' scans is kept per process
+CANDIDATE_INDEX_CACHE_SIZE = 32
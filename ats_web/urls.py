@@ -21,6 +21,8 @@ from scanner import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
+    path('batch/', views.batch_scan, name='batch_scan'),
+    path('jobs/<uuid:token>/', views.scan_job, name='scan_job'),
     
     # Auth URLs
     path('signup/', views.signup_view, name='signup'),
@@ -29,7 +31,11 @@ urlpatterns = [
 
     # App URLs
     path('history/', views.history, name='history'),
+    path('history/export/', views.export_reports, name='export_reports'),
+    path('candidates/search/', views.search_candidates, name='search_candidates'),
+    path('candidates/rank/', views.rank_candidates, name='rank_candidates'),
     path('history/<int:pk>/', views.view_scan, name='view_scan'),
     path('history/<int:pk>/download/', views.download_report, name='download_report'),
     path('about/', views.about, name='about'),
+    path('metrics', views.metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ats_web.settings')
 
 application = get_wsgi_application()
+
+
+# Under gunicorn's preload_app (see gunicorn.conf.py) this runs once in the
+# master process, and the forked workers share the loaded models
+if os.environ.get('SCANNER_PRELOAD_MODELS') == '1':
+    from scanner import model_registry
+    model_registry.preload()
@@ -0,0 +1,14 @@
+# gunicorn settings for ats_web
+#
+#   gunicorn -c gunicorn.conf.py ats_web.wsgi
+#
+# With SCANNER_PRELOAD_MODELS=1 the spaCy and SBERT models are loaded once in
+# the master process before the workers are forked, so every worker shares the
+# weights copy-on-write and none of them pays the load time on its first scan.
+#
+# python manage.py load_test runs the upload page under load with sync, gthread
+# and uvicorn (ASGI) workers and compares latency, throughput and memory.
+import os
+
+preload_app = os.environ.get("SCANNER_PRELOAD_MODELS") == "1"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
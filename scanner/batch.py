@@ -0,0 +1,226 @@
+# backend/batch.py
+
+import csv
+import functools
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from . import extractor, parser, pipeline, skill_extractor, skill_search, text_analyzer
+from .models import ScanHistory
+
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+CSV_COLUMNS = ["rank", "resume_filename", "candidate_name", "email", "phone",
+               "ats_score", "skill_match_ratio", "avg_similarity", "matched_skills", "missing_skills"]
+
+
+# Zip members are copied in chunks of this size
+CHUNK_SIZE = 64 * 1024
+# Members this small are never refused for their compression ratio
+RATIO_CHECK_MIN_BYTES = 1024 * 1024
+
+
+class BatchTooLarge(Exception):
+    """Raised when an uploaded batch goes over one of the BATCH_MAX_* limits."""
+
+
+class UploadLimits:
+    """
+    The BATCH_MAX_* limits of one web batch, counted down across every
+    uploaded file and zip member.
+    """
+
+    def __init__(self):
+        self.files = settings.BATCH_MAX_FILES
+        self.total_bytes = settings.BATCH_MAX_TOTAL_BYTES
+        self.file_bytes = settings.BATCH_MAX_FILE_BYTES
+        self.zip_ratio = settings.BATCH_MAX_ZIP_RATIO
+
+    def add_file(self, filename: str, size: int):
+        """Counts one more resume of `size` bytes; raises BatchTooLarge if it doesn't fit."""
+        self.files -= 1
+        if self.files < 0:
+            raise BatchTooLarge(f"More than {settings.BATCH_MAX_FILES} resumes in one batch")
+        if size > self.file_bytes:
+            raise BatchTooLarge(f"{filename} is larger than {self.file_bytes // (1024 * 1024)} MB")
+        self.total_bytes -= size
+        if self.total_bytes < 0:
+            raise BatchTooLarge(f"The batch is larger than {settings.BATCH_MAX_TOTAL_BYTES // (1024 * 1024)} MB")
+
+
+def _extract_member(archive, member, path: str, limits: UploadLimits):
+    """
+    Copies one zip member to `path` in chunks, after checking its
+    declared size and compression ratio against `limits`. Never more
+    than the declared size is written.
+    """
+    if member.file_size >= RATIO_CHECK_MIN_BYTES and member.file_size > member.compress_size * limits.zip_ratio:
+        raise BatchTooLarge(f"{member.filename} is compressed suspiciously well")
+    limits.add_file(member.filename, member.file_size)
+    written = 0
+    with archive.open(member) as src, open(path, "wb") as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > member.file_size:
+                raise BatchTooLarge(f"{member.filename} is larger than its zip header says")
+            dst.write(chunk)
+
+
+def collect_resumes(source: str, workdir: str, limits: UploadLimits = None) -> list:
+    """
+    Returns (filename, path) for every resume in a directory or a .zip.
+    Zip members are extracted into `workdir`, within `limits` if given
+    (uploads); raises BatchTooLarge when one is exceeded.
+    """
+    if zipfile.is_zipfile(source):
+        resumes = []
+        with zipfile.ZipFile(source) as archive:
+            for i, member in enumerate(archive.infolist()):
+                filename = os.path.basename(member.filename)
+                if member.is_dir() or not filename.lower().endswith(RESUME_EXTENSIONS):
+                    continue
+                # Flatten the archive and never trust member paths
+                path = os.path.join(workdir, f"{i:05d}_{filename}")
+                if limits is not None:
+                    _extract_member(archive, member, path, limits)
+                else:
+                    with archive.open(member) as src, open(path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                resumes.append((filename, path))
+        return resumes
+
+    return [
+        (filename, os.path.join(source, filename))
+        for filename in sorted(os.listdir(source))
+        if filename.lower().endswith(RESUME_EXTENSIONS) and os.path.isfile(os.path.join(source, filename))
+    ]
+
+
+def extract_texts(paths: list, workers=None) -> list:
+    """Extracts every resume's text, spreading PDF parsing over `workers` processes (default: CPU count)."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) <= 1:
+        return [extractor.extract_text(path) for path in paths]
+
+    # One process per resume already, so no nested page-level pool
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(functools.partial(extractor.extract_text, parallel=False), paths, chunksize=chunksize))
+
+
+def scan_batch(resumes: list, jd_text: str, user=None, workers=None, save=True) -> list:
+    """
+    Scans many resumes against one JD.
+
+    `resumes` is a list of (filename, path). The JD's skills are
+    extracted once, text extraction runs in a process pool, names are
+    found in one spaCy batch and skills are compared through the
+    precomputed similarity matrix. ScanHistory rows are bulk-inserted.
+    Returns one row per resume, best score first.
+    """
+    if not resumes:
+        return []
+
+    jd = pipeline.prepare_jd(jd_text)
+    texts = extract_texts([path for _, path in resumes], workers)
+
+    taxonomy = skill_extractor.get_skill_taxonomy()
+    docs = [text_analyzer.analyze(text, taxonomy) for text in texts]
+
+    # Names of every resume in one spaCy pass
+    basic_infos = parser.parse_basic_infos(texts, n_process=getattr(settings, "NAME_N_PROCESS", 1), docs=docs)
+
+    results, records = [], []
+    for (filename, _), text, doc, basic_info in zip(resumes, texts, docs, basic_infos):
+        # Taxonomy skills need no embedding at all (see skill_similarity)
+        analysis = pipeline.analyze_resume(text, jd, doc.skills, basic_info=basic_info, doc=doc)
+        records.append(pipeline.build_scan_record(filename, analysis, user))
+
+        results.append({
+            "resume_filename": filename,
+            "candidate_name": basic_info.get("name") or "Unknown Candidate",
+            "email": basic_info.get("email") or "",
+            "phone": basic_info.get("phone") or "",
+            "ats_score": analysis["ats_score"]["score"],
+            "skill_match_ratio": analysis["ats_score"]["skill_match_ratio"],
+            "avg_similarity": analysis["ats_score"]["avg_similarity"],
+            "matched_skills": analysis["match_results"]["matched_skills"],
+            "missing_skills": analysis["match_results"]["missing_skills"],
+            "extracted": bool(text),
+        })
+
+    if save:
+        # Primary keys come back from bulk_create (RETURNING), so the skills can be linked
+        ScanHistory.objects.bulk_create(records, batch_size=500)
+        skill_search.sync_scan_skills(records)
+
+    results.sort(key=lambda row: row["ats_score"], reverse=True)
+    for rank, row in enumerate(results, start=1):
+        row["rank"] = rank
+    return results
+
+
+def scan_batch_source(source: str, jd_text: str, **kwargs) -> list:
+    """scan_batch() over a directory or zip of resumes."""
+    with tempfile.TemporaryDirectory(prefix="ats-batch-") as workdir:
+        return scan_batch(collect_resumes(source, workdir), jd_text, **kwargs)
+
+
+def pack_resumes(resumes: list) -> bytes:
+    """(filename, path) pairs as one uncompressed zip, how a queued batch is stored."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for i, (filename, path) in enumerate(resumes):
+            # A folder per resume: names may repeat, collect_resumes keeps the base name
+            archive.write(path, f"{i:05d}/{filename}")
+    return buffer.getvalue()
+
+
+def scan_batch_archive(data: bytes, jd_text: str, **kwargs) -> list:
+    """scan_batch() over a pack_resumes() zip."""
+    with tempfile.TemporaryDirectory(prefix="ats-batch-") as workdir:
+        path = os.path.join(workdir, "batch.zip")
+        with open(path, "wb") as f:
+            f.write(data)
+        return scan_batch(collect_resumes(path, workdir), jd_text, **kwargs)
+
+
+# --- Output ---
+
+def iter_csv(results: list):
+    """Yields the ranked results as CSV lines (for streaming responses)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for row in results:
+        writer.writerow([
+            "; ".join(row[col]) if isinstance(row[col], list) else row[col]
+            for col in CSV_COLUMNS
+        ])
+        yield flush()
+
+
+def iter_json(results: list):
+    """Yields the ranked results as a JSON array, one row at a time."""
+    yield "["
+    for i, row in enumerate(results):
+        yield ("," if i else "") + json.dumps(row)
+    yield "]"
@@ -0,0 +1,166 @@
+# backend/candidate_ranker.py
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.db.models import Count, Max
+
+from . import scorer, skill_similarity
+from .models import ScanHistory
+from .skill_extractor import get_skill_taxonomy
+
+
+class CandidateIndex:
+    """
+    Every stored scan as a row of a sparse 0/1 matrix over skill ids
+    (taxonomy skills first, then any other skill seen in the history).
+
+    rank() scores all candidates against a JD at once: each JD skill is
+    expanded to the skills whose SBERT similarity with it (read from the
+    precomputed skill similarity matrix) is at least the threshold, and
+    the candidates' best match for it comes from sparse products with
+    that expansion. Scores use semantic_skill_match's
+    matches and combine_scores' weights; the ratio is matched JD skills
+    over JD skills (calculate_ats_score counts unique matched resume
+    skills instead, which only differs when one skill covers several).
+    """
+
+    def __init__(self, scan_ids: list, skill_lists: list, vocab=None):
+        vocab = list(vocab) if vocab is not None else list(get_skill_taxonomy().skill_list)
+        known = set(vocab)
+        for skills in skill_lists:
+            for skill in skills:
+                if skill not in known:
+                    known.add(skill)
+                    vocab.append(skill)
+        self.vocab = vocab
+        self.vocab_index = {skill: i for i, skill in enumerate(vocab)}
+        self.scan_ids = np.asarray(scan_ids, dtype=np.int64)
+
+        lengths = [len(set(skills)) for skills in skill_lists]
+        rows = np.repeat(np.arange(len(skill_lists)), lengths)
+        cols = np.fromiter(
+            (self.vocab_index[skill] for skills in skill_lists for skill in set(skills)),
+            dtype=np.int64, count=sum(lengths),
+        )
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(cols), dtype=np.float32), (rows, cols)),
+            shape=(len(skill_lists), len(vocab)),
+        )
+        # Column-major copy: rank() reads the columns of a few skills
+        self._columns = self.matrix.tocsc()
+
+    @classmethod
+    def from_scans(cls, scans=None):
+        """
+        Built from every skill on the resumes of `scans` (a ScanHistory
+        queryset), not only those that matched the JD each was scanned
+        against. Rows saved before the resume skills were stored fall
+        back to their matched skills.
+        """
+        scans = ScanHistory.objects.all() if scans is None else scans
+        rows = scans.order_by("id").values_list("id", "resume_skills", "matched_skills")
+        scan_ids, skill_lists = [], []
+        for scan_id, resume_skills, matched_skills in rows.iterator(chunk_size=2000):
+            skills = resume_skills or matched_skills
+            if skills:
+                scan_ids.append(scan_id)
+                skill_lists.append(skills)
+        return cls(scan_ids, skill_lists)
+
+    def __len__(self):
+        return len(self.scan_ids)
+
+    def score_all(self, jd_skills: list, threshold=0.70):
+        """
+        (rows, skill_match_ratio, avg_similarity) for every candidate with
+        at least one skill near a JD skill; everyone else scores 0.
+        """
+        empty = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        if not jd_skills or not len(self.scan_ids):
+            return empty
+
+        similarities = skill_similarity.get_similarity_matrix().scores(jd_skills, self.vocab)
+
+        # Expansion: JD skill -> every vocabulary skill at least `threshold` similar.
+        # Only the columns of those skills take part.
+        expansion = np.where(similarities >= threshold, similarities, 0).astype(np.float32)
+        near = np.flatnonzero(expansion.any(axis=0))
+        if not len(near):
+            return empty
+        columns = self._columns[:, near]
+        expansion = sparse.csr_matrix(expansion[:, near].T)
+
+        # Candidates x JD skills, sparse: summed similarity and number of the
+        # candidate's skills near each JD skill
+        sums = (columns @ expansion).tocsr()
+        counts = (columns @ (expansion > 0).astype(np.float32)).tocsr()
+
+        rows = np.flatnonzero(np.diff(sums.indptr))
+        matched_count = np.diff(sums.indptr)[rows].astype(np.float64)
+        total = np.asarray(sums.sum(axis=1)).ravel()[rows]
+
+        # With one near skill the sum is the best similarity. Where several
+        # are near the same JD skill, take the max over that row's entries.
+        entry_rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        multi = np.unique(entry_rows[counts.data > 1])
+        if len(multi):
+            multi_columns = columns.tocsr()[multi]
+            dense = expansion.T.toarray()
+            best = np.maximum.reduceat(dense[:, multi_columns.indices], multi_columns.indptr[:-1], axis=1)
+            total[np.searchsorted(rows, multi)] = best.sum(axis=0)
+
+        skill_match_ratio = matched_count / len(jd_skills)
+        avg_similarity = total / matched_count
+        return rows, skill_match_ratio, avg_similarity
+
+    def rank(self, jd_skills: list, top_k=20, threshold=0.70) -> list:
+        """The top_k candidates for the JD skills, best first (only those matching at least one skill)."""
+        rows, skill_match_ratio, avg_similarity = self.score_all(jd_skills, threshold)
+        if not len(rows):
+            return []
+        weights = scorer.DEFAULT_WEIGHTS
+        scores = skill_match_ratio * weights["skill_match_ratio"] + avg_similarity * weights["avg_similarity"]
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        # Ties keep row order
+        top = top[np.lexsort((top, -scores[top]))]
+        return [
+            {"scan_id": int(self.scan_ids[rows[i]]),
+             **scorer.combine_scores(float(skill_match_ratio[i]), float(avg_similarity[i]))}
+            for i in top
+        ]
+
+
+# Most recently used first out: at most CANDIDATE_INDEX_CACHE_SIZE users' indexes per process
+_INDEXES = OrderedDict()
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_candidate_index(user) -> CandidateIndex:
+    """
+    The CandidateIndex of one user's scans, kept per process for the
+    CANDIDATE_INDEX_CACHE_SIZE most recent users and rebuilt when the
+    user's scans change (new, deleted or re-scanned rows).
+    """
+    scans = ScanHistory.objects.filter(user=user)
+    key = tuple(scans.aggregate(n=Count("id"), last=Max("id")).values())
+
+    with _INDEXES_LOCK:
+        cached = _INDEXES.get(user.pk)
+        if cached is not None and cached[0] == key:
+            _INDEXES.move_to_end(user.pk)
+            return cached[1]
+
+    # Built outside the lock: one user's cold build never holds up the others
+    index = CandidateIndex.from_scans(scans)
+    with _INDEXES_LOCK:
+        _INDEXES[user.pk] = (key, index)
+        _INDEXES.move_to_end(user.pk)
+        while len(_INDEXES) > getattr(settings, "CANDIDATE_INDEX_CACHE_SIZE", 32):
+            _INDEXES.popitem(last=False)
+        return index
@@ -0,0 +1,187 @@
+# backend/embedding_store.py
+
+import fcntl
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Maps a skill string to its float32 embedding vector.
+
+    Lookups go through a small in-memory LRU first, then through a
+    memory-mapped `.npy` file on disk (one row per skill, with a JSON
+    index next to it). The files are tagged with the model name and
+    version: if either changes, the old vectors are ignored instead of
+    being reused.
+
+    Every flush writes a new, uniquely named `.npy` and then replaces
+    the index, which names its `.npy`: the index is the only file that
+    is swapped, so skills and vectors always come from the same flush.
+    Flushes from different processes take turns on a lock file, so none
+    of them drops the others' new vectors.
+    """
+
+    def __init__(self, directory, model_name: str, model_version: str, lru_size: int = 4096):
+        self.directory = str(directory)
+        self.model_name = model_name
+        self.model_version = model_version
+        self.lru_size = lru_size
+
+        slug = re.sub(r"[^a-zA-Z0-9_.-]+", "_", model_name)
+        self.slug = slug
+        self.index_path = os.path.join(self.directory, f"{slug}.json")
+        self.lock_path = os.path.join(self.directory, f"{slug}.lock")
+        # The .npy the current index points to
+        self.vectors_path = None
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._pending = {}
+        self._disk_index = {}
+        self._disk_vectors = None
+        self.stats = {"lru_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._load()
+
+    # --- Disk ---
+
+    def _load(self):
+        """(Re)open the on-disk vectors if they belong to this model."""
+        self._disk_index = {}
+        self._disk_vectors = None
+        self.vectors_path = None
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (meta.get("model") != self.model_name or meta.get("version") != self.model_version
+                    or "vectors" not in meta):
+                logger.info("Ignoring stale embedding cache at %s", self.index_path)
+                return
+            vectors_path = os.path.join(self.directory, os.path.basename(meta["vectors"]))
+            vectors = np.load(vectors_path, mmap_mode="r")
+            if vectors.shape[0] != len(meta["skills"]):
+                logger.warning("Embedding cache at %s is inconsistent, ignoring it", vectors_path)
+                return
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError):
+            tracing.record_error("embedding_cache", "Could not read embedding cache at %s", self.index_path)
+            return
+
+        self._disk_vectors = vectors
+        self._disk_index = {skill: i for i, skill in enumerate(meta["skills"])}
+        self.vectors_path = vectors_path
+
+    def flush(self):
+        """Write any new vectors to disk (atomically) and reopen the mmap."""
+        with self._lock:
+            if not self._pending:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._flush_locked()
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _flush_locked(self):
+        # Pick up rows written by other workers since we last looked
+        self._load()
+        new_skills = [s for s in self._pending if s not in self._disk_index]
+        if not new_skills:
+            self._pending = {}
+            return
+
+        skills = list(self._disk_index)
+        parts = []
+        if self._disk_vectors is not None and len(skills):
+            parts.append(np.asarray(self._disk_vectors))
+        parts.append(np.stack([self._pending[s] for s in new_skills]))
+        vectors = np.concatenate(parts).astype(np.float32, copy=False)
+        skills.extend(new_skills)
+
+        vectors_name = f"{self.slug}-{uuid.uuid4().hex}.npy"
+        self._atomic_write(os.path.join(self.directory, vectors_name), lambda f: np.save(f, vectors))
+        meta = {
+            "model": self.model_name,
+            "version": self.model_version,
+            "dim": int(vectors.shape[1]),
+            "vectors": vectors_name,
+            "skills": skills,
+        }
+        self._atomic_write(self.index_path, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+
+        # Older flushes' vectors (processes that still map one keep reading it until they reload)
+        ours = re.compile(rf"{re.escape(self.slug)}(-[0-9a-f]{{32}})?\.npy")
+        for name in os.listdir(self.directory):
+            if name != vectors_name and ours.fullmatch(name):
+                os.remove(os.path.join(self.directory, name))
+
+        self._pending = {}
+        self._load()
+
+    def _atomic_write(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # --- Lookups ---
+
+    def __len__(self):
+        return len(self._disk_index) + len(self._pending)
+
+    def __contains__(self, skill):
+        return skill in self._lru or skill in self._pending or skill in self._disk_index
+
+    def get(self, skill):
+        """Returns the vector for a skill, or None if it has never been stored."""
+        with self._lock:
+            vector = self._lru.get(skill)
+            if vector is not None:
+                self._lru.move_to_end(skill)
+                self.stats["lru_hits"] += 1
+                return vector
+
+            vector = self._pending.get(skill)
+            if vector is None:
+                row = self._disk_index.get(skill)
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                vector = np.array(self._disk_vectors[row], dtype=np.float32)
+            self.stats["disk_hits"] += 1
+            self._remember(skill, vector)
+            return vector
+
+    def put_many(self, skills: list, vectors):
+        with self._lock:
+            for skill, vector in zip(skills, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._pending[skill] = vector
+                self._remember(skill, vector)
+
+    def _remember(self, skill, vector):
+        self._lru[skill] = vector
+        self._lru.move_to_end(skill)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
@@ -0,0 +1,115 @@
+# backend/encode_batcher.py
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EncodeBatcher:
+    """
+    Runs the embedding model for concurrent callers in micro-batches.
+
+    submit() queues a list of texts and returns a Future for its vectors.
+    One background thread takes the oldest request, waits at most
+    `max_wait` seconds (counted from when that request was queued) for
+    more, stops collecting once it has `max_batch` texts, and encodes
+    everything collected - duplicates once - in a single forward pass.
+    Started lazily, and again in a forked child (gunicorn preload).
+    """
+
+    def __init__(self, encode, max_batch: int = 64, max_wait: float = 0.005):
+        self.encode_batch = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stats = {"batches": 0, "requests": 0, "texts": 0, "encoded_texts": 0}
+        # Seconds each request waited before its batch ran (most recent ones)
+        self._delays = deque(maxlen=2000)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, texts: list) -> Future:
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def encode(self, texts: list) -> np.ndarray:
+        """Vectors for `texts`, encoded together with whatever else is queued."""
+        return self.submit(texts).result()
+
+    def _run(self):
+        requests = self._queue
+        while True:
+            batch = [requests.get()]
+            size = len(batch[0][0])
+            deadline = batch[0][2] + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                size += len(batch[-1][0])
+            self._process(batch)
+
+    def _process(self, batch: list):
+        started = time.perf_counter()
+        unique = list(dict.fromkeys(text for texts, _, _ in batch for text in texts))
+        try:
+            vectors = self.encode_batch(unique)
+        except Exception as e:
+            logger.exception("Encoding a batch of %d texts failed", len(unique))
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        rows = {text: i for i, text in enumerate(unique)}
+        for texts, future, _ in batch:
+            future.set_result(vectors[[rows[text] for text in texts]])
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(batch)
+            self._stats["texts"] += sum(len(texts) for texts, _, _ in batch)
+            self._stats["encoded_texts"] += len(unique)
+            self._delays.extend(started - queued for _, _, queued in batch)
+
+    def stats(self) -> dict:
+        """Batch counts, how full batches were and how long requests queued."""
+        with self._lock:
+            stats = dict(self._stats)
+            delays = sorted(self._delays)
+        batches = stats["batches"] or 1
+        stats.update(
+            max_batch=self.max_batch,
+            max_wait_ms=self.max_wait * 1000,
+            avg_requests_per_batch=round(stats["requests"] / batches, 2),
+            avg_batch_texts=round(stats["encoded_texts"] / batches, 2),
+            avg_fill=round(stats["encoded_texts"] / (batches * self.max_batch), 3),
+            queue_delay_p50_ms=round(delays[len(delays) // 2] * 1000, 2) if delays else 0.0,
+            queue_delay_p99_ms=round(delays[min(len(delays) - 1, int(len(delays) * 0.99))] * 1000, 2) if delays else 0.0,
+        )
+        return stats
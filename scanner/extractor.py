@@ -1,60 +1,399 @@
 # backend/extractor.py
 
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
 import pdfplumber
+from django.conf import settings
 from docx import Document
 import re
 
-def extract_text_from_pdf(path: str) -> str:
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+# A reader asked to stop mid-range gets this long to finish its page before it is killed
+READER_STOP_GRACE = 0.2
+
+
+def _pdf_setting(name):
+    # The PDF_* limits live in settings.py only
+    return getattr(settings, name)
+
+
+class PDFTooLarge(Exception):
+    """The file is bigger than PDF_MAX_BYTES and was not opened."""
+
+
+class PDFReadError(Exception):
+    """A page reader process failed on the document."""
+
+
+# --- Sources: a path, the file's bytes, or an open binary file ---
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _as_file(source):
+    """Something pdfplumber/python-docx can open: a path or a binary file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if not _is_path(source):
+        source.seek(0)
+    return source
+
+
+def _source_size(source) -> int:
+    if _is_path(source):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    position = source.seek(0, os.SEEK_END)
+    source.seek(0)
+    return position
+
+
+def _picklable(source):
+    """The source in a form a pool worker can receive: a path or bytes."""
+    if _is_path(source):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    source.seek(0)
+    return source.read()
+
+
+def _source_name(source) -> str:
+    if _is_path(source):
+        return os.path.basename(source)
+    return os.path.basename(str(getattr(source, "name", None) or "<memory>"))
+
+
+def hash_source(source, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the file's content, read in chunks (same as scan_cache.hash_bytes)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    f = open(source, "rb") if _is_path(source) else _as_file(source)
+    try:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    finally:
+        if _is_path(source):
+            f.close()
+    return digest.hexdigest()
+
+
+def is_too_large(source, filename=None) -> bool:
+    """True for PDFs over PDF_MAX_BYTES, which extraction refuses without reading them."""
+    return _file_type_name(source, filename).endswith(".pdf") and _source_size(source) > _pdf_setting("PDF_MAX_BYTES")
+
+
+def _page_text(page) -> str:
+    text = page.extract_text() or ""
+    # Drop the parsed layout objects, pdfplumber keeps them per page otherwise
+    page.close()
+    return text
+
+
+# --- Page readers: long-lived extraction processes that can be killed ---
+
+class _PageTimeout(Exception):
+    pass
+
+
+def _reader_main(conn):
+    """
+    A reader process: for every (source, start, stop) it receives, sends
+    ("page", text) per page, then ("done", None) or ("error", message).
+    A None received between pages stops the range early.
+    """
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            # A stop that arrived after the range was already done
+            continue
+        source, start, stop = job
+        try:
+            with pdfplumber.open(_as_file(source)) as pdf:
+                for page in pdf.pages[start:stop]:
+                    if conn.poll() and conn.recv() is None:
+                        break
+                    conn.send(("page", _page_text(page)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+            continue
+        conn.send(("done", None))
+
+
+class _PageReader:
+    """One reader process and the pipe to it."""
+
+    def __init__(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_reader_main, args=(child,), name="pdf-reader", daemon=True)
+        self.process.start()
+        child.close()
+        self.busy = False
+
+    def start(self, source, start: int, stop: int):
+        self.conn.send((source, start, stop))
+        self.busy = True
+
+    def next_page(self, timeout: float):
+        """The next page's text, or None after the last one. Raises _PageTimeout."""
+        if not self.conn.poll(max(timeout, 0)):
+            raise _PageTimeout()
+        kind, value = self.conn.recv()
+        if kind == "page":
+            return value
+        self.busy = False
+        if kind == "error":
+            raise PDFReadError(value)
+        return None
+
+    def stop(self, timeout: float) -> bool:
+        """Stops a busy reader and waits for it; False if it's stuck on a page."""
+        if not self.busy:
+            return True
+        self.conn.send(None)
+        try:
+            while self.next_page(timeout) is not None:
+                pass
+        except _PageTimeout:
+            return False
+        except PDFReadError:
+            pass
+        return True
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class _ReaderPool:
+    """
+    Up to PDF_WORKERS reader processes (default: CPU count), started on
+    first use and reused by every request of this process. A reader
+    stuck on a page is killed and replaced, without touching the others.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._idle = []
+        self._count = 0
+        self._pid = os.getpid()
+
+    def acquire(self, wanted: int, deadline: float) -> list:
+        """1 to `wanted` readers; waits until `deadline` for one to be free ([] if none was)."""
+        size = _pdf_setting("PDF_WORKERS") or os.cpu_count() or 1
+        with self._cond:
+            if self._pid != os.getpid():
+                # Forked: the parent's readers belong to the parent
+                self._idle, self._count, self._pid = [], 0, os.getpid()
+            while not self._idle and self._count >= size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            readers = self._idle[:wanted]
+            del self._idle[:wanted]
+            new = max(min(wanted - len(readers), size - self._count), 0)
+            self._count += new
+        return readers + [_PageReader() for _ in range(new)]
+
+    def release(self, reader: _PageReader):
+        """Gives back a reader: kept if it stops within the grace period, killed otherwise."""
+        stopped = reader.stop(READER_STOP_GRACE)
+        if not stopped:
+            reader.kill()
+        with self._cond:
+            if stopped:
+                self._idle.append(reader)
+            else:
+                self._count -= 1
+            self._cond.notify()
+
+    def close(self):
+        """Kills the idle readers."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for reader in idle:
+            reader.kill()
+
+
+_readers = _ReaderPool()
+
+
+def iter_pdf_pages(source, max_pages=None, time_budget=None, parallel=True):
+    """
+    Yields the text of each PDF page, in order, without holding the whole
+    document's text or layout in memory. `source` is a path, the file's
+    bytes or an open binary file.
+
+    At most `max_pages` pages are read and reading stops once
+    `time_budget` seconds have passed. Pages are read by the reader
+    processes, which are killed if a page takes more than
+    PDF_PAGE_TIMEOUT; large documents are split into page ranges over
+    several of them. With `parallel` off (e.g. when already running
+    inside a pool) pages are read here, and the budget is only checked
+    between pages. Stopping the iteration early skips the remaining pages.
+    Raises PDFTooLarge for files over PDF_MAX_BYTES.
+    """
+    max_pages = max_pages or _pdf_setting("PDF_MAX_PAGES")
+    time_budget = time_budget or _pdf_setting("PDF_TIME_BUDGET")
+    name = _source_name(source)
+    size = _source_size(source)
+    if size > _pdf_setting("PDF_MAX_BYTES"):
+        raise PDFTooLarge(f"{size} bytes")
+
+    deadline = time.monotonic() + time_budget
+
+    with pdfplumber.open(_as_file(source)) as pdf:
+        page_count = len(pdf.pages)
+        if page_count > max_pages:
+            logger.warning("%s has %d pages, reading the first %d", name, page_count, max_pages)
+        page_count = min(page_count, max_pages)
+
+        if not parallel:
+            for page in pdf.pages[:page_count]:
+                if time.monotonic() > deadline:
+                    logger.warning("Time budget exceeded reading %s", name)
+                    return
+                yield _page_text(page)
+            return
+
+    if not page_count:
+        return
+    wanted = 1
+    if page_count >= max(_pdf_setting("PDF_PARALLEL_MIN_PAGES"), 2):
+        wanted = min(_pdf_setting("PDF_WORKERS") or os.cpu_count() or 1, page_count)
+    readers = _readers.acquire(wanted, deadline)
+    if not readers:
+        logger.warning("Time budget exceeded waiting to read %s", name)
+        return
+
+    # Contiguous page ranges, yielded in order as they arrive
+    step = -(-page_count // len(readers))
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    # Rounding the step up can leave fewer ranges than readers: give the rest back
+    for reader in readers[len(ranges):]:
+        _readers.release(reader)
+    readers = readers[:len(ranges)]
+    shared = _picklable(source)
+    page_timeout = _pdf_setting("PDF_PAGE_TIMEOUT")
+    try:
+        for reader, (start, stop) in zip(readers, ranges):
+            reader.start(shared, start, stop)
+        for reader in readers:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    text = reader.next_page(min(page_timeout, remaining))
+                except _PageTimeout:
+                    if page_timeout < remaining:
+                        logger.warning("A page of %s took over %ss, stopped reading", name, page_timeout)
+                    else:
+                        logger.warning("Time budget exceeded reading %s", name)
+                    return
+                if text is None:
+                    break
+                yield text
+    finally:
+        for reader in readers:
+            _readers.release(reader)
+
+
+def extract_text_from_pdf(source, stop_after_chars=None, parallel=True) -> str:
     """
-    Extracts text from a PDF file using pdfplumber.
+    Extracts text from a PDF file using pdfplumber, page by page within
+    the PDF_* limits (see iter_pdf_pages).
+    With `stop_after_chars` (default PDF_STOP_AFTER_CHARS), reading
+    stops once that much text is in: the header parse_basic_info looks
+    at and the skills sections come first in a resume.
     Returns extracted text as a string.
     """
+    stop_after_chars = stop_after_chars or _pdf_setting("PDF_STOP_AFTER_CHARS")
     try:
         full_text = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    full_text.append(text)
+        length = 0
+        for text in iter_pdf_pages(source, parallel=parallel):
+            if text:
+                full_text.append(text)
+                length += len(text)
+            if stop_after_chars and length >= stop_after_chars:
+                break
         return "\n".join(full_text).strip()
 
-    except Exception as e:
-        print(f"[ERROR] Failed to extract PDF: {e}")
+    except Exception:
+        tracing.record_error("extract", "Failed to extract PDF %s", _source_name(source))
         return ""
 
 
-def extract_text_from_docx(path: str) -> str:
+def extract_text_from_docx(source) -> str:
     """
-    Extracts text from a DOCX file using python-docx.
+    Extracts text from a DOCX file (path, bytes or binary file) using python-docx.
     """
     try:
-        doc = Document(path)
+        doc = Document(_as_file(source))
         text = "\n".join([para.text for para in doc.paragraphs])
         return text.strip()
-    except Exception as e:
-        print(f"[ERROR] Failed to extract DOCX: {e}")
+    except Exception:
+        tracing.record_error("extract", "Failed to extract DOCX %s", _source_name(source))
+        return ""
+
+
+def extract_text_from_txt(source) -> str:
+    try:
+        if _is_path(source):
+            with open(source, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        if not isinstance(source, (bytes, bytearray, memoryview)):
+            source = _as_file(source).read()
+        return bytes(source).decode("utf-8").strip()
+    except Exception:
+        tracing.record_error("extract", "Failed to read TXT %s", _source_name(source))
         return ""
 
 
-def extract_text(file_path: str) -> str:
+def _file_type_name(source, filename=None) -> str:
+    """The lowercased name the file type is told from."""
+    return (filename or (str(source) if _is_path(source) else _source_name(source))).lower()
+
+
+def extract_text(source, filename=None, parallel: bool = True) -> str:
     """
     Auto-detect file type and extract text accordingly.
-    Supports PDF and DOCX formats.
+    Supports PDF, DOCX and TXT formats.
+
+    `source` is a path, or the file's bytes / an open binary file (e.g. an
+    upload that never touched disk), in which case `filename` gives the
+    type. Pass parallel=False when already running inside a process pool.
     """
-    if file_path.lower().endswith(".pdf"):
-        return extract_text_from_pdf(file_path)
+    name = _file_type_name(source, filename)
+    if name.endswith(".pdf"):
+        return extract_text_from_pdf(source, parallel=parallel)
 
-    elif file_path.lower().endswith(".docx"):
-        return extract_text_from_docx(file_path)
+    elif name.endswith(".docx"):
+        return extract_text_from_docx(source)
     
-    elif file_path.lower().endswith(".txt"):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return f.read().strip()
-        except Exception as e:
-            print(f"[ERROR] Failed to read TXT: {e}")
-            return ""
+    elif name.endswith(".txt"):
+        return extract_text_from_txt(source)
 
     else:
-        print(f"Unsupported file type: {file_path}")
-        return ""
\ No newline at end of file
+        logger.warning("Unsupported file type: %s", filename or _source_name(source))
+        return ""
@@ -0,0 +1,261 @@
+# backend/jd_index.py
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from . import extractor, recommender, semantic_matcher, skill_similarity, tracing
+from .model_registry import add_warmup
+from .skill_extractor import extract_skills_from_text, get_skill_taxonomy
+
+# Bump when the artifact layout changes
+FORMAT_VERSION = 1
+CURRENT_FILE = "CURRENT"
+
+
+def default_source_dir() -> str:
+    return str(getattr(settings, "JD_SOURCE_DIR", os.path.join(settings.BASE_DIR, "dataset", "sample_jds")))
+
+
+def default_index_dir() -> str:
+    return str(settings.JD_INDEX_DIR)
+
+
+class JDArtifact:
+    """
+    A compiled JD catalog, opened read-only.
+
+    Layout of one build directory:
+      manifest.json   titles, per-file fingerprints, skill vocabulary, versions
+      skill_ids.npy   int32, every JD's skills as ids into the vocabulary
+      offsets.npy     int64, JD i owns skill_ids[offsets[i]:offsets[i + 1]]
+      embeddings.npy  float32, unit-length vector per vocabulary skill
+      centroids.npy   float32, unit-length mean skill vector per JD
+
+    The arrays are memory-mapped, so every worker that opens the same
+    build shares the same physical pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.vocab = self.manifest["vocab"]
+        self.jobs = self.manifest["jobs"]
+        self.skill_ids = np.load(os.path.join(path, "skill_ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.centroids = np.load(os.path.join(path, "centroids.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @property
+    def version(self) -> str:
+        return self.manifest["build_id"]
+
+    def job_skills(self, i: int) -> list:
+        return [self.vocab[skill_id] for skill_id in self.skill_ids[self.offsets[i]:self.offsets[i + 1]]]
+
+    def skill_database(self) -> dict:
+        """The same {filename: [skills]} dict load_sample_jds() returns."""
+        return {job["title"]: self.job_skills(i) for i, job in enumerate(self.jobs)}
+
+
+def open_artifact(index_dir=None):
+    """Opens the current build in `index_dir`, or returns None if there is none."""
+    index_dir = index_dir or default_index_dir()
+    try:
+        with open(os.path.join(index_dir, CURRENT_FILE), "r", encoding="utf-8") as f:
+            build = f.read().strip()
+        return JDArtifact(os.path.join(index_dir, build))
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            tracing.record_error("jd_index", "Could not open JD index in %s", index_dir)
+        return None
+
+
+def _fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        sha1 = hashlib.sha1(f.read()).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1}
+
+
+def build_jd_index(source_dir=None, index_dir=None, full=False, log=print) -> dict:
+    """
+    Compiles every JD file in `source_dir` into a new artifact build in
+    `index_dir` and points CURRENT at it.
+
+    Unless `full` is set, JDs whose file is unchanged since the previous
+    build (same size and mtime, or same content hash) reuse their skills
+    instead of being extracted again. Everything is rebuilt if the skill
+    taxonomy or the embedding model changed.
+    Returns counts of reused/extracted/removed JDs.
+    """
+    source_dir = source_dir or default_source_dir()
+    index_dir = index_dir or default_index_dir()
+    taxonomy = get_skill_taxonomy()
+    versions = {
+        "format": FORMAT_VERSION,
+        "taxonomy_version": taxonomy.version,
+        "model": semantic_matcher.MODEL_NAME,
+        "model_version": semantic_matcher.MODEL_VERSION,
+    }
+
+    # Fill the persistent embedding store for the whole taxonomy while we are at it,
+    # so workers never call the model for taxonomy skills
+    semantic_matcher.prewarm(taxonomy.skill_list)
+    skill_similarity.build_similarity_matrix(log=log)
+
+    # Previous build, if it is compatible
+    previous = {}
+    old = None if full else open_artifact(index_dir)
+    if old is not None and all(old.manifest.get(k) == v for k, v in versions.items()):
+        for i, job in enumerate(old.jobs):
+            previous[job["title"]] = (job, old.job_skills(i))
+
+    counts = {"reused": 0, "extracted": 0, "removed": 0, "failed": 0}
+    jobs, job_skills = [], []
+    for filename in sorted(os.listdir(source_dir)):
+        file_path = os.path.join(source_dir, filename)
+        if not os.path.isfile(file_path) or not filename.lower().endswith((".txt", ".pdf", ".docx")):
+            continue
+
+        stat = os.stat(file_path)
+        old_job, old_skills = previous.pop(filename, (None, None))
+        if old_job and old_job["size"] == stat.st_size and old_job["mtime_ns"] == stat.st_mtime_ns:
+            jobs.append(old_job)
+            job_skills.append(old_skills)
+            counts["reused"] += 1
+            continue
+
+        fingerprint = _fingerprint(file_path)
+        if old_job and old_job["sha1"] == fingerprint["sha1"]:
+            jobs.append({"title": filename, **fingerprint})
+            job_skills.append(old_skills)
+            counts["reused"] += 1
+            continue
+
+        jd_text = extractor.extract_text(file_path)
+        if not jd_text:
+            counts["failed"] += 1
+            continue
+        jobs.append({"title": filename, **fingerprint})
+        job_skills.append(extract_skills_from_text(jd_text, taxonomy))
+        counts["extracted"] += 1
+    counts["removed"] = len(previous)
+
+    # Arrays
+    vocab = sorted({skill for skills in job_skills for skill in skills})
+    vocab_index = {skill: i for i, skill in enumerate(vocab)}
+    skill_ids = np.array([vocab_index[s] for skills in job_skills for s in skills], dtype=np.int32)
+    offsets = np.concatenate([[0], np.cumsum([len(skills) for skills in job_skills])]).astype(np.int64)
+    if vocab:
+        embeddings = semantic_matcher.normalize(semantic_matcher.embed_skills(vocab)).astype(np.float32)
+    else:
+        embeddings = np.zeros((0, 1), dtype=np.float32)
+    centroids = np.zeros((len(jobs), embeddings.shape[1]), dtype=np.float32)
+    for i in range(len(jobs)):
+        rows = skill_ids[offsets[i]:offsets[i + 1]]
+        if len(rows):
+            centroid = embeddings[rows].mean(axis=0)
+            centroids[i] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+    # Write into a fresh build directory, then flip CURRENT atomically
+    build_id = hashlib.sha1(
+        json.dumps([versions, jobs], sort_keys=True).encode("utf-8")
+    ).hexdigest()[:12]
+    manifest = {**versions, "build_id": build_id, "source": source_dir,
+                "created": time.time(), "jobs": jobs, "vocab": vocab}
+
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=index_dir, prefix=".build-")
+    try:
+        np.save(os.path.join(tmp_dir, "skill_ids.npy"), skill_ids)
+        np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_dir, "embeddings.npy"), embeddings)
+        np.save(os.path.join(tmp_dir, "centroids.npy"), centroids)
+        with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+        build_dir = os.path.join(index_dir, f"build-{build_id}")
+        if os.path.exists(build_dir):
+            shutil.rmtree(tmp_dir)
+        else:
+            os.rename(tmp_dir, build_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    fd, tmp_current = tempfile.mkstemp(dir=index_dir, prefix=".current-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(f"build-{build_id}\n")
+    os.replace(tmp_current, os.path.join(index_dir, CURRENT_FILE))
+
+    # Older builds may still be mapped by running workers, keep the previous one
+    builds = sorted(
+        (d for d in os.listdir(index_dir) if d.startswith("build-")),
+        key=lambda d: os.path.getmtime(os.path.join(index_dir, d)),
+    )
+    keep = {f"build-{build_id}", os.path.basename(old.path) if old else None}
+    for stale in builds[:-2]:
+        if stale not in keep:
+            shutil.rmtree(os.path.join(index_dir, stale), ignore_errors=True)
+
+    log(f"JD index build-{build_id}: {len(jobs)} JDs, {len(vocab)} skills "
+        f"({counts['extracted']} extracted, {counts['reused']} reused, {counts['removed']} removed)")
+    return counts
+
+
+_JOB_INDEX = {"index": None, "key": None}
+_JOB_INDEX_LOCK = threading.Lock()
+
+
+def _current_key(index_dir: str):
+    try:
+        return os.stat(os.path.join(index_dir, CURRENT_FILE)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_job_index() -> "recommender.JobIndex":
+    """
+    The process-wide JobIndex, created on first use.
+
+    It is loaded from the compiled artifact (see `manage.py build_jd_index`)
+    and reloaded when a new build is published. Without an artifact it
+    falls back to parsing the JD directory, like before.
+    """
+    index_dir = default_index_dir()
+    key = _current_key(index_dir)
+    if _JOB_INDEX["index"] is not None and _JOB_INDEX["key"] == key:
+        return _JOB_INDEX["index"]
+
+    with _JOB_INDEX_LOCK:
+        if _JOB_INDEX["index"] is not None and _JOB_INDEX["key"] == key:
+            return _JOB_INDEX["index"]
+
+        artifact = open_artifact(index_dir) if key is not None else None
+        if artifact is not None:
+            job_index = recommender.JobIndex.from_artifact(artifact)
+        else:
+            job_index = recommender.JobIndex.from_database(recommender.load_sample_jds(default_source_dir()))
+        _JOB_INDEX.update(index=job_index, key=key)
+        return job_index
+
+
+def warmup():
+    """Embeds the taxonomy and loads the JD catalog (run on preload)."""
+    semantic_matcher.prewarm(get_skill_taxonomy().skill_list)
+    get_job_index()
+
+
+add_warmup(warmup)
@@ -1,16 +1,20 @@
 # backend/jd_processor.py
 
-from .skill_extractor import load_skill_taxonomy, extract_skills_from_text
+from .skill_extractor import get_skill_taxonomy, extract_skills_from_text
 from . import extractor  # We'll re-use the text extractor
+from . import tracing
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 def process_jd_text(jd_text: str) -> list:
     """
-    Takes raw JD text, loads the skill taxonomy,
+    Takes raw JD text, uses the shared skill taxonomy,
     and returns a clean list of skills found in the JD.
     """
-    # Load the master list of all possible skills
-    skill_list_set = load_skill_taxonomy()
+    # The master list of all possible skills (cached per process)
+    skill_list_set = get_skill_taxonomy()
     
     # Extract skills from the JD text
     jd_skills = extract_skills_from_text(jd_text, skill_list_set)
@@ -23,13 +27,15 @@ def process_jd_file(file_path: str) -> list:
     extracts the text, and returns its skill list.
     """
     if not os.path.exists(file_path):
-        print(f"[ERROR] Job description file not found at: {file_path}")
+        tracing.metrics.error("jd_file")
+        logger.error("Job description file not found at %s", file_path)
         return []
         
     jd_text = extractor.extract_text(file_path)
     
     if not jd_text:
-        print(f"[ERROR] Could not extract text from JD file: {file_path}")
+        tracing.metrics.error("jd_file")
+        logger.error("Could not extract text from JD file %s", file_path)
         return []
         
     return process_jd_text(jd_text)
\ No newline at end of file
@@ -0,0 +1,187 @@
+# backend/jobs.py
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import batch, pipeline
+from .models import ScanJob, ScanQueue
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by enqueue() when SCAN_QUEUE_MAX jobs are already waiting or running."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(resume_filename: str, resume_data: bytes, jd_text: str, user=None, kind=ScanJob.SCAN) -> ScanJob:
+    """
+    Stores a scan request (or with kind=BATCH, a batch.pack_resumes()
+    zip) and wakes the local workers.
+    Raises QueueFull instead of queueing more than SCAN_QUEUE_MAX jobs.
+    """
+    with transaction.atomic():
+        # Lock the queue row first: other enqueues wait here until this one has inserted
+        if not ScanQueue.objects.filter(pk=1).update(updated_at=timezone.now()):
+            ScanQueue.objects.get_or_create(pk=1)
+            ScanQueue.objects.filter(pk=1).update(updated_at=timezone.now())
+
+        active = ScanJob.objects.filter(status__in=[ScanJob.QUEUED, ScanJob.RUNNING]).count()
+        if active >= _setting("SCAN_QUEUE_MAX", 20):
+            raise QueueFull(f"{active} scans are already queued")
+
+        job = ScanJob.objects.create(
+            user=user if user is not None and user.is_authenticated else None,
+            kind=kind,
+            resume_filename=resume_filename,
+            resume_data=resume_data,
+            jd_text=jd_text,
+        )
+    pool.wake()
+    return job
+
+
+def _claim_next_job():
+    """Atomically moves the oldest queued job to RUNNING and returns it."""
+    for job_id in ScanJob.objects.filter(status=ScanJob.QUEUED).order_by("id").values_list("id", flat=True)[:5]:
+        # Another thread or process may have taken it first
+        now = timezone.now()
+        claimed = ScanJob.objects.filter(pk=job_id, status=ScanJob.QUEUED).update(
+            status=ScanJob.RUNNING, started_at=now, heartbeat_at=now, attempts=F("attempts") + 1
+        )
+        if claimed:
+            return ScanJob.objects.get(pk=job_id)
+    return None
+
+
+def _heartbeat(job_id, stop: threading.Event):
+    """Marks the job alive every SCAN_JOB_HEARTBEAT_SECONDS until `stop` is set."""
+    try:
+        while not stop.wait(_setting("SCAN_JOB_HEARTBEAT_SECONDS", 30)):
+            ScanJob.objects.filter(pk=job_id, status=ScanJob.RUNNING).update(heartbeat_at=timezone.now())
+    except Exception:
+        logger.exception("Heartbeat of scan job %s failed", job_id)
+    finally:
+        connection.close()
+
+
+def process_job(job: ScanJob):
+    """Runs the scan pipeline for one claimed job and stores the result."""
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job.pk, stop), name=f"scan-job-{job.pk}", daemon=True)
+    heartbeat.start()
+    try:
+        if job.kind == ScanJob.BATCH:
+            job.result = {"rows": batch.scan_batch_archive(
+                bytes(job.resume_data), job.jd_text, user=job.user, workers=_setting("BATCH_WORKERS", 1)
+            )}
+        else:
+            job.result = pipeline.run_scan(bytes(job.resume_data), job.resume_filename, job.jd_text, job.user)
+        job.status = ScanJob.DONE
+    except Exception as e:
+        logger.exception("Scan job %s failed", job.pk)
+        job.status = ScanJob.FAILED
+        job.error = str(e)
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    job.finished_at = timezone.now()
+    # The upload is not needed anymore once the scan has run
+    job.resume_data = b""
+    job.save(update_fields=["status", "result", "error", "finished_at", "resume_data"])
+    logger.info("Scan job %s %s: queued %.2fs, ran %.2fs",
+                job.pk, job.status, job.queue_seconds or 0, job.run_seconds or 0)
+
+
+def run_pending(limit=None) -> int:
+    """Processes queued jobs in the calling thread. Returns how many ran."""
+    count = 0
+    while limit is None or count < limit:
+        job = _claim_next_job()
+        if job is None:
+            break
+        process_job(job)
+        count += 1
+    return count
+
+
+def requeue_stale_jobs():
+    """
+    Puts back jobs left RUNNING by a worker process that died: those
+    without a heartbeat for SCAN_JOB_TIMEOUT, however long they have run.
+    Jobs that already had SCAN_JOB_MAX_ATTEMPTS runs fail instead.
+    Returns how many were queued again.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=_setting("SCAN_JOB_TIMEOUT", 300))
+    stale = ScanJob.objects.filter(status=ScanJob.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    max_attempts = _setting("SCAN_JOB_MAX_ATTEMPTS", 3)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ScanJob.FAILED, finished_at=now, resume_data=b"",
+        error=f"The scan stopped its worker {max_attempts} times, giving up.",
+    )
+    if failed:
+        logger.warning("%d scan jobs failed after %d attempts", failed, max_attempts)
+    return stale.filter(attempts__lt=max_attempts).update(status=ScanJob.QUEUED, started_at=None, heartbeat_at=None)
+
+
+class WorkerPool:
+    """
+    SCAN_WORKERS threads in this process that pull jobs from the ScanJob
+    table. The table is the queue, so no external broker is needed and
+    every gunicorn worker can help drain it.
+    Started lazily by the first enqueue().
+    """
+
+    def __init__(self):
+        self._threads = []
+        self._wake = threading.Condition()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            size = _setting("SCAN_WORKERS", 2)
+            for i in range(size):
+                thread = threading.Thread(target=self._run, name=f"scan-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def wake(self):
+        if not self._threads:
+            self.start()
+        with self._wake:
+            self._wake.notify()
+
+    def _run(self):
+        poll = _setting("SCAN_JOB_POLL_SECONDS", 2.0)
+        requeue_stale_jobs()
+        while True:
+            close_old_connections()
+            try:
+                ran = run_pending(limit=1)
+            except Exception:
+                logger.exception("Scan worker error")
+                ran = 0
+                time.sleep(poll)
+            if not ran:
+                # Jobs may also be queued by other processes, so poll as well
+                with self._wake:
+                    self._wake.wait(timeout=poll)
+
+
+pool = WorkerPool()
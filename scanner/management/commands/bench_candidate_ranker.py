@@ -0,0 +1,54 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from scanner import semantic_matcher, skill_similarity
+from scanner.candidate_ranker import CandidateIndex
+from scanner.management.commands.bench_history import percentile
+from scanner.skill_extractor import get_skill_taxonomy
+
+
+class Command(BaseCommand):
+    help = "Benchmarks corpus-wide candidate ranking (sparse CandidateIndex) on synthetic candidates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidates", type=int, default=100000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--top-k", type=int, default=20)
+        parser.add_argument("--threshold", type=float, default=0.70)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        skills = list(get_skill_taxonomy().skill_list)
+        semantic_matcher.prewarm(skills)
+        # Power-law skill popularity, 3-15 matched skills per candidate
+        weights = [1.0 / (rank + 1) for rank in range(len(skills))]
+        skill_lists = [
+            rng.choices(skills, weights=weights, k=rng.randint(3, 15))
+            for _ in range(options["candidates"])
+        ]
+
+        start = time.perf_counter()
+        index = CandidateIndex(list(range(len(skill_lists))), skill_lists)
+        build_s = time.perf_counter() - start
+
+        # rank() reads the precomputed skill similarity matrix (loaded here, outside the timings)
+        similarities = skill_similarity.get_similarity_matrix().scores(index.vocab, index.vocab)
+        near = (similarities >= options["threshold"]).sum(axis=1).mean() - 1
+
+        timings = []
+        for _ in range(options["queries"]):
+            jd_skills = rng.sample(skills, rng.randint(5, 25))
+            start = time.perf_counter()
+            index.rank(jd_skills, top_k=options["top_k"], threshold=options["threshold"])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f"{len(index)} candidates, {index.matrix.nnz} skill entries, built in {build_s:.2f}s\n"
+            f"{near:.1f} other skills near each skill on average (threshold {options['threshold']})\n"
+            f"rank top-{options['top_k']}: p50 {statistics.median(timings):.1f} ms, "
+            f"p99 {percentile(timings, 0.99):.1f} ms"
+        )
@@ -0,0 +1,106 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner import model_registry, semantic_matcher
+from scanner.skill_extractor import get_skill_taxonomy
+
+
+class Command(BaseCommand):
+    help = ("Compares the SBERT backends (torch fp32, onnx, int8) on the skill taxonomy: load time, "
+            "resident memory, throughput, single-skill latency and match decisions at the threshold vs. fp32.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", nargs="+", default=list(semantic_matcher.BACKENDS),
+                            choices=semantic_matcher.BACKENDS)
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--repeat", type=int, default=3, help="Passes over the taxonomy per backend.")
+        parser.add_argument("--threshold", type=float, default=0.70)
+        # Internal: run one backend in this process and write its results to this directory
+        parser.add_argument("--worker", help="Output directory (used by the command itself).")
+
+    def handle(self, *args, **options):
+        skills = get_skill_taxonomy().skill_list
+        if options["worker"]:
+            self.run_backend(options["backends"][0], skills, options)
+            return
+
+        results = {}
+        with tempfile.TemporaryDirectory() as out_dir:
+            # One process per backend, so each one's memory is measured on its own
+            for backend in options["backends"]:
+                command = [
+                    sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "bench_encoder",
+                    "--backends", backend, "--worker", out_dir,
+                    "--batch-size", str(options["batch_size"]), "--repeat", str(options["repeat"]),
+                ]
+                completed = subprocess.run(command, capture_output=True, text=True)
+                if completed.returncode != 0:
+                    error = (completed.stderr.strip().splitlines() or ["no output"])[-1]
+                    self.stderr.write(f"{backend}: could not run ({error})")
+                    continue
+                with open(os.path.join(out_dir, f"{backend}.json"), encoding="utf-8") as f:
+                    results[backend] = json.load(f)
+                results[backend]["vectors"] = np.load(os.path.join(out_dir, f"{backend}.npy"))
+
+        if not results:
+            raise CommandError("No backend could be loaded.")
+
+        reference = results.get("torch", {}).get("vectors")
+        self.stdout.write(f"{len(skills)} taxonomy skills, batch size {options['batch_size']}\n")
+        self.stdout.write(
+            f"{'backend':<8} {'load s':>7} {'+RSS MB':>8} {'skills/s':>9} {'p50 ms':>7} "
+            f"{'agree':>8} {'flips':>6} {'max diff':>9}"
+        )
+        for backend, result in results.items():
+            if reference is not None:
+                parity = semantic_matcher.decision_parity(reference, result["vectors"], options["threshold"])
+                agreement = f"{parity['agreement']:8.3%} {parity['flipped']:6d} {parity['max_abs_diff']:9.4f}"
+            else:
+                agreement = f"{'n/a':>8} {'':>6} {'':>9}"
+            self.stdout.write(
+                f"{backend:<8} {result['load_seconds']:7.2f} {result['rss_delta_bytes'] / 2**20:8.0f} "
+                f"{result['skills_per_second']:9.0f} {result['single_p50_ms']:7.2f} {agreement}"
+            )
+        if reference is None:
+            self.stdout.write("(include torch in --backends to compare match decisions against fp32)")
+
+    def run_backend(self, backend: str, skills: list, options):
+        rss_before = model_registry.current_rss_bytes()
+        start = time.perf_counter()
+        model = semantic_matcher.load_encoder(backend)
+        load_seconds = time.perf_counter() - start
+
+        # First call pays for lazy initialisation, keep it out of the timings
+        model.encode(skills[:options["batch_size"]], batch_size=options["batch_size"])
+        rss_delta = max(model_registry.current_rss_bytes() - rss_before, 0)
+
+        timings = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            vectors = model.encode(skills, batch_size=options["batch_size"], convert_to_numpy=True)
+            timings.append(time.perf_counter() - start)
+
+        single = []
+        for skill in skills[:100]:
+            start = time.perf_counter()
+            model.encode([skill], convert_to_numpy=True)
+            single.append((time.perf_counter() - start) * 1000)
+
+        out_dir = options["worker"]
+        np.save(os.path.join(out_dir, f"{backend}.npy"), np.asarray(vectors, dtype=np.float32))
+        with open(os.path.join(out_dir, f"{backend}.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "load_seconds": load_seconds,
+                "rss_delta_bytes": rss_delta,
+                "skills_per_second": len(skills) / min(timings),
+                "single_p50_ms": statistics.median(single),
+            }, f)
@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from scanner import pagination
+from scanner.models import ScanHistory
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = ("Seeds a throwaway test database with one recruiter's scans and reports "
+            "p50/p99 latency of the history page (keyset pages vs. loading every row).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scans", type=int, default=100000)
+        parser.add_argument("--pages", type=int, default=200, help="Random pages to request.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Never touch the real database: create (and drop) the test database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def seed(self, user, count: int, rng: random.Random):
+        skills = ["python", "django", "sql", "docker", "aws", "react", "java", "kubernetes"]
+        now = timezone.now()
+        rows = (
+            ScanHistory(
+                user=user,
+                candidate_name=f"Candidate {i}",
+                email=f"candidate{i}@example.com",
+                resume_filename=f"resume_{i}.pdf",
+                ats_score=round(rng.uniform(10, 100), 1),
+                matched_skills=rng.sample(skills, 4),
+                missing_skills=rng.sample(skills, 3),
+                recommendations=[{"job_title": "Backend Developer", "match_score": 80.0}] * 3,
+            )
+            for i in range(count)
+        )
+        created = ScanHistory.objects.bulk_create(rows, batch_size=2000)
+        # auto_now_add stamps every row the same: spread them over a year, with some ties
+        for scan in created:
+            scan.scan_date = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600) // 10 * 10)
+        ScanHistory.objects.bulk_update(created, ["scan_date"], batch_size=2000)
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        user = User.objects.create_user(username="bench-recruiter", password="bench-password")
+
+        start = time.perf_counter()
+        self.seed(user, options["scans"], rng)
+        self.stdout.write(f"Seeded {options['scans']} scans in {time.perf_counter() - start:.1f}s")
+
+        client = Client()
+        client.force_login(user)
+
+        # Cursors of random pages: the row just before each page
+        positions = list(
+            ScanHistory.objects.filter(user=user).order_by('-scan_date', '-id').only('id', 'scan_date')
+        )
+        cursors = [None] + [pagination.encode_cursor(rng.choice(positions)) for _ in range(options["pages"] - 1)]
+
+        timings = []
+        for cursor in cursors:
+            start = time.perf_counter()
+            response = client.get('/history/', {'cursor': cursor} if cursor else {})
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+
+        legacy = []
+        for _ in range(min(5, options["pages"])):
+            start = time.perf_counter()
+            list(ScanHistory.objects.filter(user=user).order_by('-scan_date'))
+            legacy.append((time.perf_counter() - start) * 1000)
+
+        with connection.cursor() as cursor:
+            plan_sql, params = (
+                ScanHistory.objects.filter(user=user).order_by('-scan_date', '-id')
+                .only(*pagination.HISTORY_LIST_FIELDS)[:51].query.sql_with_params()
+            )
+            if connection.vendor == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + plan_sql, params)
+                plan = " / ".join(row[-1] for row in cursor.fetchall())
+            else:
+                plan = "n/a"
+
+        self.stdout.write(f"{'':<32} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        self.stdout.write(
+            f"{'history page (keyset, lean)':<32} {statistics.median(timings):8.1f} "
+            f"{percentile(timings, 0.99):8.1f} {statistics.mean(timings):8.1f}"
+        )
+        self.stdout.write(
+            f"{'all rows, all columns (old)':<32} {statistics.median(legacy):8.1f} "
+            f"{percentile(legacy, 0.99):8.1f} {statistics.mean(legacy):8.1f}"
+        )
+        self.stdout.write(f"Query plan: {plan}")
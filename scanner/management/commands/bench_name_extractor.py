@@ -0,0 +1,69 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner import extractor, name_extractor
+
+
+def full_pipeline_name(nlp, text: str):
+    """The old extract_name: the whole en_core_web_sm pipeline, one resume at a time."""
+    return name_extractor._person(nlp(" ".join(text.split())[:name_extractor.HEAD_CHARS]))
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks name extraction on dataset/sample_resume: the full spaCy pipeline per resume "
+            "vs. the NER-only pipeline over nlp.pipe, with agreement between the two.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--directory", default=os.path.join(settings.BASE_DIR, "dataset", "sample_resume"))
+        parser.add_argument("--limit", type=int, default=0, help="Only the first N resumes (0: all).")
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument("--n-process", type=int, default=1)
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        files = sorted(
+            name for name in os.listdir(directory) if name.lower().endswith((".pdf", ".docx", ".txt"))
+        )
+        if options["limit"]:
+            files = files[:options["limit"]]
+        if not files:
+            raise CommandError(f"No resumes in {directory}")
+
+        start = time.perf_counter()
+        texts = [extractor.extract_text(os.path.join(directory, name), name, parallel=False) for name in files]
+        self.stdout.write(f"Extracted {len(texts)} resumes in {time.perf_counter() - start:.1f}s\n")
+
+        import spacy
+        full_nlp = spacy.load(name_extractor.SPACY_MODEL)
+        name_extractor.get_nlp()
+        # Warm both up so neither timing includes lazy initialisation
+        full_pipeline_name(full_nlp, texts[0])
+        name_extractor.extract_names(texts[:1])
+
+        start = time.perf_counter()
+        expected = [full_pipeline_name(full_nlp, text) for text in texts]
+        full_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        names = name_extractor.extract_names(
+            texts, batch_size=options["batch_size"], n_process=options["n_process"]
+        )
+        fast_seconds = time.perf_counter() - start
+
+        agree = sum(a == b for a, b in zip(names, expected))
+
+        self.stdout.write(f"{'':<36} {'names/s':>9} {'total s':>8}")
+        self.stdout.write(f"{'full pipeline, one by one (old)':<36} {len(texts) / full_seconds:9.0f} {full_seconds:8.2f}")
+        self.stdout.write(
+            f"{'NER-only nlp.pipe':<36} {len(texts) / fast_seconds:9.0f} {fast_seconds:8.2f}"
+        )
+        self.stdout.write(f"Same name as the old output: {agree}/{len(texts)} ({agree / len(texts):.1%})")
+
+        disagreements = [
+            (file, old, new) for file, old, new in zip(files, expected, names) if old != new
+        ]
+        for file, old, new in disagreements[:10]:
+            self.stdout.write(f"  {file}: {old!r} -> {new!r}")
@@ -0,0 +1,216 @@
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from scanner import model_registry, pipeline, semantic_matcher, tracing
+from scanner.management.commands.bench_history import percentile
+from scanner.scan_cache import get_scan_cache
+
+# Results older than this layout can't be compared
+FORMAT_VERSION = 1
+
+
+def distribution(values: list) -> dict:
+    """p50/p95/p99/mean of millisecond timings."""
+    return {
+        "count": len(values),
+        "p50": round(statistics.median(values), 2),
+        "p95": round(percentile(values, 0.95), 2),
+        "p99": round(percentile(values, 0.99), 2),
+        "mean": round(statistics.mean(values), 2),
+    }
+
+
+def regressions(baseline: dict, current: dict, max_slowdown: float, min_ms: float = 1.0) -> list:
+    """
+    What got more than `max_slowdown` (0.10 = 10%) worse than the
+    baseline: end-to-end p50/p95, throughput, and the p50 of every stage
+    that took at least `min_ms` in the baseline (faster ones are noise).
+    """
+    found = []
+
+    def check(name, before, after, higher_is_better=False):
+        if not before:
+            return
+        change = (before - after) / before if higher_is_better else (after - before) / before
+        if change > max_slowdown:
+            found.append(f"{name}: {before} -> {after} ({change:+.1%} worse)")
+
+    base, cur = baseline["summary"], current["summary"]
+    for q in ("p50", "p95"):
+        check(f"end-to-end {q} ms", base["end_to_end"][q], cur["end_to_end"][q])
+    check("docs/s", base["docs_per_second"], cur["docs_per_second"], higher_is_better=True)
+    for stage, stats in base["stages"].items():
+        if stage in cur["stages"] and stats["p50"] >= min_ms:
+            check(f"{stage} p50 ms", stats["p50"], cur["stages"][stage]["p50"])
+    return found
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+class Command(BaseCommand):
+    help = ("Runs the full scan pipeline (extract, parse, skills, match, score, recommend, save) over "
+            "dataset/sample_resume x dataset/sample_jds and reports per-stage and end-to-end latency, "
+            "docs/s, peak RSS and model calls. --output writes JSON, --compare fails on regressions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--resumes", default=os.path.join(settings.BASE_DIR, "dataset", "sample_resume"))
+        parser.add_argument("--jds", default=os.path.join(settings.BASE_DIR, "dataset", "sample_jds"))
+        parser.add_argument("--limit", type=int, default=0, help="Only the first N resumes (0: all).")
+        parser.add_argument("--jd-limit", type=int, default=0, help="Only the first N JDs (0: all).")
+        parser.add_argument("--warm-cache", action="store_true",
+                            help="Keep the scan cache between scans (by default every scan runs every stage).")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Baseline JSON from an earlier --output run.")
+        parser.add_argument("--max-slowdown", type=float, default=0.10,
+                            help="With --compare: fail if anything is more than this much slower (0.10 = 10%%).")
+        parser.add_argument("--min-stage-ms", type=float, default=5.0,
+                            help="With --compare: ignore stages faster than this in the baseline (noise).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("format") != FORMAT_VERSION:
+                raise CommandError(f"{options['compare']} is not a bench_pipeline result (format {FORMAT_VERSION})")
+
+        resumes = self.files(options["resumes"], (".pdf", ".docx", ".txt"), options["limit"])
+        jds = self.files(options["jds"], (".txt",), options["jd_limit"])
+        if not resumes or not jds:
+            raise CommandError("No resumes or no JDs found.")
+
+        # Scans are saved: never touch the real database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run(resumes, jds, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.report(results)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+        if baseline is not None:
+            found = regressions(baseline, results, options["max_slowdown"], options["min_stage_ms"])
+            commit = baseline["meta"].get("commit") or options["compare"]
+            if found:
+                self.stdout.write(self.style.ERROR(f"\nRegressions against {commit}:"))
+                for line in found:
+                    self.stdout.write(f"  {line}")
+                raise CommandError(f"{len(found)} regression(s) above {options['max_slowdown']:.0%}")
+            self.stdout.write(self.style.SUCCESS(f"\nNo regression above {options['max_slowdown']:.0%} against {commit}"))
+
+    def files(self, directory: str, extensions: tuple, limit: int) -> list:
+        names = sorted(name for name in os.listdir(directory) if name.lower().endswith(extensions))
+        return [os.path.join(directory, name) for name in (names[:limit] if limit else names)]
+
+    def run(self, resumes: list, jds: list, options) -> dict:
+        jd_texts = []
+        for path in jds:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                jd_texts.append(f.read())
+        resume_data = []
+        for path in resumes:
+            with open(path, "rb") as f:
+                resume_data.append((os.path.basename(path), f.read()))
+
+        user = User.objects.create_user(username="bench-recruiter", password="bench-password")
+
+        # Models, taxonomy, similarity matrix and JD catalog are loaded up front, not timed
+        start = time.perf_counter()
+        model_registry.preload()
+        load_seconds = time.perf_counter() - start
+        self.stdout.write(f"Loaded models in {load_seconds:.1f}s; "
+                          f"{len(resumes)} resumes x {len(jds)} JDs = {len(resumes) * len(jds)} scans")
+
+        cache = get_scan_cache()
+        cache.clear()
+        encode_before = dict(semantic_matcher.MODEL_STATS)
+        tracing.metrics.reset()
+
+        end_to_end, stages = [], {}
+        bench_start = time.perf_counter()
+        for filename, data in resume_data:
+            for jd_text in jd_texts:
+                if not options["warm_cache"]:
+                    cache.clear()
+                with tracing.collect() as trace:
+                    start = time.perf_counter()
+                    pipeline.run_scan(data, filename, jd_text, user)
+                    end_to_end.append((time.perf_counter() - start) * 1000)
+                per_stage = {}
+                for stage, wall in trace.spans:
+                    per_stage[stage] = per_stage.get(stage, 0.0) + wall * 1000
+                for stage, ms in per_stage.items():
+                    stages.setdefault(stage, []).append(ms)
+        total_seconds = time.perf_counter() - bench_start
+
+        scans = len(end_to_end)
+        return {
+            "format": FORMAT_VERSION,
+            "meta": {
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "sbert_backend": semantic_matcher.BACKEND,
+                "model_version": semantic_matcher.MODEL_VERSION,
+                "resumes": len(resumes),
+                "jds": len(jds),
+                "warm_cache": options["warm_cache"],
+                "model_load_seconds": round(load_seconds, 2),
+            },
+            "summary": {
+                "scans": scans,
+                "total_seconds": round(total_seconds, 2),
+                "docs_per_second": round(scans / total_seconds, 2),
+                # ru_maxrss is KB on Linux
+                "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "model_calls": {
+                    "sbert_encode_calls": semantic_matcher.MODEL_STATS["encode_calls"] - encode_before["encode_calls"],
+                    "sbert_encoded_texts":
+                        semantic_matcher.MODEL_STATS["encoded_texts"] - encode_before["encoded_texts"],
+                    "spacy_ner_calls": tracing.metrics.stage_count("spacy_ner"),
+                },
+                "end_to_end": distribution(end_to_end),
+                "stages": {stage: distribution(values) for stage, values in sorted(stages.items())},
+            },
+        }
+
+    def report(self, results: dict):
+        summary = results["summary"]
+        self.stdout.write(f"\n{'stage':<14} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        rows = list(summary["stages"].items()) + [("end-to-end", summary["end_to_end"])]
+        for stage, stats in rows:
+            self.stdout.write(f"{stage:<14} {stats['count']:6d} {stats['p50']:8.1f} {stats['p95']:8.1f} "
+                              f"{stats['p99']:8.1f} {stats['mean']:8.1f}")
+        calls = summary["model_calls"]
+        self.stdout.write(
+            f"\n{summary['scans']} scans in {summary['total_seconds']:.1f}s: {summary['docs_per_second']:.2f} docs/s, "
+            f"peak RSS {summary['peak_rss_mb']:.0f} MB"
+        )
+        self.stdout.write(
+            f"Model calls: SBERT {calls['sbert_encode_calls']} ({calls['sbert_encoded_texts']} texts), "
+            f"spaCy NER {calls['spacy_ner_calls']}"
+        )
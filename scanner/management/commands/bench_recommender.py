@@ -0,0 +1,74 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from scanner import recommender, semantic_matcher
+from scanner.skill_extractor import get_skill_taxonomy
+
+
+def synthetic_catalog(skills: list, size: int, rng: random.Random) -> dict:
+    """
+    Fake JDs with 5-20 taxonomy skills each. Skill popularity follows a
+    power law, like real postings (lots of "python", few "cobol").
+    """
+    weights = [1.0 / (rank + 1) for rank in range(len(skills))]
+    catalog = {}
+    for i in range(size):
+        n_skills = rng.randint(5, 20)
+        catalog[f"Job_{i:06d}.txt"] = sorted(set(rng.choices(skills, weights=weights, k=n_skills)))
+    return catalog
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the indexed job recommender against scoring every JD, on synthetic catalogs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+        parser.add_argument("--queries", type=int, default=20)
+        parser.add_argument("--top-n", type=int, default=3)
+        parser.add_argument("--shortlist", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        skills = list(get_skill_taxonomy().skill_list)
+        rng.shuffle(skills)
+        # All synthetic skills come from the taxonomy: one model call at most
+        semantic_matcher.prewarm(skills)
+
+        resumes = [rng.sample(skills, rng.randint(5, 25)) for _ in range(options["queries"])]
+        top_n = options["top_n"]
+
+        self.stdout.write(
+            f"{'jobs':>8} {'index build s':>14} {'index ms/query':>15} "
+            f"{'full scan ms/query':>19} {'top-n agreement':>16}"
+        )
+        for size in options["sizes"]:
+            catalog = synthetic_catalog(skills, size, rng)
+
+            start = time.perf_counter()
+            job_index = recommender.JobIndex.from_database(catalog, shortlist_size=options["shortlist"])
+            build_s = time.perf_counter() - start
+            job_matrix = recommender.JobMatrix(catalog)
+
+            index_times, full_times, agreement = [], [], []
+            for resume_skills in resumes:
+                start = time.perf_counter()
+                indexed = job_index.recommend(resume_skills, top_n)
+                index_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                exact = recommender.recommend_jobs(resume_skills, job_matrix, top_n)
+                full_times.append(time.perf_counter() - start)
+
+                # Compare scores, not titles: ties can pick different jobs
+                agreement.append(
+                    [job["match_score"] for job in indexed] == [job["match_score"] for job in exact]
+                )
+
+            self.stdout.write(
+                f"{size:>8} {build_s:14.2f} {np.mean(index_times) * 1000:15.2f} "
+                f"{np.mean(full_times) * 1000:19.2f} {np.mean(agreement) * 100:15.1f}%"
+            )
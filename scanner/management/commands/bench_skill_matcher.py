@@ -0,0 +1,86 @@
+import os
+import random
+import string
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scanner.skill_extractor import (
+    SkillMatcher,
+    extract_skills_from_text_regex,
+    load_skill_taxonomy,
+)
+
+
+def synthetic_taxonomy(base_skills: set, size: int, seed: int = 0) -> set:
+    """
+    Pads the real taxonomy with made-up skills (1-3 short words each)
+    until it has `size` entries.
+    """
+    rng = random.Random(seed)
+    skills = set(base_skills)
+    while len(skills) < size:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        skills.add(" ".join(words))
+    return skills
+
+
+def load_documents(jd_directory: str) -> list:
+    docs = []
+    for filename in sorted(os.listdir(jd_directory)):
+        if filename.endswith(".txt"):
+            with open(os.path.join(jd_directory, filename), encoding="utf-8", errors="ignore") as f:
+                docs.append(f.read())
+    return docs
+
+
+class Command(BaseCommand):
+    help = "Benchmarks skill extraction (compiled matcher vs. per-skill regex) as the taxonomy grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[355, 1000, 5000, 10000, 50000])
+        parser.add_argument("--repeat", type=int, default=3, help="Passes over the documents per size.")
+        parser.add_argument(
+            "--regex-limit", type=int, default=10000,
+            help="Skip the per-skill regex baseline above this taxonomy size (it gets very slow).",
+        )
+
+    def handle(self, *args, **options):
+        docs = load_documents(os.path.join(settings.BASE_DIR, "dataset", "sample_jds"))
+        if not docs:
+            self.stderr.write("No sample JDs found.")
+            return
+
+        base = load_skill_taxonomy()
+        n_chars = sum(len(d) for d in docs) // len(docs)
+        self.stdout.write(f"{len(docs)} documents, avg {n_chars} chars\n")
+        self.stdout.write(f"{'skills':>8} {'build ms':>10} {'matcher ms/doc':>15} {'regex ms/doc':>13} {'speedup':>8}")
+
+        for size in options["sizes"]:
+            skills = synthetic_taxonomy(base, size)
+
+            start = time.perf_counter()
+            matcher = SkillMatcher(skills)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(options["repeat"]):
+                for doc in docs:
+                    matcher.find_all(doc)
+            matcher_ms = (time.perf_counter() - start) * 1000 / (options["repeat"] * len(docs))
+
+            regex_ms = None
+            if size <= options["regex_limit"]:
+                start = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    for doc in docs:
+                        extract_skills_from_text_regex(doc, skills)
+                regex_ms = (time.perf_counter() - start) * 1000 / (options["repeat"] * len(docs))
+
+            regex_col = f"{regex_ms:13.2f}" if regex_ms is not None else f"{'skipped':>13}"
+            speedup_col = f"{regex_ms / matcher_ms:7.1f}x" if regex_ms is not None else f"{'-':>8}"
+            self.stdout.write(f"{size:>8} {build_ms:10.1f} {matcher_ms:15.3f} {regex_col} {speedup_col}")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from scanner import jd_index
+
+
+class Command(BaseCommand):
+    help = "Compiles a directory of job descriptions into the memory-mapped JD index used for recommendations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", help="Directory of JD files (.txt/.pdf/.docx). Defaults to JD_SOURCE_DIR.")
+        parser.add_argument("--output", help="Index directory. Defaults to JD_INDEX_DIR.")
+        parser.add_argument("--full", action="store_true", help="Re-extract every JD instead of reusing unchanged ones.")
+
+    def handle(self, *args, **options):
+        jd_index.build_jd_index(
+            source_dir=options["source"],
+            index_dir=options["output"],
+            full=options["full"],
+            log=self.stdout.write,
+        )
@@ -0,0 +1,499 @@
+import http.client
+import http.cookiejar
+import importlib.util
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.management.commands.bench_history import percentile
+from scanner.management.commands.bench_pipeline import git_commit
+
+FORMAT_VERSION = 1
+SERVERS = ("sync", "gthread", "asgi")
+
+# What the upload page says instead of a result (see views.home)
+SCAN_FAILED = b"could not scan this resume"
+SCANNER_BUSY = b"The scanner is busy"
+
+
+def multipart_body(fields: dict, files: dict, boundary: str = None):
+    """
+    A multipart/form-data body: `fields` {name: str}, `files` {name:
+    (filename, bytes)}. Returns (body, content type).
+    """
+    boundary = boundary or uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+                     + value.encode("utf-8") + b"\r\n")
+    for name, (filename, data) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def arrivals(rate: float, poisson: bool = False, seed: int = 0):
+    """
+    Offsets in seconds at which requests are due, `rate` per second:
+    evenly spaced, or with exponential gaps (a Poisson process) so
+    requests also bunch up the way real traffic does.
+    """
+    rng = random.Random(seed)
+    offset = 0.0
+    while True:
+        yield offset
+        offset += rng.expovariate(rate) if poisson else 1.0 / rate
+
+
+def distribution(values: list) -> dict:
+    """p50/p95/p99/max/mean of millisecond timings."""
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "count": len(values),
+        "p50": round(statistics.median(values), 1),
+        "p95": round(percentile(values, 0.95), 1),
+        "p99": round(percentile(values, 0.99), 1),
+        "max": round(max(values), 1),
+        "mean": round(statistics.mean(values), 1),
+    }
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    """
+    Totals for one run. Each sample is a dict with "at" (seconds since
+    the run started, when the request was due), "latency" (due to
+    answered, so time spent waiting for a free client counts, i.e. no
+    coordinated omission), "service" (sent to answered) and "outcome".
+    """
+    ok = [s for s in samples if s["outcome"] == "ok"]
+    errors = {}
+    for s in samples:
+        if s["outcome"] != "ok":
+            errors[s["outcome"]] = errors.get(s["outcome"], 0) + 1
+    # Answered requests per second of the run, to see throughput hold up or sag
+    per_second = [0] * (int(seconds) + 1)
+    for s in ok:
+        second = int(s["at"] + s["latency"])
+        if second < len(per_second):
+            per_second[second] += 1
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": round(1 - len(ok) / len(samples), 4) if samples else 0.0,
+        "seconds": round(seconds, 2),
+        "ok_per_second": round(len(ok) / seconds, 2) if seconds else 0.0,
+        "latency_ms": distribution([s["latency"] * 1000 for s in ok]),
+        "service_ms": distribution([s["service"] * 1000 for s in ok]),
+        "ok_per_second_timeline": per_second,
+    }
+
+
+# --- Server processes and their memory (Linux /proc) ---
+
+def memory_mb(pid: int, field: str = "Rss") -> float:
+    """
+    A process's memory in MB from /proc/<pid>/smaps_rollup (0 if it's
+    gone or there's no /proc). "Rss" counts the model weights the
+    workers share copy-on-write with the master in every one of them,
+    "Pss" splits shared pages between the processes using them, so the
+    workers' Pss adds up to what they really take on the box.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def child_pids(pid: int) -> list:
+    """The direct children of a process (gunicorn's workers)."""
+    children = []
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # "pid (comm) state ppid ...": comm may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+class MemorySampler:
+    """Every `interval` seconds, records the RSS and PSS of the master and each worker."""
+
+    def __init__(self, pid: int, interval: float):
+        self.pid = pid
+        self.interval = interval
+        self.timeline = []
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            workers = child_pids(self.pid)
+            self.timeline.append({
+                "t": round(time.perf_counter() - self._start, 2),
+                "master_mb": round(memory_mb(self.pid), 1),
+                "workers_mb": {str(pid): round(memory_mb(pid), 1) for pid in workers},
+                "total_pss_mb": round(sum(memory_mb(pid, "Pss") for pid in [self.pid] + workers), 1),
+                "workers_pss_mb": {str(pid): round(memory_mb(pid, "Pss"), 1) for pid in workers},
+            })
+            self._stop.wait(self.interval)
+
+    def summary(self) -> dict:
+        peak_worker = max((mb for s in self.timeline for mb in s["workers_mb"].values()), default=0.0)
+        peak_worker_pss = max((mb for s in self.timeline for mb in s["workers_pss_mb"].values()), default=0.0)
+        return {
+            "workers": max((len(s["workers_mb"]) for s in self.timeline), default=0),
+            "peak_worker_rss_mb": round(peak_worker, 1),
+            "peak_worker_pss_mb": round(peak_worker_pss, 1),
+            "peak_total_pss_mb": max((s["total_pss_mb"] for s in self.timeline), default=0.0),
+        }
+
+
+def asgi_worker_class():
+    """gunicorn's uvicorn worker class, or None when uvicorn isn't installed."""
+    if importlib.util.find_spec("uvicorn_worker") is not None:
+        return "uvicorn_worker.UvicornWorker"
+    if importlib.util.find_spec("uvicorn") is not None:
+        return "uvicorn.workers.UvicornWorker"
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- Client ---
+
+class Client:
+    """
+    One HTTP client per load thread, with its own cookie jar: the first
+    request fetches the upload page for the CSRF cookie, like a browser.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+        self.csrf_token = None
+
+    def _csrf(self) -> str:
+        if self.csrf_token is None:
+            self.opener.open(self.url, timeout=self.timeout).read()
+            self.csrf_token = next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+        return self.csrf_token
+
+    def scan(self, filename: str, data: bytes, jd_text: str) -> str:
+        """Uploads one resume; returns "ok" or what went wrong."""
+        try:
+            body, content_type = multipart_body({"jd_text": jd_text}, {"resume": (filename, data)})
+            request = urllib.request.Request(self.url, data=body, method="POST", headers={
+                "Content-Type": content_type,
+                "X-CSRFToken": self._csrf(),
+            })
+            with self.opener.open(request, timeout=self.timeout) as response:
+                page = response.read()
+        except urllib.error.HTTPError as e:
+            return "busy" if SCANNER_BUSY in e.read() else f"http_{e.code}"
+        except (TimeoutError, socket.timeout):
+            return "timeout"
+        except (urllib.error.URLError, ConnectionError, http.client.HTTPException):
+            return "connection"
+        if SCAN_FAILED in page:
+            return "scan_failed"
+        return "ok"
+
+
+class Command(BaseCommand):
+    help = ("Load-tests the upload endpoint: starts gunicorn with sync workers, threaded (gthread) "
+            "workers and the ASGI app (uvicorn workers) in turn, posts resumes from dataset/sample_resume "
+            "with JDs from dataset/sample_jds at a fixed concurrency and arrival rate, and reports "
+            "throughput, tail latency, error rate and per-worker RSS/PSS over time for each.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS))
+        parser.add_argument("--url", help="Load an already running server instead (no memory sampling).")
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes.")
+        parser.add_argument("--threads", type=int, default=4, help="Threads per gthread worker.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at most.")
+        parser.add_argument("--rate", type=float, default=2.0,
+                            help="Requests per second (open loop). 0: each client sends as soon as "
+                                 "its last request is answered (closed loop).")
+        parser.add_argument("--poisson", action="store_true", help="Random (Poisson) arrivals at --rate.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per server.")
+        parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests instead.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests sent first.")
+        parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--startup-timeout", type=float, default=300.0)
+        parser.add_argument("--sample-interval", type=float, default=0.5, help="Seconds between memory samples.")
+        parser.add_argument("--resumes", default=os.path.join(settings.BASE_DIR, "dataset", "sample_resume"))
+        parser.add_argument("--jds", default=os.path.join(settings.BASE_DIR, "dataset", "sample_jds"))
+        parser.add_argument("--limit", type=int, default=0, help="Only the first N resumes (0: all).")
+        parser.add_argument("--warm-cache", action="store_true",
+                            help="Keep the servers' scan cache (by default every request runs every stage).")
+        parser.add_argument("--output", help="Write the results, with the timelines, as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if options["rate"] < 0 or options["concurrency"] < 1:
+            raise CommandError("--rate must be >= 0 and --concurrency >= 1")
+        names = sorted(n for n in os.listdir(options["resumes"]) if n.lower().endswith((".pdf", ".docx", ".txt")))
+        if options["limit"]:
+            names = names[:options["limit"]]
+        resumes = []
+        for name in names:
+            with open(os.path.join(options["resumes"], name), "rb") as f:
+                resumes.append((name, f.read()))
+        jds = []
+        for name in sorted(n for n in os.listdir(options["jds"]) if n.lower().endswith(".txt")):
+            with open(os.path.join(options["jds"], name), encoding="utf-8", errors="ignore") as f:
+                jds.append(f.read())
+        if not resumes or not jds:
+            raise CommandError("No resumes or no JDs found.")
+        self.payloads = (resumes, jds)
+
+        runs = {}
+        if options["url"]:
+            runs["url"] = self.load(options["url"], options)
+        else:
+            workdir = tempfile.mkdtemp(prefix="ats-load-")
+            try:
+                template = self.migrated_db(workdir)
+                for kind in options["servers"]:
+                    result = self.run_server(kind, template, workdir, options)
+                    if result is not None:
+                        runs[kind] = result
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        if len(runs) > 1:
+            self.compare(runs)
+        if options["output"]:
+            meta = {key: options[key] for key in ("workers", "threads", "concurrency", "rate", "poisson",
+                                                   "duration", "requests", "warm_cache")}
+            meta.update(commit=git_commit(), cpus=os.cpu_count(), resumes=len(resumes), jds=len(jds))
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump({"format": FORMAT_VERSION, "meta": meta, "runs": runs}, f, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+    def migrated_db(self, workdir: str) -> str:
+        """An empty, migrated SQLite file the servers start from: never the real database."""
+        path = os.path.join(workdir, "template.sqlite3")
+        subprocess.run([sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "migrate", "--noinput"],
+                       env={**os.environ, "DATABASE_PATH": path}, cwd=settings.BASE_DIR,
+                       check=True, capture_output=True)
+        return path
+
+    def server_command(self, kind: str, port: int, options):
+        command = [sys.executable, "-m", "gunicorn", "-c", os.path.join(settings.BASE_DIR, "gunicorn.conf.py"),
+                   "--bind", f"127.0.0.1:{port}", "--workers", str(options["workers"]),
+                   "--timeout", str(int(options["timeout"]))]
+        if kind == "sync":
+            return command + ["-k", "sync", "ats_web.wsgi:application"]
+        if kind == "gthread":
+            return command + ["-k", "gthread", "--threads", str(options["threads"]), "ats_web.wsgi:application"]
+        worker_class = asgi_worker_class()
+        if worker_class is None:
+            return None
+        return command + ["-k", worker_class, "ats_web.asgi:application"]
+
+    def run_server(self, kind: str, template: str, workdir: str, options):
+        port = free_port()
+        command = self.server_command(kind, port, options)
+        if command is None:
+            self.stdout.write(self.style.WARNING(
+                f"\n[{kind}] skipped: needs uvicorn (pip install uvicorn uvicorn-worker)"))
+            return None
+
+        database = os.path.join(workdir, f"{kind}.sqlite3")
+        shutil.copyfile(template, database)
+        env = {**os.environ, "DATABASE_PATH": database, "SCANNER_PRELOAD_MODELS": "1", "SCAN_ASYNC": "0"}
+        if not options["warm_cache"]:
+            env["SCAN_CACHE_SIZE"] = "0"
+        log_path = os.path.join(workdir, f"{kind}.log")
+        self.stdout.write(f"\n[{kind}] {' '.join(command[2:])}")
+
+        with open(log_path, "wb") as log:
+            process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+        sampler = MemorySampler(process.pid, options["sample_interval"]).start()
+        url = f"http://127.0.0.1:{port}/"
+        try:
+            started = time.perf_counter()
+            if not self.wait_ready(url, process, options["startup_timeout"]):
+                with open(log_path, "rb") as log:
+                    tail = log.read()[-2000:].decode("utf-8", "replace")
+                self.stdout.write(self.style.ERROR(f"[{kind}] server did not come up:\n{tail}"))
+                return None
+            self.stdout.write(f"[{kind}] ready in {time.perf_counter() - started:.1f}s")
+            result = self.load(url, options)
+        finally:
+            # Workers touch their copy-on-write pages as they exit: not part of the picture
+            sampler.stop()
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        result["memory"] = sampler.summary()
+        result["memory_timeline"] = sampler.timeline
+        self.report_memory(result)
+        return result
+
+    def wait_ready(self, url: str, process, timeout: float) -> bool:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                return False
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return True
+            except (urllib.error.URLError, ConnectionError, TimeoutError, socket.timeout):
+                pass
+            time.sleep(0.5)
+        return False
+
+    def load(self, url: str, options) -> dict:
+        resumes, jds = self.payloads
+        local = threading.local()
+        counter = iter(range(sys.maxsize))
+        counter_lock = threading.Lock()
+        samples = []
+
+        def client():
+            if not hasattr(local, "client"):
+                local.client = Client(url, options["timeout"])
+            return local.client
+
+        def send(due: float, start: float):
+            # Resumes and JDs are rotated through in a fixed order, so runs send the same payloads
+            with counter_lock:
+                i = next(counter)
+            filename, data = resumes[i % len(resumes)]
+            sent = time.perf_counter()
+            outcome = client().scan(filename, data, jds[i % len(jds)])
+            done = time.perf_counter()
+            samples.append({"at": round(due - start, 3), "latency": done - due,
+                            "service": done - sent, "outcome": outcome})
+
+        for _ in range(options["warmup"]):
+            send(time.perf_counter(), 0.0)
+        samples.clear()
+
+        duration, limit = options["duration"], options["requests"]
+        start = time.perf_counter()
+
+        def more(sent: int) -> bool:
+            if limit:
+                return sent < limit
+            return time.perf_counter() - start < duration
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"], thread_name_prefix="load") as pool:
+            if options["rate"]:
+                # Open loop: requests are due on schedule whether or not earlier ones are answered
+                sent = 0
+                for offset in arrivals(options["rate"], options["poisson"], options["seed"]):
+                    if not more(sent) or (not limit and offset >= duration):
+                        break
+                    delay = start + offset - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(send, start + offset, start)
+                    sent += 1
+            else:
+                sent_lock = threading.Lock()
+                sent = [0]
+
+                def closed_loop():
+                    while True:
+                        with sent_lock:
+                            if not more(sent[0]):
+                                return
+                            sent[0] += 1
+                        send(time.perf_counter(), start)
+
+                for _ in range(options["concurrency"]):
+                    pool.submit(closed_loop)
+        seconds = time.perf_counter() - start
+
+        result = summarize(samples, seconds)
+        self.report(result)
+        return result
+
+    def report(self, result: dict):
+        latency, service = result["latency_ms"], result["service_ms"]
+        errors = ", ".join(f"{kind} {count}" for kind, count in sorted(result["errors"].items())) or "none"
+        self.stdout.write(
+            f"  {result['requests']} requests in {result['seconds']:.1f}s: {result['ok_per_second']:.2f} ok/s, "
+            f"errors {result['error_rate']:.1%} ({errors})"
+        )
+        self.stdout.write(f"  latency ms  p50 {latency['p50']:.0f}  p95 {latency['p95']:.0f}  "
+                          f"p99 {latency['p99']:.0f}  max {latency['max']:.0f}")
+        self.stdout.write(f"  service ms  p50 {service['p50']:.0f}  p95 {service['p95']:.0f}  "
+                          f"p99 {service['p99']:.0f}  max {service['max']:.0f}")
+        self.stdout.write(f"  ok/s per second: {' '.join(str(n) for n in result['ok_per_second_timeline'])}")
+
+    def report_memory(self, result: dict):
+        memory, timeline = result["memory"], result["memory_timeline"]
+        self.stdout.write(f"  Memory: {memory['workers']} workers, peak per worker {memory['peak_worker_rss_mb']:.0f} MB "
+                          f"RSS / {memory['peak_worker_pss_mb']:.0f} MB PSS, "
+                          f"{memory['peak_total_pss_mb']:.0f} MB PSS in total")
+        # About ten points of the timeline: startup, model load, then under load
+        step = max(1, len(timeline) // 10)
+        for sample in timeline[::step]:
+            workers = " ".join(f"{rss:.0f}/{pss:.0f}" for rss, pss in
+                               zip(sample["workers_mb"].values(), sample["workers_pss_mb"].values())) or "-"
+            self.stdout.write(f"    t={sample['t']:6.1f}s  master {sample['master_mb']:5.0f} MB  "
+                              f"workers RSS/PSS MB {workers}  total PSS {sample['total_pss_mb']:.0f} MB")
+
+    def compare(self, runs: dict):
+        self.stdout.write(f"\n{'server':<8} {'requests':>8} {'ok/s':>6} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} "
+                          f"{'p99 ms':>8} {'max ms':>8} {'worker PSS':>10} {'total PSS':>9}")
+        for kind, result in runs.items():
+            latency, memory = result["latency_ms"], result.get("memory", {})
+            self.stdout.write(
+                f"{kind:<8} {result['requests']:8d} {result['ok_per_second']:6.2f} {result['error_rate']:7.1%} "
+                f"{latency['p50']:8.0f} {latency['p95']:8.0f} {latency['p99']:8.0f} {latency['max']:8.0f} "
+                f"{memory.get('peak_worker_pss_mb', 0):10.0f} {memory.get('peak_total_pss_mb', 0):9.0f}"
+            )
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scanner import model_registry, semantic_matcher
+from scanner.scan_cache import get_scan_cache
+from scanner.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = "Loads every registered model and reports its load time and resident memory, and the scan cache hit rates."
+
+    def handle(self, *args, **options):
+        rss_before = model_registry.current_rss_bytes()
+        start = time.perf_counter()
+        model_registry.preload()
+        total = time.perf_counter() - start
+
+        self.stdout.write(f"{'model':<10} {'load s':>8} {'+RSS MB':>9}")
+        for name, stats in registry.stats().items():
+            self.stdout.write(
+                f"{name:<10} {stats.get('load_seconds', 0):8.2f} {stats.get('rss_delta_bytes', 0) / 2**20:9.0f}"
+            )
+        rss_delta = (model_registry.current_rss_bytes() - rss_before) / 2**20
+        self.stdout.write(f"{'total':<10} {total:8.2f} {rss_delta:9.0f}  (incl. warmup)")
+        self.stdout.write(f"SBERT backend: {semantic_matcher.BACKEND}")
+        batcher = semantic_matcher.get_batcher()
+        if batcher is not None:
+            stats = batcher.stats()
+            self.stdout.write(
+                f"Encode batches: {stats['batches']} ({stats['avg_requests_per_batch']} requests, "
+                f"{stats['avg_fill']:.0%} full on average), queueing p50 {stats['queue_delay_p50_ms']} ms, "
+                f"p99 {stats['queue_delay_p99_ms']} ms"
+            )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'cache level':<12} {'hits':>8} {'misses':>8} {'hit rate':>9} {'size':>6}")
+        for level, stats in get_scan_cache().stats().items():
+            self.stdout.write(
+                f"{level:<12} {stats['hits']:8d} {stats['misses']:8d} {stats['hit_rate']:9.1%} {stats['size']:6d}"
+            )
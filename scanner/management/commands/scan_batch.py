@@ -0,0 +1,49 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner import batch, extractor
+
+
+class Command(BaseCommand):
+    help = "Scans a directory or .zip of resumes against one job description and writes a ranked CSV/JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip of resumes (.pdf/.docx/.txt).")
+        jd = parser.add_mutually_exclusive_group(required=True)
+        jd.add_argument("--jd", help="Job description file (.txt/.pdf/.docx).")
+        jd.add_argument("--jd-text", help="Job description text.")
+        parser.add_argument("--format", choices=["csv", "json"], default="csv")
+        parser.add_argument("--output", help="Output file (default: stdout).")
+        parser.add_argument("--workers", type=int, help="Processes for text extraction (default: CPU count).")
+        parser.add_argument("--user", help="Username to attach the ScanHistory rows to.")
+        parser.add_argument("--no-save", action="store_true", help="Don't write ScanHistory rows.")
+
+    def handle(self, *args, **options):
+        jd_text = options["jd_text"] or extractor.extract_text(options["jd"])
+        if not jd_text:
+            raise CommandError("Could not read the job description.")
+
+        user = None
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No such user: {options['user']}")
+
+        results = batch.scan_batch_source(
+            options["source"], jd_text,
+            user=user, workers=options["workers"], save=not options["no_save"],
+        )
+
+        lines = batch.iter_json(results) if options["format"] == "json" else batch.iter_csv(results)
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for line in lines:
+                out.write(line)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        self.stderr.write(f"Scanned {len(results)} resumes.")
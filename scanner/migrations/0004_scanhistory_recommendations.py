@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_scanjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanhistory',
+            name='recommendations',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='scanhistory',
+            name='recommendations_version',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+    ]
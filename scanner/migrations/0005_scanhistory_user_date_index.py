@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0004_scanhistory_recommendations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scanhistory',
+            index=models.Index(fields=['user', '-scan_date', '-id'], name='scan_user_date_idx'),
+        ),
+    ]
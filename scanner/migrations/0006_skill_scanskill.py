@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_scanhistory_user_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScanSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matched', models.BooleanField()),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_skills', to='scanner.scanhistory')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_skills', to='scanner.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['skill', 'matched', 'scan'], name='scan_skill_lookup_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scan', 'skill'), name='scan_skill_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+def backfill_scan_skills(apps, schema_editor):
+    ScanHistory = apps.get_model('scanner', 'ScanHistory')
+    Skill = apps.get_model('scanner', 'Skill')
+    ScanSkill = apps.get_model('scanner', 'ScanSkill')
+
+    skill_ids = {}
+
+    def skill_id(name):
+        name = " ".join(name.lower().split())
+        if name not in skill_ids:
+            skill_ids[name] = Skill.objects.get_or_create(name=name)[0].id
+        return skill_ids[name]
+
+    scans = ScanHistory.objects.only('id', 'matched_skills', 'missing_skills').order_by('id')
+    batch = {}
+    for scan in scans.iterator(chunk_size=2000):
+        for skill in scan.missing_skills or []:
+            if skill and skill.strip():
+                batch[scan.id, skill_id(skill)] = False
+        for skill in scan.matched_skills or []:
+            if skill and skill.strip():
+                batch[scan.id, skill_id(skill)] = True
+        if len(batch) >= 5000:
+            ScanSkill.objects.bulk_create([ScanSkill(scan_id=s, skill_id=k, matched=m) for (s, k), m in batch.items()])
+            batch = {}
+    ScanSkill.objects.bulk_create([ScanSkill(scan_id=s, skill_id=k, matched=m) for (s, k), m in batch.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0006_skill_scanskill'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scan_skills, migrations.RunPython.noop),
+    ]
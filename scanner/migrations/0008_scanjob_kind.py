@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0007_backfill_scan_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanjob',
+            name='kind',
+            field=models.CharField(choices=[('scan', 'Scan'), ('batch', 'Batch')], default='scan', max_length=10),
+        ),
+    ]
@@ -0,0 +1,32 @@
+import uuid
+
+from django.db import migrations, models
+
+
+def fill_tokens(apps, schema_editor):
+    ScanJob = apps.get_model('scanner', 'ScanJob')
+    for job in ScanJob.objects.only('pk'):
+        job.token = uuid.uuid4()
+        job.save(update_fields=['token'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0008_scanjob_kind'),
+    ]
+
+    # Existing jobs each need their own token before the column can be unique
+    operations = [
+        migrations.AddField(
+            model_name='scanjob',
+            name='token',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='scanjob',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
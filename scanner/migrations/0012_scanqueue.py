@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0011_scanjob_heartbeat_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanQueue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
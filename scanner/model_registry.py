@@ -0,0 +1,115 @@
+# backend/model_registry.py
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bytes per page, for /proc/self/statm
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss_bytes() -> int:
+    """Resident memory of this process right now (0 if it can't be read)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak, not current, but the best we have outside Linux (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    Loads each heavy model (spaCy, SBERT, ...) the first time it is used,
+    instead of at import time, and records how long that took and how
+    much resident memory it added.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader):
+        """`loader` is a no-argument callable returning the model."""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            rss_before = current_rss_bytes()
+            start = time.perf_counter()
+            model = self._loaders[name]()
+            load_seconds = time.perf_counter() - start
+            rss_delta = max(current_rss_bytes() - rss_before, 0)
+
+            self._stats[name] = {
+                "load_seconds": round(load_seconds, 3),
+                "rss_delta_bytes": rss_delta,
+                "loaded_at": time.time(),
+            }
+            self._models[name] = model
+            logger.info("Loaded model '%s' in %.2fs (+%.0f MB RSS)", name, load_seconds, rss_delta / 2**20)
+            return model
+
+    def preload(self, names=None):
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def stats(self) -> dict:
+        """Per-model load time and memory, plus whether it is loaded yet."""
+        return {
+            name: {"loaded": name in self._models, **self._stats.get(name, {})}
+            for name in self._loaders
+        }
+
+
+registry = ModelRegistry()
+
+# Called after the models are preloaded (e.g. to fill caches that need them)
+_warmup_hooks = []
+
+
+def add_warmup(hook):
+    _warmup_hooks.append(hook)
+
+
+def preload():
+    """
+    Loads every registered model and runs the warmup hooks.
+
+    Meant for gunicorn's preload_app (see gunicorn.conf.py): the master
+    process loads the weights once and the forked workers share them
+    copy-on-write, so no worker pays the load time on its first scan.
+    """
+    # Importing the views imports every module that registers a model
+    from . import views  # noqa: F401
+
+    registry.preload()
+    for hook in _warmup_hooks:
+        hook()
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User  # <--- We import the User model
 
@@ -12,7 +14,114 @@ class ScanHistory(models.Model):
     
     matched_skills = models.JSONField(default=list)
     missing_skills = models.JSONField(default=list)
+    # Every skill found in the resume: what recommendations are computed from
+    resume_skills = models.JSONField(default=list)
     scan_date = models.DateTimeField(auto_now_add=True)
 
+    # Job recommendations computed at scan time, and the JD catalog version
+    # they were computed against (see pipeline.stored_recommendations)
+    recommendations = models.JSONField(default=list)
+    recommendations_version = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        indexes = [
+            # History pages: a user's scans, newest first (see pagination.keyset_page)
+            models.Index(fields=['user', '-scan_date', '-id'], name='scan_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_name} - {self.ats_score}%"
+
+class Skill(models.Model):
+    """One skill name, shared by every scan that matched or missed it."""
+    name = models.CharField(max_length=100, unique=True)
+
     def __str__(self):
-        return f"{self.candidate_name} - {self.ats_score}%"
\ No newline at end of file
+        return self.name
+
+class ScanSkill(models.Model):
+    """
+    A skill of one scan, mirroring matched_skills / missing_skills so
+    scans can be searched by skill in SQL (see scanner/skill_search.py).
+    """
+    scan = models.ForeignKey(ScanHistory, on_delete=models.CASCADE, related_name='scan_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='scan_skills')
+    matched = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scan', 'skill'], name='scan_skill_unique'),
+        ]
+        indexes = [
+            # "Scans that matched skill X": one index range per skill
+            models.Index(fields=['skill', 'matched', 'scan'], name='scan_skill_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scan_id}: {self.skill_id} ({'matched' if self.matched else 'missing'})"
+
+class ScanJob(models.Model):
+    """A resume scan queued for the background workers (see scanner/jobs.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # One resume, or a batch (resume_data is then a zip of resumes, see batch.pack_resumes)
+    SCAN = 'scan'
+    BATCH = 'batch'
+    KIND_CHOICES = [
+        (SCAN, 'Scan'),
+        (BATCH, 'Batch'),
+    ]
+
+    # The job's URL: unguessable, since anonymous jobs are readable by whoever has it
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=SCAN)
+
+    resume_filename = models.CharField(max_length=200)
+    resume_data = models.BinaryField()
+    jd_text = models.TextField(blank=True)
+
+    # The template context of the finished scan, or the error
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Touched by the worker while the job runs; a job that stops getting
+    # it was lost with its worker (see jobs.requeue_stale_jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.resume_filename} ({self.status})"
+
+    @property
+    def queue_seconds(self):
+        if self.started_at:
+            return (self.started_at - self.created_at).total_seconds()
+        return None
+
+    @property
+    def run_seconds(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+class ScanQueue(models.Model):
+    """
+    A single row that jobs.enqueue() updates before counting the queue:
+    the update locks it (the whole database, on SQLite), so the count
+    and the insert of concurrent enqueues happen one at a time.
+    """
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,62 @@
+# backend/name_extractor.py
+
+from . import tracing
+from .model_registry import registry
+
+SPACY_MODEL = "en_core_web_sm"
+# Part of the basic_info cache key: bump when the rules below change
+VERSION = f"{SPACY_MODEL}:ner-only"
+
+# Only the top of the resume is looked at, the name is expected there
+HEAD_CHARS = 300
+
+
+def _load_ner():
+    import spacy
+
+    # Only the entity recognizer is used: the tagger, parser, lemmatizer etc.
+    # are disabled so they never run. If you get an error here, run:
+    # python -m spacy download en_core_web_sm
+    return spacy.load(SPACY_MODEL, enable=["ner"])
+
+
+# Loaded on first use, not at import
+registry.register("spacy", _load_ner)
+
+
+def get_nlp():
+    return registry.get("spacy")
+
+
+def _head(text: str) -> str:
+    # Same as parser.clean_text(text)[:HEAD_CHARS], what NER always saw
+    return " ".join(text.split())[:HEAD_CHARS]
+
+
+def _person(doc):
+    """The first PERSON entity that isn't too long to be a name."""
+    for ent in doc.ents:
+        if ent.label_ == "PERSON":
+            # Simple check to avoid matching "LinkedIn" or other false positives
+            if len(ent.text.split()) < 4:
+                return ent.text.strip()
+    return None
+
+
+def extract_name(text: str):
+    """The first PERSON entity spaCy finds near the top of the resume."""
+    with tracing.stage("spacy_ner"):
+        return _person(get_nlp()(_head(text)))
+
+
+def extract_names(texts: list, batch_size: int = 64, n_process: int = 1) -> list:
+    """
+    extract_name() for many resumes, through nlp.pipe together. With
+    n_process > 1 spaCy spreads them over that many processes (each
+    loads the model, only worth it for large batches).
+    """
+    if not texts:
+        return []
+    with tracing.stage("spacy_ner"):
+        docs = get_nlp().pipe((_head(text) for text in texts), batch_size=batch_size, n_process=n_process)
+        return [_person(doc) for doc in docs]
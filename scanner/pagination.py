@@ -0,0 +1,44 @@
+# backend/pagination.py
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+# Columns the history list shows; the JSON skill columns are left out
+HISTORY_LIST_FIELDS = ('id', 'scan_date', 'candidate_name', 'email', 'ats_score', 'resume_filename')
+
+
+def encode_cursor(scan) -> str:
+    raw = f"{scan.scan_date.isoformat()}|{scan.pk}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(scan_date, id) from a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        scan_date, pk = raw.split("|")
+        return datetime.fromisoformat(scan_date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, page_size=50):
+    """
+    One page of `queryset`, newest first, and the cursor of the next page
+    (None on the last page).
+
+    Instead of OFFSET, the page starts right after the (scan_date, id)
+    encoded in `cursor`, so every page costs the same index range scan,
+    however deep it is (see the (user, scan_date, id) index on ScanHistory).
+    """
+    queryset = queryset.order_by('-scan_date', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        scan_date, pk = position
+        queryset = queryset.filter(Q(scan_date__lt=scan_date) | Q(scan_date=scan_date, id__lt=pk))
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
@@ -1,12 +1,8 @@
 # backend/parser.py
 
 import re
-import spacy
 
-# Load the spaCy model we installed
-# If you get an error here, make sure we ran:
-# python -m spacy download en_core_web_sm
-nlp = spacy.load("en_core_web_sm")
+from . import name_extractor
 
 # Regex patterns
 EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
@@ -32,29 +28,44 @@ def extract_phone(text: str):
 
 def extract_name(text: str):
     """
-    Uses spaCy NER to extract the first PERSON entity
+    Extracts the candidate's name (see name_extractor): the first PERSON
+    entity spaCy finds, or None.
     Assumes candidate's name appears near the top.
     """
-    doc = nlp(text[:300])  # Only check top section for speed
-    for ent in doc.ents:
-        if ent.label_ == "PERSON":
-            # Simple check to avoid matching "LinkedIn" or other false positives
-            if len(ent.text.split()) < 4:
-                return ent.text.strip()
-    return None
+    return name_extractor.extract_name(text)
 
 
-def parse_basic_info(text: str) -> dict:
+def extract_names(texts: list, n_process: int = 1) -> list:
+    """extract_name() for many resumes at once (spaCy's nlp.pipe)."""
+    return name_extractor.extract_names(texts, n_process=n_process)
+
+
+_NOT_GIVEN = object()
+
+
+def parse_basic_info(text: str, name=_NOT_GIVEN, doc=None) -> dict:
     """
     Returns a dictionary of extracted basic info:
-    - name
+    - name (unless already known)
     - email
     - phone
+    Email and phone come from `doc` (text_analyzer.AnalyzedDocument) if given.
     """
-    cleaned = clean_text(text)
+    if doc is not None:
+        email, phone = doc.email, doc.phone
+    else:
+        cleaned = clean_text(text)
+        email, phone = extract_email(cleaned), extract_phone(cleaned)
 
     return {
-        "name": extract_name(cleaned),
-        "email": extract_email(cleaned),
-        "phone": extract_phone(cleaned),
-    }
\ No newline at end of file
+        "name": extract_name(text) if name is _NOT_GIVEN else name,
+        "email": email,
+        "phone": phone,
+    }
+
+
+def parse_basic_infos(texts: list, n_process: int = 1, docs=None) -> list:
+    """parse_basic_info() for many resumes, with the names extracted in one batch."""
+    names = extract_names(texts, n_process=n_process)
+    docs = docs or [None] * len(texts)
+    return [parse_basic_info(text, name, doc) for text, name, doc in zip(texts, names, docs)]
@@ -0,0 +1,254 @@
+# backend/pipeline.py
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from . import extractor, parser, name_extractor, skill_extractor, jd_processor, semantic_matcher, scorer, suggestions, recommender, jd_index, skill_search, skill_similarity, text_analyzer, tracing
+from .scan_cache import get_scan_cache, hash_jd
+from .models import ScanHistory
+
+logger = logging.getLogger(__name__)
+
+# Uploads read straight from memory / Django's temp file instead of being copied
+# to MEDIA_ROOT and read back (see upload_source)
+UPLOAD_STATS = {"in_memory": 0, "spooled": 0, "bytes_not_written": 0}
+
+
+def prepare_jd(jd_text: str) -> dict:
+    """
+    Extracts the JD's skills once, so the same JD can be matched against
+    any number of resumes.
+    """
+    with tracing.stage("jd_skills"):
+        return {"skills": jd_processor.process_jd_text(jd_text)}
+
+
+def match_resume(resume_skills: list, jd: dict) -> dict:
+    """
+    Same result as semantic_skill_match(resume_skills, jd skills): the
+    similarities are looked up in the precomputed skill x skill matrix.
+    """
+    jd_skills = jd["skills"]
+    if not resume_skills or not jd_skills:
+        return semantic_matcher.semantic_skill_match(resume_skills, jd_skills)
+
+    cosine_scores = skill_similarity.get_similarity_matrix().scores(jd_skills, resume_skills)
+    return semantic_matcher.match_from_scores(resume_skills, jd_skills, cosine_scores)
+
+
+def analyze_resume(resume_content: str, jd: dict, resume_skills=None, basic_info=None, doc=None) -> dict:
+    """
+    Runs the AI pipeline on extracted resume text against a prepared JD.
+    `doc` is the text's AnalyzedDocument, if the caller already has it.
+    """
+    if doc is None:
+        with tracing.stage("analyze_text"):
+            doc = text_analyzer.analyze(resume_content)
+    if basic_info is None:
+        with tracing.stage("basic_info"):
+            basic_info = parser.parse_basic_info(resume_content, doc=doc)
+    if resume_skills is None:
+        resume_skills = doc.skills
+
+    with tracing.stage("match"):
+        match_results = match_resume(resume_skills, jd)
+    with tracing.stage("score"):
+        ats_score = scorer.calculate_ats_score(match_results)
+        tips = suggestions.generate_resume_suggestions(resume_content, basic_info, resume_skills, doc=doc)
+
+    return {
+        "basic_info": basic_info,
+        "resume_skills": resume_skills,
+        "match_results": match_results,
+        "ats_score": ats_score,
+        "tips": tips,
+    }
+
+
+def build_scan_record(resume_filename: str, analysis: dict, user=None) -> ScanHistory:
+    """The (unsaved) ScanHistory row for one analyzed resume."""
+    basic_info = analysis["basic_info"]
+    match_results = analysis["match_results"]
+    return ScanHistory(
+        candidate_name=basic_info.get('name') or "Unknown Candidate",
+        email=basic_info.get('email') or "No Email",
+        resume_filename=resume_filename,
+        ats_score=analysis["ats_score"].get('score', 0),
+        matched_skills=match_results.get('matched_skills', []),
+        missing_skills=match_results.get('missing_skills', []),
+        resume_skills=analysis["resume_skills"],
+        user=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def upload_source(uploaded_file):
+    """
+    What to hand to run_scan() for a Django upload, without saving it again.
+
+    Uploads up to FILE_UPLOAD_MAX_MEMORY_SIZE are already in memory and
+    are read from there; bigger ones were spooled by Django to
+    FILE_UPLOAD_TEMP_DIR (tmpfs when available) and are read from that
+    file. Either way the old copy to MEDIA_ROOT, the read back and the
+    delete are skipped.
+    """
+    size = uploaded_file.size or 0
+    if hasattr(uploaded_file, "temporary_file_path"):
+        UPLOAD_STATS["spooled"] += 1
+        source = uploaded_file.temporary_file_path()
+        where = "spooled temp file"
+    else:
+        UPLOAD_STATS["in_memory"] += 1
+        source = uploaded_file.file
+        where = "memory"
+    UPLOAD_STATS["bytes_not_written"] += size
+    logger.info("Upload %s read from %s: %d bytes not written to MEDIA_ROOT",
+                uploaded_file.name, where, size)
+    return source
+
+
+def cached_analysis(source, resume_filename: str, jd_text: str) -> dict:
+    """
+    analyze_resume() for a resume (a path, its bytes or an open binary
+    file), reusing earlier results.
+
+    The resume is identified by the SHA-256 of its bytes, hashed in
+    chunks so a spooled upload is never read into memory whole, and the
+    JD by a whitespace/case-normalized hash. A repeat of the same resume
+    and JD is answered from the cache without extraction or model calls;
+    the same resume against a new JD reuses its text, basic info and
+    skills. Every key includes the versions of what produced the value.
+    """
+    if extractor.is_too_large(source, resume_filename):
+        # Refused before it is even hashed, like extraction would
+        tracing.metrics.error("extract")
+        logger.warning("%s is over PDF_MAX_BYTES, not read", resume_filename)
+        # Nothing to look for a name in: no NER run
+        return analyze_resume("", prepare_jd(jd_text), basic_info=parser.parse_basic_info("", name=None))
+
+    cache = get_scan_cache()
+    taxonomy = skill_extractor.get_skill_taxonomy()
+    resume_hash = extractor.hash_source(source)
+    analysis_key = ":".join([resume_hash, hash_jd(jd_text), taxonomy.version, name_extractor.VERSION,
+                             semantic_matcher.MODEL_NAME, semantic_matcher.MODEL_VERSION])
+
+    analysis = cache.get("analysis", analysis_key)
+    if analysis is not None:
+        return analysis
+
+    with tracing.stage("extract"):
+        resume_content = cache.get_or_compute(
+            "text", resume_hash, lambda: extractor.extract_text(source, resume_filename))
+    # One pass over the text serves the basic info, the skills and the tips
+    with tracing.stage("analyze_text"):
+        doc = text_analyzer.analyze(resume_content, taxonomy)
+    with tracing.stage("basic_info"):
+        basic_info = cache.get_or_compute(
+            "basic_info", f"{resume_hash}:{name_extractor.VERSION}",
+            lambda: parser.parse_basic_info(resume_content, doc=doc))
+    resume_skills = cache.get_or_compute("skills", f"{resume_hash}:{taxonomy.version}", lambda: doc.skills)
+
+    analysis = analyze_resume(resume_content, prepare_jd(jd_text), resume_skills, basic_info=basic_info, doc=doc)
+    if resume_content:
+        cache.set("analysis", analysis_key, analysis)
+    return analysis
+
+
+def run_scan(source, resume_filename: str, jd_text: str, user=None) -> dict:
+    """
+    The full single-resume scan behind the home page: extract, analyze,
+    recommend jobs and save the ScanHistory row.
+    `source` is a path, the resume's bytes or an open binary file.
+    Repeat scans are answered from the scan cache (see cached_analysis).
+    Returns the template context for the result.
+    """
+    analysis = cached_analysis(source, resume_filename, jd_text)
+    with tracing.stage("recommend"):
+        job_index = jd_index.get_job_index()
+        jobs = recommender.recommend_jobs(analysis["resume_skills"], job_index)
+
+    with tracing.stage("db_insert"):
+        record = build_scan_record(resume_filename, analysis, user)
+        record.recommendations = jobs
+        record.recommendations_version = job_index.version
+        record.save()
+        skill_search.sync_scan_skills([record])
+
+    return {
+        'result': True,
+        'scan_id': record.pk,
+        'basic_info': analysis["basic_info"],
+        'ats_score': analysis["ats_score"],
+        'matched_skills': analysis["match_results"]['matched_skills'],
+        'missing_skills': analysis["match_results"]['missing_skills'],
+        'tips': analysis["tips"],
+        'jobs': jobs
+    }
+
+
+# --- Stored recommendations ---
+
+_refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommendations")
+_refresh_pending = set()
+_refresh_lock = threading.Lock()
+
+
+def scan_recommendation_skills(scan: ScanHistory) -> list:
+    """
+    The skills a scan's recommendations are computed from: the resume's,
+    as at scan time. Rows saved before those were stored only have the
+    matched skills.
+    """
+    return scan.resume_skills or scan.matched_skills
+
+
+def refresh_recommendations(scan_id: int):
+    """Recomputes one scan's recommendations against the current JD catalog."""
+    scan = ScanHistory.objects.only("resume_skills", "matched_skills").filter(pk=scan_id).first()
+    if scan is None:
+        return
+    job_index = jd_index.get_job_index()
+    ScanHistory.objects.filter(pk=scan_id).update(
+        recommendations=recommender.recommend_jobs(scan_recommendation_skills(scan), job_index),
+        recommendations_version=job_index.version,
+    )
+
+
+def _refresh_in_background(scan_id: int):
+    try:
+        close_old_connections()
+        refresh_recommendations(scan_id)
+    except Exception:
+        logger.exception("Could not refresh recommendations of scan %s", scan_id)
+    finally:
+        with _refresh_lock:
+            _refresh_pending.discard(scan_id)
+        close_old_connections()
+
+
+def schedule_refresh(scan_id: int):
+    """Queues a background refresh of one scan, once."""
+    with _refresh_lock:
+        if scan_id in _refresh_pending:
+            return
+        _refresh_pending.add(scan_id)
+    _refresh_pool.submit(_refresh_in_background, scan_id)
+
+
+def stored_recommendations(scan: ScanHistory) -> list:
+    """
+    The job recommendations for a history/report page, read from the row.
+
+    Scans saved before recommendations were stored get them computed now
+    (once). If the JD catalog changed since the scan, the stored ones are
+    still shown and a background refresh is queued for next time.
+    Refreshes recommend from the same resume skills as the scan did.
+    """
+    if not scan.recommendations_version:
+        refresh_recommendations(scan.pk)
+        scan.refresh_from_db(fields=["recommendations", "recommendations_version"])
+    elif scan.recommendations_version != jd_index.get_job_index().version:
+        schedule_refresh(scan.pk)
+    return scan.recommendations
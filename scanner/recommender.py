@@ -1,9 +1,19 @@
 # backend/recommender.py
 
+import hashlib
+import heapq
+import json
+import logging
 import os
+import threading
+import numpy as np
 from . import jd_processor
 from . import semantic_matcher
-from .skill_extractor import extract_skills_from_text, load_skill_taxonomy
+from . import scorer
+from . import tracing
+from .skill_extractor import extract_skills_from_text, get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
 
 # --- Missing Skill Recommendation ---
 
@@ -27,10 +37,11 @@ def load_sample_jds(jd_directory="D:\Team_Project\ATS Scanner\dataset\sample_jds
     """
     jd_skill_database = {}
     if not os.path.exists(jd_directory):
-        print(f"[Warning] Job directory not found: {jd_directory}. Job recommender will be empty.")
+        tracing.metrics.error("jd_catalog")
+        logger.warning("Job directory not found: %s. Job recommender will be empty.", jd_directory)
         return jd_skill_database
 
-    skill_list_set = load_skill_taxonomy()
+    skill_list_set = get_skill_taxonomy()
 
     for filename in os.listdir(jd_directory):
         file_path = os.path.join(jd_directory, filename)
@@ -46,37 +57,357 @@ def load_sample_jds(jd_directory="D:\Team_Project\ATS Scanner\dataset\sample_jds
     return jd_skill_database
 
 
-def recommend_jobs(resume_skills: list, jd_skill_database: dict, top_n=3) -> list:
+def _clean_title(job_title: str) -> str:
+    return job_title.replace('.txt', '').replace('.pdf', '').replace('.docx', '')
+
+
+class JobMatrix:
+    """
+    Every JD's skills stacked together for one-to-many scoring.
+
+    The unique JD skills are embedded once into one matrix (`embeddings`),
+    and each JD is a slice of `skill_ids` between two `offsets`.
+    Scoring a resume is then one matrix multiply plus segmented
+    reductions, instead of one semantic_skill_match call per JD.
+    """
+
+    def __init__(self, jd_skill_database: dict, skill_vectors=None):
+        """
+        `skill_vectors` optionally maps each JD skill to its (unit length)
+        embedding, to skip the embedding lookup when the caller has them.
+        """
+        self.titles = list(jd_skill_database.keys())
+        self.vocab = sorted({skill for skills in jd_skill_database.values() for skill in skills})
+        vocab_index = {skill: i for i, skill in enumerate(self.vocab)}
+
+        lengths = [len(skills) for skills in jd_skill_database.values()]
+        self.lengths = np.array(lengths, dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths)]).astype(np.int64)
+        self.skill_ids = np.array(
+            [vocab_index[skill] for skills in jd_skill_database.values() for skill in skills],
+            dtype=np.int64,
+        )
+        # Which JD each entry of skill_ids belongs to
+        self.row_jobs = np.repeat(np.arange(len(self.titles)), self.lengths)
+
+        if self.vocab and skill_vectors is not None:
+            self.embeddings = np.stack([skill_vectors[skill] for skill in self.vocab])
+        elif self.vocab:
+            self.embeddings = semantic_matcher.normalize(semantic_matcher.embed_skills(self.vocab))
+        else:
+            self.embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def score(self, resume_skills: list, threshold=0.70, resume_embeddings=None) -> list:
+        """
+        Returns calculate_ats_score()'s result for the resume against
+        every JD, in `titles` order.
+        `resume_embeddings` can pass in the already normalized resume vectors.
+        """
+        n_jobs = len(self.titles)
+        empty = {"score": 0, "skill_match_ratio": 0, "avg_similarity": 0}
+        if not resume_skills or not len(self.skill_ids):
+            return [dict(empty) for _ in range(n_jobs)]
+
+        # Encode the resume once, then score it against every unique JD skill
+        if resume_embeddings is None:
+            resume_embeddings = semantic_matcher.normalize(semantic_matcher.embed_skills(resume_skills))
+        vocab_scores = self.embeddings @ resume_embeddings.T
+
+        # Best resume skill for every (JD, skill) row
+        row_scores = vocab_scores[self.skill_ids]
+        best_index = row_scores.argmax(axis=1)
+        best_score = row_scores[np.arange(len(best_index)), best_index]
+        matched = best_score >= threshold
+
+        # Segmented reductions over the rows of each JD
+        matched_jobs = self.row_jobs[matched]
+        matched_count = np.bincount(matched_jobs, minlength=n_jobs)
+        score_sum = np.bincount(
+            matched_jobs, weights=best_score[matched].astype(np.float64), minlength=n_jobs
+        )
+        missing_count = self.lengths - matched_count
+
+        # calculate_ats_score counts *unique* resume skills that matched
+        n_resume = len(resume_skills)
+        pairs = np.unique(matched_jobs * n_resume + best_index[matched])
+        unique_matched = np.bincount(pairs // n_resume, minlength=n_jobs)
+
+        results = []
+        for job in range(n_jobs):
+            total = int(unique_matched[job] + missing_count[job])
+            if total == 0:
+                results.append(dict(empty))
+                continue
+            skill_match_ratio = int(unique_matched[job]) / total
+            if matched_count[job] > 0:
+                avg_similarity = float(score_sum[job]) / int(matched_count[job])
+            else:
+                avg_similarity = 0
+            results.append(scorer.combine_scores(skill_match_ratio, avg_similarity))
+        return results
+
+
+class JobIndex:
+    """
+    A job catalog indexed for fast top-k recommendations.
+
+    Candidates are shortlisted with an inverted index (skill -> jobs that
+    ask for it) and with per-job embedding centroids, then the shortlist
+    is scored exactly with JobMatrix and the top N are picked with a heap.
+    Jobs can be added and removed one at a time.
+    When the catalog is no bigger than `shortlist_size`, every job is
+    scored, so the results are exactly those of scoring the whole catalog.
+    """
+
+    def __init__(self, shortlist_size=200):
+        self.shortlist_size = shortlist_size
+
+        # job_id -> title / skills; job ids only grow, so they keep insertion order
+        self._titles = {}
+        self._skills = {}
+        self._ids_by_title = {}
+        self._next_id = 0
+
+        # Inverted index: skill -> set of job ids
+        self._postings = {}
+        # skill -> unit-length embedding, shared by every job
+        self._skill_vectors = {}
+
+        # One centroid row per job, slots are reused after remove()
+        self._centroids = None
+        self._slot_jobs = np.zeros(0, dtype=np.int64)
+        self._slot_of = {}
+        self._free_slots = []
+        self._lock = threading.RLock()
+
+        # Identifies the catalog, changes with every add/remove
+        self._base_version = ""
+        self._revision = 0
+
+    @classmethod
+    def from_database(cls, jd_skill_database: dict, **kwargs):
+        index = cls(**kwargs)
+        index.add_many(jd_skill_database)
+        index._base_version = hashlib.sha1(
+            json.dumps(sorted(jd_skill_database.items())).encode("utf-8")
+        ).hexdigest()[:12]
+        index._revision = 0
+        return index
+
+    @classmethod
+    def from_artifact(cls, artifact, **kwargs):
+        """
+        Builds the index straight from a compiled JD artifact (see jd_index).
+        Skill vectors and centroids stay memory-mapped until a job is
+        added or removed.
+        """
+        index = cls(**kwargs)
+        index._skill_vectors = dict(zip(artifact.vocab, artifact.embeddings))
+        for job_id, job in enumerate(artifact.jobs):
+            jd_skills = artifact.job_skills(job_id)
+            index._titles[job_id] = job["title"]
+            index._skills[job_id] = jd_skills
+            index._ids_by_title[job["title"]] = job_id
+            for skill in set(jd_skills):
+                index._postings.setdefault(skill, set()).add(job_id)
+            index._slot_of[job_id] = job_id
+
+        index._centroids = artifact.centroids
+        index._slot_jobs = np.arange(len(artifact), dtype=np.int64)
+        index._next_id = len(artifact)
+        index._base_version = artifact.version
+        return index
+
+    @property
+    def version(self) -> str:
+        """Stamp for results computed from this catalog (see ScanHistory.recommendations)."""
+        return f"{self._base_version}.{self._revision}" if self._revision else self._base_version
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, job_title):
+        return job_title in self._ids_by_title
+
+    def titles(self) -> list:
+        return [self._titles[job_id] for job_id in sorted(self._titles)]
+
+    # --- Updates ---
+
+    def _embed_new_skills(self, skills):
+        new_skills = sorted({skill for skill in skills if skill not in self._skill_vectors})
+        if new_skills:
+            vectors = semantic_matcher.normalize(semantic_matcher.embed_skills(new_skills))
+            self._skill_vectors.update(zip(new_skills, vectors))
+
+    def add(self, job_title: str, jd_skills: list):
+        self.add_many({job_title: jd_skills})
+
+    def add_many(self, jd_skill_database: dict):
+        """Adds (or replaces) jobs; all new skills are embedded in one call."""
+        with self._lock:
+            self._add_many(jd_skill_database)
+
+    def _add_many(self, jd_skill_database: dict):
+        self._revision += 1
+        self._embed_new_skills(skill for skills in jd_skill_database.values() for skill in skills)
+
+        for job_title, jd_skills in jd_skill_database.items():
+            if job_title in self._ids_by_title:
+                self._remove(job_title)
+
+            job_id = self._next_id
+            self._next_id += 1
+            self._titles[job_id] = job_title
+            self._skills[job_id] = list(jd_skills)
+            self._ids_by_title[job_title] = job_id
+            for skill in set(jd_skills):
+                self._postings.setdefault(skill, set()).add(job_id)
+            self._set_centroid(job_id, jd_skills)
+
+    def remove(self, job_title: str):
+        with self._lock:
+            self._remove(job_title)
+
+    def _remove(self, job_title: str):
+        job_id = self._ids_by_title.pop(job_title, None)
+        if job_id is None:
+            return
+        self._revision += 1
+        del self._titles[job_id]
+        for skill in set(self._skills.pop(job_id)):
+            postings = self._postings.get(skill)
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self._postings[skill]
+
+        slot = self._slot_of.pop(job_id)
+        self._make_writeable()
+        self._centroids[slot] = 0
+        self._slot_jobs[slot] = -1
+        self._free_slots.append(slot)
+
+    def _set_centroid(self, job_id, jd_skills):
+        dim = len(next(iter(self._skill_vectors.values()))) if self._skill_vectors else 1
+        if self._centroids is None:
+            self._centroids = np.zeros((16, dim), dtype=np.float32)
+            self._slot_jobs = np.full(16, -1, dtype=np.int64)
+            self._free_slots = list(range(15, -1, -1))
+        elif self._centroids.shape[1] != dim:
+            # Only jobs without skills were added so far, their centroids are all zero
+            self._centroids = np.zeros((len(self._slot_jobs), dim), dtype=np.float32)
+
+        self._make_writeable()
+        if not self._free_slots:
+            # Double the capacity
+            capacity = max(len(self._slot_jobs), 16)
+            size = len(self._slot_jobs)
+            self._centroids = np.concatenate(
+                [self._centroids, np.zeros((capacity, self._centroids.shape[1]), dtype=np.float32)]
+            )
+            self._slot_jobs = np.concatenate([self._slot_jobs, np.full(capacity, -1, dtype=np.int64)])
+            self._free_slots = list(range(size + capacity - 1, size - 1, -1))
+
+        slot = self._free_slots.pop()
+        self._slot_of[job_id] = slot
+        self._slot_jobs[slot] = job_id
+        if jd_skills:
+            centroid = np.mean([self._skill_vectors[skill] for skill in jd_skills], axis=0)
+            self._centroids[slot] = centroid / max(np.linalg.norm(centroid), 1e-12)
+        else:
+            self._centroids[slot] = 0
+
+    def _make_writeable(self):
+        # Centroids loaded from an artifact are a read-only mmap: copy on first write
+        if self._centroids is not None and not self._centroids.flags.writeable:
+            self._centroids = np.array(self._centroids)
+
+    # --- Queries ---
+
+    def shortlist(self, resume_skills: list, resume_embeddings) -> list:
+        """
+        Job ids worth scoring exactly: those sharing the most skills with
+        the resume, plus those whose centroid is closest to the resume's.
+        """
+        if len(self._titles) <= self.shortlist_size:
+            return sorted(self._titles)
+
+        # Inverted index: share of each job's skills the resume has verbatim
+        # (the skill match ratio is 70% of the final score)
+        overlap = {}
+        for skill in set(resume_skills):
+            for job_id in self._postings.get(skill, ()):
+                overlap[job_id] = overlap.get(job_id, 0) + 1
+        coverage = {job_id: count / len(self._skills[job_id]) for job_id, count in overlap.items()}
+        candidates = set(heapq.nlargest(self.shortlist_size, coverage, key=coverage.get))
+
+        # Centroids: catches jobs that only match semantically
+        resume_centroid = resume_embeddings.mean(axis=0)
+        resume_centroid /= max(np.linalg.norm(resume_centroid), 1e-12)
+        centroid_scores = self._centroids @ resume_centroid
+        centroid_scores[self._slot_jobs < 0] = -np.inf
+        n_centroid = min(self.shortlist_size, int((self._slot_jobs >= 0).sum()))
+        top_slots = np.argpartition(-centroid_scores, n_centroid - 1)[:n_centroid]
+        candidates.update(int(job_id) for job_id in self._slot_jobs[top_slots])
+
+        return sorted(candidates)
+
+    def recommend(self, resume_skills: list, top_n=3) -> list:
+        if not resume_skills or not self._titles:
+            return []
+
+        with self._lock:
+            self._embed_new_skills(resume_skills)
+            resume_embeddings = np.stack([self._skill_vectors[skill] for skill in resume_skills])
+
+            job_ids = self.shortlist(resume_skills, resume_embeddings)
+            job_matrix = JobMatrix(
+                {job_id: self._skills[job_id] for job_id in job_ids},
+                skill_vectors=self._skill_vectors,
+            )
+            titles = [self._titles[job_id] for job_id in job_ids]
+        scores = job_matrix.score(resume_skills, resume_embeddings=resume_embeddings)
+
+        # Same order as sorting the whole list: ties keep catalog order
+        recommendations = (
+            {"job_title": _clean_title(job_title), "match_score": score_data["score"]}
+            for job_title, score_data in zip(titles, scores)
+        )
+        return heapq.nlargest(top_n, recommendations, key=lambda x: x["match_score"])
+
+
+def recommend_jobs(resume_skills: list, jd_skill_database, top_n=3) -> list:
     """
     Compares the resume's skills against all loaded JDs and
     returns the top N best matches.
-    """
-    recommendations = []
 
+    `jd_skill_database` is the dict from load_sample_jds(), a prebuilt
+    JobMatrix (every JD is scored), or a JobIndex (shortlisted, for big catalogs).
+    """
     if not resume_skills or not jd_skill_database:
         return []
 
-    for job_title, jd_skills in jd_skill_database.items():
-        
-        # We re-use the semantic matcher from Step 2
-        # We are matching the RESUME (as if it's the JD) vs. the JOB (as if it's the resume)
-        # This checks "How many of the JOB's skills are in my resume?"
-        
-        # To get a better "fit" score, let's match the Resume TO the JD
-        # "How many of the JD's skills are in my resume?"
-        match_results = semantic_matcher.semantic_skill_match(resume_skills=resume_skills, jd_skills=jd_skills)
-        
-        # Use the same scorer from Step 3
-        # This will give us a 0-100 score for *this* job
-        from . import scorer 
-        score_data = scorer.calculate_ats_score(match_results)
-        
-        recommendations.append({
-            "job_title": job_title.replace('.txt', '').replace('.pdf', '').replace('.docx', ''),
-            "match_score": score_data["score"]
-        })
+    if isinstance(jd_skill_database, JobIndex):
+        return jd_skill_database.recommend(resume_skills, top_n)
+
+    if isinstance(jd_skill_database, JobMatrix):
+        job_matrix = jd_skill_database
+    else:
+        job_matrix = JobMatrix(jd_skill_database)
+
+    # "How many of the JD's skills are in my resume?", for every JD at once
+    scores = job_matrix.score(resume_skills)
+
+    recommendations = [
+        {"job_title": _clean_title(job_title), "match_score": score_data["score"]}
+        for job_title, score_data in zip(job_matrix.titles, scores)
+    ]
 
     # Sort by the highest score and return the top N
     sorted_recommendations = sorted(recommendations, key=lambda x: x["match_score"], reverse=True)
     
-    return sorted_recommendations[:top_n]
\ No newline at end of file
+    return sorted_recommendations[:top_n]
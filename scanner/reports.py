@@ -0,0 +1,169 @@
+# backend/reports.py
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.template.loader import get_template
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'scanner/pdf_report.html'
+
+
+class ReportError(Exception):
+    """xhtml2pdf could not render the report. `html` is what it was given."""
+
+    def __init__(self, html: str):
+        super().__init__("PDF rendering failed")
+        self.html = html
+
+
+def report_dir() -> str:
+    return str(settings.REPORT_CACHE_DIR)
+
+
+_template_version = {}
+
+
+def template_version() -> str:
+    """Hash of the report template, so editing it invalidates every stored report."""
+    template = get_template(TEMPLATE_NAME)
+    path = template.origin.name
+    mtime = os.stat(path).st_mtime_ns
+    cached = _template_version.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, hashlib.sha1(f.read()).hexdigest()[:12])
+        _template_version[path] = cached
+    return cached[1]
+
+
+def report_key(scan) -> str:
+    """
+    Identifies one rendering of a scan's report: the scan, the template
+    and the recommendations shown in it. Used as file name and ETag.
+    """
+    parts = [str(scan.pk), template_version(), scan.recommendations_version or ""]
+    return hashlib.sha1(":".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def report_path(scan) -> str:
+    return os.path.join(report_dir(), f"scan-{scan.pk}-{report_key(scan)}.pdf")
+
+
+def report_filename(scan) -> str:
+    """Download name, with the candidate name."""
+    return f"Report_{(scan.candidate_name or 'Unknown').replace(' ', '_')}.pdf"
+
+
+def render_pdf(scan, jobs: list) -> bytes:
+    """Renders the report with xhtml2pdf. Raises ReportError if that fails."""
+    html = get_template(TEMPLATE_NAME).render({'scan': scan, 'jobs': jobs})
+
+    # xhtml2pdf is only imported when a report is actually rendered
+    from xhtml2pdf import pisa
+    output = io.BytesIO()
+    if pisa.CreatePDF(html, dest=output).err:
+        raise ReportError(html)
+    return output.getvalue()
+
+
+def _store(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".report-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove_old_versions(scan, keep: str):
+    prefix = f"scan-{scan.pk}-"
+    for name in os.listdir(os.path.dirname(keep)):
+        if name.startswith(prefix) and os.path.join(os.path.dirname(keep), name) != keep:
+            try:
+                os.remove(os.path.join(os.path.dirname(keep), name))
+            except OSError:
+                pass
+
+
+def ensure_report(scan, jobs: list) -> str:
+    """Path of the stored report, rendering and storing it first if needed."""
+    path = report_path(scan)
+    if not os.path.exists(path):
+        _store(path, render_pdf(scan, jobs))
+        _remove_old_versions(scan, path)
+    return path
+
+
+# --- Rendering off the request thread ---
+
+_render_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, "REPORT_RENDER_THREADS", 2), thread_name_prefix="reports"
+)
+_rendering = {}
+_rendering_lock = threading.Lock()
+
+
+def render_async(scan, jobs: list):
+    """
+    Starts rendering the report in a background thread (once per
+    report, concurrent requests share the same future).
+    Returns a future for the stored path.
+    """
+    path = report_path(scan)
+    with _rendering_lock:
+        future = _rendering.get(path)
+        if future is None:
+            future = _render_pool.submit(ensure_report, scan, jobs)
+            _rendering[path] = future
+            future.add_done_callback(lambda _: _forget(path))
+    return future
+
+
+def _forget(path: str):
+    with _rendering_lock:
+        _rendering.pop(path, None)
+
+
+# --- Bulk export ---
+
+def _render_for_export(scan, jobs):
+    try:
+        return ensure_report(scan, jobs)
+    except ReportError:
+        return None
+
+
+def export_zip(scans_with_jobs: list, workers=None):
+    """
+    Writes a zip with the report of every (scan, jobs) pair to a temp
+    file and returns it (open, positioned at the start). Stored reports
+    are reused; missing ones are rendered in a process pool.
+    """
+    missing = [(scan, jobs) for scan, jobs in scans_with_jobs if not os.path.exists(report_path(scan))]
+    workers = workers or getattr(settings, "REPORT_WORKERS", None) or os.cpu_count() or 1
+    if len(missing) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+            list(pool.map(_render_for_export, *zip(*missing)))
+    else:
+        for scan, jobs in missing:
+            _render_for_export(scan, jobs)
+
+    archive_file = tempfile.TemporaryFile()
+    # PDFs are compressed already
+    with zipfile.ZipFile(archive_file, "w", compression=zipfile.ZIP_STORED) as archive:
+        for scan, jobs in scans_with_jobs:
+            path = report_path(scan)
+            if os.path.exists(path):
+                archive.write(path, f"{scan.pk:05d}_{report_filename(scan)}")
+            else:
+                logger.warning("Report of scan %s could not be rendered, left out of the export", scan.pk)
+    archive_file.seek(0)
+    return archive_file
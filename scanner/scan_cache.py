@@ -0,0 +1,134 @@
+# backend/scan_cache.py
+
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Bump when what is cached at any level changes shape
+CACHE_VERSION = 1
+
+# What each level depends on besides the resume bytes
+#   text        the extractor only
+#   basic_info  + the spaCy model
+#   skills      + the skill taxonomy
+#   analysis    + the JD, the embedding model and the scorer
+LEVELS = ("text", "basic_info", "skills", "analysis")
+
+_MISSING = object()
+
+
+def hash_bytes(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_jd(jd_text: str) -> str:
+    """Same hash for JDs that only differ in case or whitespace."""
+    normalized = re.sub(r"\s+", " ", (jd_text or "").lower()).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ScanCache:
+    """
+    Results of earlier scans, keyed by content hash.
+
+    Each level is a size-bounded in-process LRU. If `backend` (a Django
+    cache) is given, entries are also written there and looked up on a
+    local miss, so they survive restarts and are shared by workers.
+    Values are copied in and out, callers may modify what they get.
+    """
+
+    def __init__(self, max_entries: int = 256, backend=None, timeout=None):
+        self.max_entries = max_entries
+        self.backend = backend
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._levels = {level: OrderedDict() for level in LEVELS}
+        self._stats = {level: {"hits": 0, "misses": 0} for level in LEVELS}
+
+    def _backend_key(self, level: str, key: str) -> str:
+        return f"scan:{CACHE_VERSION}:{level}:{key}"
+
+    def get(self, level: str, key: str, default=None):
+        entries = self._levels[level]
+        with self._lock:
+            value = entries.get(key, _MISSING)
+            if value is not _MISSING:
+                entries.move_to_end(key)
+
+        if value is _MISSING and self.backend is not None:
+            value = self.backend.get(self._backend_key(level, key), _MISSING)
+            if value is not _MISSING:
+                self._remember(level, key, value)
+
+        with self._lock:
+            self._stats[level]["misses" if value is _MISSING else "hits"] += 1
+        return default if value is _MISSING else copy.deepcopy(value)
+
+    def _remember(self, level: str, key: str, value):
+        entries = self._levels[level]
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def set(self, level: str, key: str, value):
+        value = copy.deepcopy(value)
+        self._remember(level, key, value)
+        if self.backend is not None:
+            self.backend.set(self._backend_key(level, key), value, self.timeout)
+
+    def get_or_compute(self, level: str, key: str, compute):
+        """The cached value, or compute() stored under `key` (unless it is empty)."""
+        value = self.get(level, key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if value:
+                self.set(level, key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            for entries in self._levels.values():
+                entries.clear()
+
+    def stats(self) -> dict:
+        """Hits, misses, hit rate and size per level."""
+        with self._lock:
+            result = {}
+            for level in LEVELS:
+                hits, misses = self._stats[level]["hits"], self._stats[level]["misses"]
+                result[level] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                    "size": len(self._levels[level]),
+                }
+            return result
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_scan_cache() -> ScanCache:
+    """The process-wide ScanCache, configured from settings on first use."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                backend = None
+                alias = getattr(settings, "SCAN_CACHE_ALIAS", None)
+                if alias:
+                    from django.core.cache import caches
+                    backend = caches[alias]
+                _CACHE = ScanCache(
+                    max_entries=getattr(settings, "SCAN_CACHE_SIZE", 256),
+                    backend=backend,
+                    timeout=getattr(settings, "SCAN_CACHE_TIMEOUT", None),
+                )
+    return _CACHE
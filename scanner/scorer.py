@@ -1,5 +1,12 @@
 # backend/scorer.py
 
+# Define how much each component is worth.
+# This is easily tunable.
+DEFAULT_WEIGHTS = {
+    "skill_match_ratio": 0.7,  # 70% of score is based on % of skills matched
+    "avg_similarity": 0.3       # 30% is based on *how well* they matched
+}
+
 def calculate_ats_score(match_results: dict, weights=None) -> dict:
     """
     Calculates the final ATS score based on the semantic match results.
@@ -13,12 +20,7 @@ def calculate_ats_score(match_results: dict, weights=None) -> dict:
     """
     
     if weights is None:
-        # Define how much each component is worth.
-        # This is easily tunable.
-        weights = {
-            "skill_match_ratio": 0.7,  # 70% of score is based on % of skills matched
-            "avg_similarity": 0.3       # 30% is based on *how well* they matched
-        }
+        weights = DEFAULT_WEIGHTS
 
     total_jd_skills = len(match_results["matched_skills"]) + len(match_results["missing_skills"])
     
@@ -41,6 +43,18 @@ def calculate_ats_score(match_results: dict, weights=None) -> dict:
         avg_similarity = 0 # No matches, so similarity is 0
 
     # 3. Calculate Final Weighted Score
+    return combine_scores(skill_match_ratio, avg_similarity, weights)
+
+
+def combine_scores(skill_match_ratio: float, avg_similarity: float, weights=None) -> dict:
+    """
+    Turns the two score components (both 0-1) into the final weighted
+    0-100 score. Shared by calculate_ats_score and the batched recommender,
+    so both produce exactly the same numbers.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+
     final_score = (skill_match_ratio * weights["skill_match_ratio"]) + \
                   (avg_similarity * weights["avg_similarity"])
                   
@@ -1,26 +1,196 @@
 # backend/semantic_matcher.py
 
-from sentence_transformers import SentenceTransformer, util
+from importlib import metadata
+
 import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .embedding_store import EmbeddingStore
+from . import tracing
+from .encode_batcher import EncodeBatcher
+from .model_registry import registry
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# How the model runs (SBERT_BACKEND setting):
+#   torch  fp32 PyTorch, the reference
+#   onnx   ONNX Runtime (needs `optimum[onnxruntime]`); SBERT_ONNX_FILE picks one
+#          of the model's exported files, e.g. "onnx/model_qint8_avx512_vnni.onnx"
+#   int8   PyTorch with every Linear layer dynamically quantized to int8
+BACKENDS = ("torch", "onnx", "int8")
+BACKEND = getattr(settings, "SBERT_BACKEND", "torch")
+
+
+def model_version(backend: str = BACKEND) -> str:
+    """
+    Cached vectors are only reused if the model, the library version and
+    the backend match (read from package metadata, so it doesn't import torch).
+    """
+    version = f"sentence-transformers-{metadata.version('sentence-transformers')}"
+    if backend == "onnx":
+        version += f"-onnx-{getattr(settings, 'SBERT_ONNX_FILE', None) or 'default'}"
+    elif backend != "torch":
+        version += f"-{backend}"
+    return version
+
+
+MODEL_VERSION = model_version()
+
+
+def load_encoder(backend: str = BACKEND):
+    """Loads the SBERT model for `backend`. This downloads it the first time."""
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"SBERT_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        onnx_file = getattr(settings, "SBERT_ONNX_FILE", None)
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(MODEL_NAME, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    model = SentenceTransformer(MODEL_NAME, device="cpu" if backend == "int8" else None)
+    if backend == "int8":
+        import torch
+
+        # Weights stored as int8, activations quantized on the fly (CPU only)
+        torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def _load_model():
+    return load_encoder(BACKEND)
+
+
+# Loaded on first use, not at import
+registry.register("sbert", _load_model)
+
+
+def get_model():
+    return registry.get("sbert")
+
+# How often we actually ran the model (cache misses only, one call per batch)
+MODEL_STATS = {"encode_calls": 0, "encoded_texts": 0}
+
+_store = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """The process-wide skill -> vector store (LRU in front of an mmap'd file)."""
+    global _store
+    if _store is None:
+        _store = EmbeddingStore(
+            settings.EMBEDDING_CACHE_DIR,
+            model_name=MODEL_NAME,
+            model_version=MODEL_VERSION,
+            lru_size=getattr(settings, "EMBEDDING_LRU_SIZE", 4096),
+        )
+    return _store
+
+
+def _encode_now(texts: list) -> np.ndarray:
+    MODEL_STATS["encode_calls"] += 1
+    MODEL_STATS["encoded_texts"] += len(texts)
+    return get_model().encode(texts, convert_to_numpy=True).astype(np.float32, copy=False)
+
 
-# Load the SBERT model. This will download it the first time we run it.
-model = SentenceTransformer("all-MiniLM-L6-v2")
+_batcher = None
+
+
+def get_batcher():
+    """
+    The process-wide EncodeBatcher, or None if SBERT_BATCH_WAIT_MS is 0
+    (every call then runs the model itself).
+    """
+    global _batcher
+    wait_ms = getattr(settings, "SBERT_BATCH_WAIT_MS", 5)
+    if not wait_ms:
+        return None
+    if _batcher is None:
+        _batcher = EncodeBatcher(
+            _encode_now, max_batch=getattr(settings, "SBERT_BATCH_MAX", 64), max_wait=wait_ms / 1000
+        )
+    return _batcher
+
+
+def encode(texts: list) -> np.ndarray:
+    """
+    Runs the model on a list of strings and returns float32 vectors.
+    Concurrent calls (other request threads) share forward passes.
+    """
+    with tracing.stage("sbert_encode"):
+        batcher = get_batcher()
+        if batcher is None:
+            return _encode_now(texts)
+        return batcher.encode(texts)
 
 
 def embed_skills(skills: list):
     """
     Convert a list of skill strings into numerical vectors (embeddings).
+    Vectors come from the embedding store; only unseen skills are sent
+    to the model, all in one call, and are then persisted.
     """
     if not skills:
         return None
-    # convert_to_tensor=True makes it faster for comparison
-    return model.encode(skills, convert_to_tensor=True)
+
+    store = get_embedding_store()
+    vectors = [store.get(skill) for skill in skills]
+
+    missing = sorted({skill for skill, vector in zip(skills, vectors) if vector is None})
+    if missing:
+        encoded = dict(zip(missing, encode(missing)))
+        store.put_many(missing, [encoded[skill] for skill in missing])
+        store.flush()
+        vectors = [encoded[skill] if vector is None else vector for skill, vector in zip(skills, vectors)]
+
+    return np.stack(vectors)
+
+
+def prewarm(skills: list):
+    """
+    Makes sure every skill in the list has a stored vector, so later
+    matches against them never call the model.
+    """
+    embed_skills(list(skills))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scales every row to unit length (same epsilon as torch's normalize)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def cos_sim(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosine similarity between every row of a and every row of b."""
+    return normalize(a) @ normalize(b).T
+
+
+def decision_parity(reference: np.ndarray, vectors: np.ndarray, threshold=0.70) -> dict:
+    """
+    Compares two embeddings of the same skills (e.g. fp32 vs. a quantized
+    backend) by the match decision, similarity >= threshold, of every
+    pair of skills. `max_flip_margin` is how far from the threshold the
+    reference similarity of the worst flipped pair was.
+    """
+    pairs = np.triu_indices(len(reference), k=1)
+    expected = cos_sim(reference, reference)[pairs]
+    actual = cos_sim(vectors, vectors)[pairs]
+    flipped = (expected >= threshold) != (actual >= threshold)
+    return {
+        "pairs": len(expected),
+        "flipped": int(flipped.sum()),
+        "agreement": float(1 - flipped.mean()) if len(expected) else 1.0,
+        "max_abs_diff": float(np.abs(expected - actual).max()) if len(expected) else 0.0,
+        "max_flip_margin": float(np.abs(expected[flipped] - threshold).max()) if flipped.any() else 0.0,
+    }
 
 
 def semantic_skill_match(resume_skills: list, jd_skills: list, threshold=0.70):
     """
     Compares resume skills and JD skills using semantic similarity.
-    
+
     Returns a dictionary containing:
     - matched skills
     - missing skills from the JD
@@ -33,14 +203,20 @@ def semantic_skill_match(resume_skills: list, jd_skills: list, threshold=0.70):
             "match_scores": {}
         }
 
-    # Generate embeddings for both lists
-    resume_embeddings = embed_skills(resume_skills)
-    jd_embeddings = embed_skills(jd_skills)
+    # Cosine similarity between all pairs, as a [JD Skills x Resume Skills] matrix.
+    # Taxonomy skills are looked up in the precomputed skill x skill matrix,
+    # only other skills are embedded
+    from .skill_similarity import get_similarity_matrix
+    cosine_scores = get_similarity_matrix().scores(jd_skills, resume_skills)
 
-    # Compute cosine similarity between all pairs
-    # This creates a matrix of [JD Skills x Resume Skills]
-    cosine_scores = util.cos_sim(jd_embeddings, resume_embeddings).cpu().numpy()
+    return match_from_scores(resume_skills, jd_skills, cosine_scores, threshold)
 
+
+def match_from_scores(resume_skills: list, jd_skills: list, cosine_scores, threshold=0.70):
+    """
+    Builds the match result from a [JD Skills x Resume Skills]
+    similarity matrix.
+    """
     matched_skills = []
     missing_skills = []
     match_scores = {}
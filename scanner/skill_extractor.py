@@ -3,12 +3,38 @@
 
 import re
 import csv
+import hashlib
+import logging
 import os
+import threading
+from collections import deque
 from django.conf import settings
 
-def load_skill_taxonomy():
+from . import tracing
+
+logger = logging.getLogger(__name__)
+
+# Section headers suggestions.py looks for (any of the words, as substrings)
+SECTION_KEYWORDS = {
+    "skills": ("skills",),
+    "experience": ("experience", "employment"),
+    "education": ("education",),
+    "projects": ("project",),
+}
+# A simple proxy for good bullet points
+ACTION_VERBS = ("developed", "managed", "led", "created", "implemented", "optimized")
+# Reported by SkillTaxonomy.matcher.scan() next to the skills (see text_analyzer)
+DOCUMENT_KEYWORDS = tuple(word for words in SECTION_KEYWORDS.values() for word in words) + ACTION_VERBS
+
+
+def taxonomy_path() -> str:
+    return str(getattr(settings, 'SKILL_TAXONOMY_PATH', None) or
+               os.path.join(settings.BASE_DIR, 'dataset', 'skill_taxonomy.csv'))
+
+
+def load_skill_taxonomy(path=None):
     # Dynamically find the file inside the 'dataset' folder
-    path = os.path.join(settings.BASE_DIR, 'dataset', 'skill_taxonomy.csv')
+    path = path or taxonomy_path()
     
     skills_set = set()
     try:
@@ -18,14 +44,237 @@ def load_skill_taxonomy():
                 if row:
                     skills_set.add(row[0].strip().lower())
     except FileNotFoundError:
-        print(f"[ERROR] Skill taxonomy not found at: {path}")
+        tracing.record_error("taxonomy", "Skill taxonomy not found at %s", path)
     return skills_set
 
 
+def _is_word_char(ch: str) -> bool:
+    # Same definition of a "word" character as the \w class used by `re`
+    return ch.isalnum() or ch == "_"
+
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over the lowercased skill strings.
+
+    It is built once per taxonomy and finds every whole-word skill hit
+    in a single pass over the text, so the cost per document no longer
+    grows with the number of skills in the taxonomy.
+
+    A hit only counts if the characters right before and after it are
+    not word characters. For normal skills this is exactly the old
+    r"\\b<skill>\\b" rule ("java" never matches inside "javascript"),
+    and it also lets skills that start or end with punctuation
+    ("c++", "c#", ".net") match when followed by a space or a comma.
+    """
+
+    def __init__(self, skills, keywords=()):
+        self.skills = sorted({s for s in skills if s})
+        # Plain substrings (no word boundaries) reported by scan() with their first offset
+        self.keywords = sorted({k for k in keywords if k})
+        patterns = self.skills + self.keywords
+
+        # goto[node] maps a character to the next node
+        self._goto = [{}]
+        self._fail = [0]
+        # Pattern ids that end at this node, plus those inherited via fail links
+        self._out = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_id)
+
+        self._build_fail_links()
+        self._lengths = [len(p) for p in patterns]
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self.skills)
+
+    def find_all(self, text: str) -> set:
+        """
+        Returns the set of skills found in the text as whole words.
+        """
+        return self.scan(text.lower())[0]
+
+    def scan(self, text_lower: str):
+        """
+        One pass over already lowercased text. Returns the set of skills
+        found as whole words and {keyword: offset of its first occurrence}.
+        """
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        skills, keywords = self.skills, self.keywords
+        n_skills = len(skills)
+        end = len(text_lower)
+
+        found = set()
+        keyword_offsets = {}
+        node = 0
+        for i, ch in enumerate(text_lower):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+
+            # Right boundary is the same for every skill ending here
+            right_ok = i + 1 >= end or not _is_word_char(text_lower[i + 1])
+            for pattern_id in out[node]:
+                start = i + 1 - lengths[pattern_id]
+                if pattern_id >= n_skills:
+                    keyword_offsets.setdefault(keywords[pattern_id - n_skills], start)
+                elif right_ok and (start == 0 or not _is_word_char(text_lower[start - 1])):
+                    found.add(skills[pattern_id])
+        return found, keyword_offsets
+
+
+# Compiled matchers, keyed by the exact skill set they were built from
+_MATCHER_CACHE = {}
+_MATCHER_CACHE_SIZE = 8
+
+
+def get_skill_matcher(skill_list) -> SkillMatcher:
+    """
+    Returns a compiled SkillMatcher for the given skills, building it
+    only the first time a given skill set is seen.
+    """
+    if isinstance(skill_list, SkillMatcher):
+        return skill_list
+    if isinstance(skill_list, SkillTaxonomy):
+        return skill_list.matcher
+
+    key = frozenset(skill_list)
+    matcher = _MATCHER_CACHE.get(key)
+    if matcher is None:
+        if len(_MATCHER_CACHE) >= _MATCHER_CACHE_SIZE:
+            _MATCHER_CACHE.pop(next(iter(_MATCHER_CACHE)))
+        matcher = SkillMatcher(key)
+        _MATCHER_CACHE[key] = matcher
+    return matcher
+
+
+class SkillTaxonomy:
+    """
+    The loaded skill taxonomy, shared by the whole process.
+
+    Holds the normalized skill set, its compiled SkillMatcher (which also
+    reports the DOCUMENT_KEYWORDS) and (lazily) the SBERT embeddings of every skill, in `skill_list` order.
+    It behaves like the old set of skills, so it can be passed anywhere
+    a `skill_list` is expected.
+    """
+
+    def __init__(self, skills, path=None, mtime=None):
+        self.skills = frozenset(s for s in skills if s)
+        self.skill_list = sorted(self.skills)
+        self.index = {skill: i for i, skill in enumerate(self.skill_list)}
+        self.matcher = SkillMatcher(self.skills, keywords=DOCUMENT_KEYWORDS)
+        self.path = path
+        self.mtime = mtime
+        # Changes whenever the set of skills changes
+        self.version = hashlib.sha1("\n".join(self.skill_list).encode("utf-8")).hexdigest()[:12]
+
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, skill):
+        return skill in self.skills
+
+    def __iter__(self):
+        return iter(self.skill_list)
+
+    def __len__(self):
+        return len(self.skill_list)
+
+    @property
+    def embeddings(self):
+        """Embeddings of `skill_list`, computed on first access."""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from . import semantic_matcher
+                    self._embeddings = semantic_matcher.embed_skills(self.skill_list)
+        return self._embeddings
+
+
+_TAXONOMY = {}
+_TAXONOMY_LOCK = threading.Lock()
+_TAXONOMY_STATS = {"hits": 0, "misses": 0, "loads": 0}
+
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_skill_taxonomy(path=None) -> SkillTaxonomy:
+    """
+    Returns the process-wide SkillTaxonomy.
+    The CSV is only read again when its modification time changes.
+    """
+    path = path or taxonomy_path()
+    mtime = _file_mtime(path)
+
+    taxonomy = _TAXONOMY.get(path)
+    if taxonomy is not None and taxonomy.mtime == mtime:
+        _TAXONOMY_STATS["hits"] += 1
+        return taxonomy
+
+    with _TAXONOMY_LOCK:
+        taxonomy = _TAXONOMY.get(path)
+        if taxonomy is not None and taxonomy.mtime == mtime:
+            _TAXONOMY_STATS["hits"] += 1
+            return taxonomy
+
+        _TAXONOMY_STATS["misses"] += 1
+        _TAXONOMY_STATS["loads"] += 1
+        taxonomy = SkillTaxonomy(load_skill_taxonomy(path), path=path, mtime=mtime)
+        _TAXONOMY[path] = taxonomy
+        return taxonomy
+
+
+def taxonomy_stats() -> dict:
+    """Hit/miss/load counters for get_skill_taxonomy()."""
+    return dict(_TAXONOMY_STATS)
+
+
 def extract_skills_from_text(text: str, skill_list: set) -> list:
     """
     Extract skills from the resume text based on the skill_list.
-    This uses regex to find whole word matches.
+    Finds whole word matches in one pass with a compiled SkillMatcher.
+    """
+    if not text:
+        return []
+
+    matcher = get_skill_matcher(skill_list)
+    return sorted(matcher.find_all(text))
+
+
+def extract_skills_from_text_regex(text: str, skill_list: set) -> list:
+    """
+    The original one-regex-per-skill implementation.
+    Kept as the reference for tests and the skill matcher benchmark.
     """
     found_skills = set()
     text_lower = text.lower()
@@ -37,4 +286,4 @@ def extract_skills_from_text(text: str, skill_list: set) -> list:
         if re.search(pattern, text_lower):
             found_skills.add(skill)
 
-    return sorted(list(found_skills))
\ No newline at end of file
+    return sorted(list(found_skills))
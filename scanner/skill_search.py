@@ -0,0 +1,88 @@
+# backend/skill_search.py
+
+from django.db.models import Count
+
+from .models import ScanHistory, ScanSkill, Skill
+
+
+def normalize_skill(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def skill_ids(names) -> dict:
+    """{name: Skill id} for every name, creating the missing Skill rows."""
+    names = {normalize_skill(name) for name in names} - {""}
+    if not names:
+        return {}
+    existing = dict(Skill.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - existing.keys()
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        existing.update(Skill.objects.filter(name__in=missing).values_list("name", "id"))
+    return existing
+
+
+def sync_scan_skills(scans):
+    """
+    Writes the ScanSkill rows of saved scans from their matched_skills /
+    missing_skills (replacing any previous ones). Called wherever scans
+    are saved, so the two never disagree.
+    """
+    scans = [scan for scan in scans if scan.pk is not None]
+    if not scans:
+        return
+    ids = skill_ids(
+        skill for scan in scans for skill in list(scan.matched_skills) + list(scan.missing_skills)
+    )
+
+    rows = {}
+    for scan in scans:
+        # A skill both matched and missing (shouldn't happen) counts as matched
+        for skill in scan.missing_skills:
+            if normalize_skill(skill):
+                rows[scan.pk, ids[normalize_skill(skill)]] = False
+        for skill in scan.matched_skills:
+            if normalize_skill(skill):
+                rows[scan.pk, ids[normalize_skill(skill)]] = True
+
+    ScanSkill.objects.filter(scan__in=[scan.pk for scan in scans]).delete()
+    ScanSkill.objects.bulk_create(
+        [ScanSkill(scan_id=scan_id, skill_id=skill_id, matched=matched)
+         for (scan_id, skill_id), matched in rows.items()],
+        batch_size=1000,
+    )
+
+
+def _scans_with_skills(names, matched=True, require_all=True):
+    """Subquery of scan ids having all (or any) of the skills."""
+    names = sorted({normalize_skill(name) for name in names})
+    rows = ScanSkill.objects.filter(skill__name__in=names)
+    if matched is not None:
+        rows = rows.filter(matched=matched)
+    if not require_all:
+        return rows.values("scan_id")
+    return (
+        rows.values("scan_id")
+        .annotate(n=Count("skill_id"))
+        .filter(n=len(names))
+        .values("scan_id")
+    )
+
+
+def search_scans(queryset=None, all_skills=(), any_skills=(), matched=True, since=None, until=None):
+    """
+    Scans that have every skill in `all_skills` and at least one of
+    `any_skills`, as a queryset (one SQL query, served by the ScanSkill
+    skill index). `matched` picks matched skills (True), missing ones
+    (False) or either (None). `since`/`until` bound the scan date.
+    """
+    queryset = ScanHistory.objects.all() if queryset is None else queryset
+    if all_skills:
+        queryset = queryset.filter(id__in=_scans_with_skills(all_skills, matched, require_all=True))
+    if any_skills:
+        queryset = queryset.filter(id__in=_scans_with_skills(any_skills, matched, require_all=False))
+    if since:
+        queryset = queryset.filter(scan_date__gte=since)
+    if until:
+        queryset = queryset.filter(scan_date__lt=until)
+    return queryset
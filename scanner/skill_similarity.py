@@ -0,0 +1,182 @@
+# backend/skill_similarity.py
+
+import logging
+import os
+import re
+import tempfile
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from . import semantic_matcher, tracing
+from .model_registry import add_warmup
+from .skill_extractor import get_skill_taxonomy
+
+# Neighbor lists keep every pair at least this similar (the matcher's threshold)
+NEIGHBOR_THRESHOLD = 0.70
+# Bump when the file layout changes
+FORMAT_VERSION = 2
+
+STATS = {"lookups": 0, "fallback_skills": 0}
+
+logger = logging.getLogger(__name__)
+
+
+def model_fingerprint() -> str:
+    """The embedding model a matrix was built with, stored in its file."""
+    return f"{semantic_matcher.MODEL_NAME}:{semantic_matcher.MODEL_VERSION}"
+
+
+class SimilarityMatrix:
+    """
+    Cosine similarity between every pair of taxonomy skills, computed
+    once from the stored embeddings.
+
+    Resume and JD skills both come from the taxonomy, so a match is a
+    gather from this matrix instead of an encode + cos_sim. Skills
+    outside the taxonomy fall back to the embedding store / model.
+    `neighbors(skill)` lists the skills at least NEIGHBOR_THRESHOLD
+    similar to it, best first. `model` is the model_fingerprint() of the
+    vectors.
+    """
+
+    def __init__(self, skills: list, vectors: np.ndarray, matrix: np.ndarray,
+                 neighbor_offsets: np.ndarray, neighbor_ids: np.ndarray, model: str = ""):
+        self.skills = list(skills)
+        self.model = model
+        self.index = {skill: i for i, skill in enumerate(self.skills)}
+        self.vectors = vectors
+        self.matrix = matrix
+        self.neighbor_offsets = neighbor_offsets
+        self.neighbor_ids = neighbor_ids
+
+    @classmethod
+    def build(cls, skills: list):
+        skills = list(skills)
+        vectors = semantic_matcher.normalize(semantic_matcher.embed_skills(skills)).astype(np.float32)
+        matrix = vectors @ vectors.T
+
+        offsets, ids = [0], []
+        for row in matrix:
+            near = np.flatnonzero(row >= NEIGHBOR_THRESHOLD)
+            near = near[np.argsort(-row[near], kind="stable")]
+            ids.extend(near)
+            offsets.append(len(ids))
+        return cls(skills, vectors, matrix,
+                   np.asarray(offsets, dtype=np.int64), np.asarray(ids, dtype=np.int32), model_fingerprint())
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".similarity-", suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, skills=np.asarray(self.skills), vectors=self.vectors, matrix=self.matrix,
+                     neighbor_offsets=self.neighbor_offsets, neighbor_ids=self.neighbor_ids,
+                     model=np.asarray(self.model))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls([str(s) for s in data["skills"]], data["vectors"], data["matrix"],
+                       data["neighbor_offsets"], data["neighbor_ids"], str(data["model"]))
+
+    def is_current(self, skills: list) -> bool:
+        """
+        Built by the current model for exactly these skills, from the
+        vectors in the embedding store (checked on one stored skill, so
+        a matrix of other vectors, e.g. a test's fakes, is never used).
+        """
+        if self.model != model_fingerprint() or self.skills != list(skills):
+            return False
+        store = semantic_matcher.get_embedding_store()
+        skill = next((skill for skill in self.skills if skill in store), None)
+        if skill is None:
+            return True
+        stored = semantic_matcher.normalize(store.get(skill)[None, :])[0]
+        row = self.vectors[self.index[skill]]
+        return stored.shape == row.shape and bool(np.allclose(stored, row, atol=1e-4))
+
+    # --- Lookups ---
+
+    def neighbors(self, skill: str) -> list:
+        i = self.index.get(skill)
+        if i is None:
+            return []
+        return [self.skills[j] for j in self.neighbor_ids[self.neighbor_offsets[i]:self.neighbor_offsets[i + 1]]]
+
+    def _vectors_for(self, skills: list) -> np.ndarray:
+        """Unit vectors of any skills: taxonomy rows, the store/model for the rest."""
+        vectors = np.empty((len(skills), self.vectors.shape[1]), dtype=np.float32)
+        unknown = [k for k, skill in enumerate(skills) if skill not in self.index]
+        known = [k for k, skill in enumerate(skills) if skill in self.index]
+        vectors[known] = self.vectors[[self.index[skills[k]] for k in known]]
+        if unknown:
+            STATS["fallback_skills"] += len(unknown)
+            vectors[unknown] = semantic_matcher.normalize(
+                semantic_matcher.embed_skills([skills[k] for k in unknown])
+            )
+        return vectors
+
+    def scores(self, row_skills: list, column_skills: list) -> np.ndarray:
+        """The [row skills x column skills] cosine similarity matrix."""
+        STATS["lookups"] += 1
+        rows = [self.index.get(skill) for skill in row_skills]
+        columns = [self.index.get(skill) for skill in column_skills]
+        if None not in rows and None not in columns:
+            return self.matrix[np.ix_(rows, columns)]
+        return self._vectors_for(row_skills) @ self._vectors_for(column_skills).T
+
+
+def matrix_path(taxonomy_version: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9_.-]+", "_", f"{semantic_matcher.MODEL_NAME}-{semantic_matcher.MODEL_VERSION}")
+    return os.path.join(str(settings.SKILL_SIMILARITY_DIR), f"v{FORMAT_VERSION}-{taxonomy_version}-{slug}.npz")
+
+
+_MATRIX = {"matrix": None, "version": None}
+_MATRIX_LOCK = threading.Lock()
+
+
+def build_similarity_matrix(log=print) -> SimilarityMatrix:
+    """Computes the current taxonomy's matrix and persists it."""
+    taxonomy = get_skill_taxonomy()
+    similarity = SimilarityMatrix.build(taxonomy.skill_list)
+    path = matrix_path(taxonomy.version)
+    similarity.save(path)
+    pairs = len(similarity.neighbor_ids) - len(similarity.skills)
+    log(f"Skill similarity matrix: {len(similarity.skills)} skills, "
+        f"{pairs} neighbor pairs >= {NEIGHBOR_THRESHOLD} -> {path}")
+    return similarity
+
+
+def get_similarity_matrix() -> SimilarityMatrix:
+    """
+    The process-wide matrix for the current taxonomy: loaded from disk,
+    or built (and saved) the first time a taxonomy/model is used.
+    """
+    taxonomy = get_skill_taxonomy()
+    if _MATRIX["matrix"] is not None and _MATRIX["version"] == taxonomy.version:
+        return _MATRIX["matrix"]
+
+    with _MATRIX_LOCK:
+        if _MATRIX["matrix"] is not None and _MATRIX["version"] == taxonomy.version:
+            return _MATRIX["matrix"]
+        path = matrix_path(taxonomy.version)
+        similarity = None
+        if os.path.exists(path):
+            try:
+                similarity = SimilarityMatrix.load(path)
+            except (OSError, ValueError, KeyError):
+                tracing.record_error("similarity_matrix", "Could not read skill similarity matrix %s", path)
+        if similarity is not None and not similarity.is_current(taxonomy.skill_list):
+            logger.warning("Skill similarity matrix %s does not match the embedding model, rebuilding it", path)
+            similarity = None
+        if similarity is None:
+            similarity = build_similarity_matrix(log=lambda message: None)
+        _MATRIX.update(matrix=similarity, version=taxonomy.version)
+        return similarity
+
+
+add_warmup(get_similarity_matrix)
@@ -1,14 +1,16 @@
 # backend/suggestions.py
 
-import re
+from . import text_analyzer
 
-def generate_resume_suggestions(resume_text: str, basic_info: dict, extracted_skills: list) -> list:
+def generate_resume_suggestions(resume_text: str, basic_info: dict, extracted_skills: list, doc=None) -> list:
     """
     Analyzes the resume text and extracted info to provide simple,
     rule-based improvement suggestions.
+    `doc` is the resume's text_analyzer.AnalyzedDocument (analyzed here if not given).
     """
     suggestions = []
-    text_lower = resume_text.lower()
+    if doc is None:
+        doc = text_analyzer.analyze(resume_text)
 
     # --- Basic Info Checks ---
     if not basic_info.get("email"):
@@ -21,22 +23,21 @@ def generate_resume_suggestions(resume_text: str, basic_info: dict, extracted_sk
         suggestions.append("Warning: Could not detect a name. Ensure your name is at the top.")
 
     # --- Section Checks ---
-    if "skills" not in text_lower and not extracted_skills:
+    if not doc.has_section("skills") and not extracted_skills:
         suggestions.append("Recommendation: Add a dedicated 'Skills' section to improve ATS parsing.")
         
-    if "experience" not in text_lower and "employment" not in text_lower:
+    if not doc.has_section("experience"):
         suggestions.append("Recommendation: Add a 'Work Experience' section with clear job titles and dates.")
 
-    if "education" not in text_lower:
+    if not doc.has_section("education"):
         suggestions.append("Recommendation: Add an 'Education' section detailing your degrees.")
         
-    if "project" not in text_lower:
+    if not doc.has_section("projects"):
         suggestions.append("Tip: Consider adding a 'Projects' section to showcase your practical skills.")
 
     # --- Content Checks ---
     # Check for "action verbs" (a simple proxy for good bullet points)
-    action_verbs = ['developed', 'managed', 'led', 'created', 'implemented', 'optimized']
-    if not any(verb in text_lower for verb in action_verbs):
+    if not doc.action_verbs:
         suggestions.append("Tip: Improve your experience bullet points by starting them with action verbs (e.g., 'Developed', 'Managed', 'Led').")
 
     return suggestions
\ No newline at end of file
@@ -1,7 +1,34 @@
 
-from django.test import TestCase, Client
+import csv
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+import zipfile
+import zlib
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from . import candidate_ranker, extractor, jd_index, jd_processor, jobs, model_registry, name_extractor, parser, pipeline, reports, skill_search, recommender, scorer, semantic_matcher, skill_extractor, skill_similarity, suggestions, text_analyzer, tracing
+from .embedding_store import EmbeddingStore
+from .encode_batcher import EncodeBatcher
+from .scan_cache import ScanCache, get_scan_cache, hash_bytes
+from .skill_similarity import SimilarityMatrix
+from .model_registry import ModelRegistry
+from .models import ScanHistory, ScanJob, ScanSkill
+
 
 class ScannerTests(TestCase):
     def setUp(self):
@@ -36,4 +63,1204 @@ class ScannerTests(TestCase):
         
         # Check if the context contains the score
         self.assertIn('ats_score', response.context)
-        print("\n Test Scan Score:", response.context['ats_score']['score'])
\ No newline at end of file
+        print("\n Test Scan Score:", response.context['ats_score']['score'])
+
+class SkillExtractorTests(TestCase):
+    def test_matcher_agrees_with_per_skill_regex(self):
+        """The compiled matcher finds the same skills as the old regex loop"""
+        skills = skill_extractor.load_skill_taxonomy()
+        text = "Built REST APIs in Python and Django, deployed with Docker on AWS. Some JavaScript."
+
+        self.assertEqual(
+            skill_extractor.extract_skills_from_text(text, skills),
+            skill_extractor.extract_skills_from_text_regex(text, skills),
+        )
+
+    def test_whole_word_and_punctuated_skills(self):
+        """'java' must not match inside 'javascript', and c++ / c# / .net match as words"""
+        matcher = skill_extractor.SkillMatcher({"java", "javascript", "c", "c++", "c#", ".net"})
+
+        self.assertEqual(matcher.find_all("JavaScript only"), {"javascript"})
+        self.assertEqual(matcher.find_all("C++, C# and .NET"), {"c", "c++", "c#", ".net"})
+        self.assertEqual(matcher.find_all("asp.netcore c++11"), {"c"})
+
+    def test_missing_files_are_logged_and_counted(self):
+        tracing.metrics.reset()
+        with self.assertLogs("scanner", "ERROR") as logs:
+            self.assertEqual(skill_extractor.load_skill_taxonomy("/nonexistent/skills.csv"), set())
+            self.assertEqual(jd_processor.process_jd_file("/nonexistent/jd.txt"), [])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(tracing.metrics.errors, {"taxonomy": 1, "jd_file": 1})
+
+
+class SkillTaxonomyTests(TestCase):
+    def setUp(self):
+        fd, self.csv_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("Python\nDjango\n")
+        self.addCleanup(os.remove, self.csv_path)
+
+    def test_taxonomy_is_cached_until_csv_changes(self):
+        """The CSV is read once, and again only when its mtime changes"""
+        with override_settings(SKILL_TAXONOMY_PATH=self.csv_path):
+            before = skill_extractor.taxonomy_stats()
+            first = skill_extractor.get_skill_taxonomy()
+            second = skill_extractor.get_skill_taxonomy()
+
+            self.assertIs(first, second)
+            self.assertEqual(first.skill_list, ["django", "python"])
+            stats = skill_extractor.taxonomy_stats()
+            self.assertEqual(stats["loads"] - before["loads"], 1)
+            self.assertEqual(stats["hits"] - before["hits"], 1)
+
+            with open(self.csv_path, "a", encoding="utf-8") as f:
+                f.write("docker\n")
+            os.utime(self.csv_path, ns=(0, first.mtime + 1_000_000_000))
+
+            reloaded = skill_extractor.get_skill_taxonomy()
+            self.assertIsNot(reloaded, first)
+            self.assertIn("docker", reloaded)
+            self.assertNotEqual(reloaded.version, first.version)
+
+
+class EmbeddingStoreTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_vectors_survive_a_restart(self):
+        """Flushed vectors are served from the mmap'd file by a new store"""
+        store = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        store.put_many(["python", "django"], np.eye(2, 4, dtype=np.float32))
+        store.flush()
+
+        reopened = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        self.assertEqual(len(reopened), 2)
+        np.testing.assert_array_equal(reopened.get("django"), [0, 1, 0, 0])
+        self.assertIsNone(reopened.get("docker"))
+
+    def test_stale_model_version_is_ignored(self):
+        """Vectors from another model version are never reused"""
+        store = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        store.put_many(["python"], np.ones((1, 4), dtype=np.float32))
+        store.flush()
+
+        upgraded = EmbeddingStore(self.cache_dir, "test-model", "v2")
+        self.assertIsNone(upgraded.get("python"))
+        self.assertEqual(len(upgraded), 0)
+
+    def test_workers_flushing_in_turn_keep_every_vector(self):
+        """Each flush merges what is on disk: skills never get another flush's vectors"""
+        first = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        second = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        first.put_many(["python"], np.full((1, 4), 1, dtype=np.float32))
+        second.put_many(["django"], np.full((1, 4), 2, dtype=np.float32))
+        first.flush()
+        second.flush()
+
+        reopened = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        np.testing.assert_array_equal(reopened.get("python"), [1, 1, 1, 1])
+        np.testing.assert_array_equal(reopened.get("django"), [2, 2, 2, 2])
+        # Only the index's own vectors file is kept
+        self.assertEqual([name for name in os.listdir(self.cache_dir) if name.endswith(".npy")],
+                         [os.path.basename(reopened.vectors_path)])
+
+    def test_unreadable_cache_is_logged_and_counted(self):
+        store = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        store.put_many(["python"], np.ones((1, 4), dtype=np.float32))
+        store.flush()
+        with open(store.index_path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+
+        tracing.metrics.reset()
+        with self.assertLogs("scanner.tracing", level="ERROR"):
+            reopened = EmbeddingStore(self.cache_dir, "test-model", "v1")
+        self.assertEqual(len(reopened), 0)
+        self.assertEqual(tracing.metrics.errors, {"embedding_cache": 1})
+
+    def test_lru_is_bounded(self):
+        store = EmbeddingStore(self.cache_dir, "test-model", "v1", lru_size=2)
+        store.put_many(["a", "b", "c"], np.ones((3, 4), dtype=np.float32))
+        self.assertEqual(len(store._lru), 2)
+        # Evicted from the LRU but still pending for the next flush
+        self.assertIsNotNone(store.get("a"))
+
+
+def fake_embed_skills(skills):
+    """Deterministic stand-in for the SBERT model: one vector per skill string."""
+    if not skills:
+        return None
+    return np.stack([
+        np.random.default_rng(zlib.crc32(skill.encode())).standard_normal(4).astype(np.float32)
+        for skill in skills
+    ])
+
+
+_FAKE_MATRICES = {}
+
+
+def fake_similarity_matrix():
+    """The taxonomy's SimilarityMatrix under fake_embed_skills (never written to disk)."""
+    taxonomy = skill_extractor.get_skill_taxonomy()
+    if taxonomy.version not in _FAKE_MATRICES:
+        with mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills):
+            _FAKE_MATRICES[taxonomy.version] = SimilarityMatrix.build(taxonomy.skill_list)
+    return _FAKE_MATRICES[taxonomy.version]
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+class RecommenderTests(TestCase):
+    JD_DATABASE = {
+        "Backend_Developer.txt": ["django", "docker", "postgresql", "python", "rest api"],
+        "Data_Scientist.txt": ["machine learning", "pandas", "python", "sql"],
+        "Designer.txt": ["figma", "photoshop"],
+        "Empty.txt": [],
+    }
+
+    def test_batched_scores_match_per_jd_scoring(self):
+        """JobMatrix gives exactly calculate_ats_score's result for every JD"""
+        resume_skills = ["python", "django", "sql", "git", "kubernetes"]
+        job_matrix = recommender.JobMatrix(self.JD_DATABASE)
+
+        batched = job_matrix.score(resume_skills)
+        for job_title, score_data in zip(job_matrix.titles, batched):
+            match_results = semantic_matcher.semantic_skill_match(resume_skills, self.JD_DATABASE[job_title])
+            self.assertEqual(score_data, scorer.calculate_ats_score(match_results), job_title)
+
+    def test_recommend_jobs_accepts_dict_or_matrix(self):
+        resume_skills = ["python", "pandas"]
+        self.assertEqual(
+            recommender.recommend_jobs(resume_skills, self.JD_DATABASE, top_n=2),
+            recommender.recommend_jobs(resume_skills, recommender.JobMatrix(self.JD_DATABASE), top_n=2),
+        )
+
+    def test_job_index_matches_full_scan(self):
+        """Small catalogs are scored in full, so the index gives the same top N"""
+        resume_skills = ["python", "django", "sql"]
+        job_index = recommender.JobIndex.from_database(self.JD_DATABASE)
+        self.assertEqual(
+            recommender.recommend_jobs(resume_skills, job_index, top_n=3),
+            recommender.recommend_jobs(resume_skills, self.JD_DATABASE, top_n=3),
+        )
+
+    def test_job_index_add_and_remove(self):
+        job_index = recommender.JobIndex(shortlist_size=2)
+        job_index.add_many(self.JD_DATABASE)
+        job_index.add("Python_Developer.txt", ["python", "django"])
+        job_index.remove("Designer.txt")
+
+        self.assertEqual(len(job_index), 4)
+        self.assertNotIn("Designer.txt", job_index)
+        top = job_index.recommend(["python", "django"], top_n=1)
+        self.assertEqual(top, [{"job_title": "Python_Developer", "match_score": 100.0}])
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+class SkillSimilarityTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        overrides = self.settings(SKILL_SIMILARITY_DIR=cache_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.store = EmbeddingStore(cache_dir, "test-model", "v1")
+        patches = [mock.patch.object(semantic_matcher, "_store", self.store),
+                   mock.patch.dict(skill_similarity._MATRIX, matrix=None, version=None)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_matrix_of_other_vectors_is_rebuilt(self):
+        taxonomy = skill_extractor.get_skill_taxonomy()
+        skill_similarity.build_similarity_matrix(log=lambda msg: None)
+        # The store now holds the model's own vector for a skill, unlike the saved matrix
+        self.store.put_many(["python"], np.ones((1, 4), dtype=np.float32))
+
+        with mock.patch.object(skill_similarity, "build_similarity_matrix",
+                               wraps=skill_similarity.build_similarity_matrix) as build, \
+                self.assertLogs("scanner.skill_similarity", "WARNING"):
+            similarity = skill_similarity.get_similarity_matrix()
+        build.assert_called_once()
+        self.assertEqual(similarity.skills, taxonomy.skill_list)
+
+    def test_matrix_of_another_model_is_not_current(self):
+        similarity = skill_similarity.build_similarity_matrix(log=lambda msg: None)
+        self.assertTrue(similarity.is_current(similarity.skills))
+        similarity.model = "other-model:v0"
+        self.assertFalse(similarity.is_current(similarity.skills))
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+class JDIndexTests(TestCase):
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.index_dir = tempfile.mkdtemp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir, True)
+        self.addCleanup(shutil.rmtree, self.index_dir, True)
+        self.addCleanup(shutil.rmtree, cache_dir, True)
+        # The build also writes the similarity matrix: never next to the real one
+        overrides = self.settings(JD_INDEX_DIR=self.index_dir,
+                                  SKILL_SIMILARITY_DIR=os.path.join(cache_dir, "skill_similarity"),
+                                  EMBEDDING_CACHE_DIR=os.path.join(cache_dir, "embeddings"))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.write_jd("Backend.txt", "Python, Django and PostgreSQL behind Docker.")
+        self.write_jd("Frontend.txt", "React and JavaScript, some HTML and CSS.")
+
+    def write_jd(self, filename, text):
+        with open(os.path.join(self.source_dir, filename), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def build(self):
+        return jd_index.build_jd_index(self.source_dir, self.index_dir, log=lambda msg: None)
+
+    def test_rebuild_only_extracts_changed_files(self):
+        self.assertEqual(self.build()["extracted"], 2)
+
+        self.write_jd("Frontend.txt", "React, TypeScript and CSS.")
+        self.write_jd("Data.txt", "Pandas and SQL.")
+        os.remove(os.path.join(self.source_dir, "Backend.txt"))
+        counts = self.build()
+        self.assertEqual((counts["extracted"], counts["reused"], counts["removed"]), (2, 0, 1))
+
+        self.assertEqual(self.build()["reused"], 2)
+
+    def test_index_from_artifact_matches_parsed_directory(self):
+        self.build()
+        artifact = jd_index.open_artifact(self.index_dir)
+        database = recommender.load_sample_jds(self.source_dir)
+
+        self.assertEqual(artifact.skill_database(), database)
+        resume_skills = ["python", "react", "css"]
+        self.assertEqual(
+            recommender.JobIndex.from_artifact(artifact).recommend(resume_skills),
+            recommender.recommend_jobs(resume_skills, database),
+        )
+
+
+class ModelRegistryTests(TestCase):
+    def test_models_load_once_on_first_use(self):
+        calls = []
+        registry = ModelRegistry()
+        registry.register("fake", lambda: calls.append(1) or "model")
+
+        self.assertFalse(registry.is_loaded("fake"))
+        self.assertEqual(registry.get("fake"), "model")
+        self.assertEqual(registry.get("fake"), "model")
+        self.assertEqual(len(calls), 1)
+
+        stats = registry.stats()["fake"]
+        self.assertTrue(stats["loaded"])
+        self.assertIn("load_seconds", stats)
+        self.assertIn("rss_delta_bytes", stats)
+
+    def test_non_scan_pages_do_not_load_models(self):
+        """The about page renders without pulling in spaCy or SBERT"""
+        with mock.patch.object(model_registry.registry, "get", side_effect=AssertionError("model loaded")):
+            response = self.client.get('/about/')
+        self.assertEqual(response.status_code, 200)
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+@mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")
+@mock.patch("scanner.parser.extract_names", lambda texts, **kwargs: ["Jane Doe"] * len(texts))
+class BatchScanTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+
+    def test_batch_endpoint_ranks_and_saves_every_resume(self):
+        strong = SimpleUploadedFile("strong.txt", b"jane@example.com\nSkills: Python, Django, Docker")
+        weak = SimpleUploadedFile("weak.txt", b"jane@example.com\nSkills: Photoshop")
+
+        response = self.client.post('/batch/', {
+            'resumes': [weak, strong],
+            'jd_text': "Python developer with Django and Docker.",
+            'format': 'csv',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["resume_filename"] for row in rows], ["strong.txt", "weak.txt"])
+        self.assertEqual(rows[0]["rank"], "1")
+        self.assertEqual(ScanHistory.objects.filter(user=self.user).count(), 2)
+
+    def post_batch(self, *files):
+        return self.client.post('/batch/', {'resumes': list(files), 'jd_text': "Python developer.", 'format': 'csv'})
+
+    def test_zip_bomb_is_refused(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("bomb.txt", b"0" * (8 * 1024 * 1024))
+        response = self.post_batch(SimpleUploadedFile("resumes.zip", buffer.getvalue()))
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(ScanHistory.objects.exists())
+
+    @override_settings(BATCH_MAX_FILES=2)
+    def test_too_many_resumes_are_refused(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("a.txt", b"Skills: Python")
+            archive.writestr("b.txt", b"Skills: Python")
+        response = self.post_batch(SimpleUploadedFile("c.txt", b"Skills: Python"),
+                                   SimpleUploadedFile("resumes.zip", buffer.getvalue()))
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(BATCH_INLINE_MAX=1)
+    @mock.patch("scanner.jobs.pool.wake", lambda: None)
+    def test_large_batch_is_queued(self):
+        response = self.post_batch(SimpleUploadedFile("weak.txt", b"Skills: Photoshop"),
+                                   SimpleUploadedFile("strong.txt", b"Skills: Python, Django"))
+        job = ScanJob.objects.get()
+        self.assertEqual(job.kind, ScanJob.BATCH)
+        self.assertRedirects(response, f'/jobs/{job.token}/', fetch_redirect_response=False)
+        self.assertFalse(ScanHistory.objects.exists())
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertContains(self.client.get(f'/jobs/{job.token}/'), "2 resumes ranked")
+        response = self.client.get(f'/jobs/{job.token}/', {'download': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([row["resume_filename"] for row in rows], ["strong.txt", "weak.txt"])
+        self.assertEqual(ScanHistory.objects.filter(user=self.user).count(), 2)
+
+
+@override_settings(SCAN_ASYNC=True, SCAN_QUEUE_MAX=2)
+@mock.patch("scanner.jobs.pool.wake", lambda: None)
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+@mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")
+class ScanJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+
+    def upload(self, name="resume.txt"):
+        return self.client.post('/', {
+            'resume': SimpleUploadedFile(name, b"jane@example.com\nSkills: Python, Django"),
+            'jd_text': "Python developer with Django.",
+        })
+
+    def test_upload_is_queued_then_processed(self):
+        response = self.upload()
+        job = ScanJob.objects.get()
+        self.assertRedirects(response, f'/jobs/{job.token}/', fetch_redirect_response=False)
+        self.assertEqual(self.client.get(f'/jobs/{job.token}/?format=json').json()["status"], ScanJob.QUEUED)
+
+        self.assertEqual(jobs.run_pending(), 1)
+
+        status = self.client.get(f'/jobs/{job.token}/?format=json').json()
+        self.assertEqual(status["status"], ScanJob.DONE)
+        self.assertEqual(ScanHistory.objects.get().pk, status["scan_id"])
+        self.assertContains(self.client.get(f'/jobs/{job.token}/'), "Jane Doe")
+        self.assertEqual(bytes(ScanJob.objects.get().resume_data), b"")
+
+    def test_full_queue_is_rejected(self):
+        self.upload("a.txt")
+        self.upload("b.txt")
+        response = self.upload("c.txt")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(ScanJob.objects.count(), 2)
+
+    @override_settings(PDF_MAX_BYTES=100)
+    def test_oversized_upload_is_not_queued(self):
+        response = self.client.post('/', {
+            'resume': SimpleUploadedFile("resume.pdf", b"%PDF" + b"x" * 500),
+            'jd_text': "Python developer with Django.",
+        })
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(ScanJob.objects.exists())
+
+    def test_other_users_cannot_see_a_job(self):
+        self.upload()
+        job = ScanJob.objects.get()
+        User.objects.create_user(username='other', password='password123')
+        self.client.login(username='other', password='password123')
+        self.assertEqual(self.client.get(f'/jobs/{job.token}/').status_code, 404)
+
+    def test_anonymous_jobs_are_not_reachable_by_id(self):
+        self.client.logout()
+        self.upload()
+        job = ScanJob.objects.get()
+        self.assertIsNone(job.user_id)
+        self.assertEqual(self.client.get(f'/jobs/{job.pk}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/jobs/{uuid.uuid4()}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/jobs/{job.token}/').status_code, 200)
+
+    @override_settings(SCAN_JOB_TIMEOUT=300, SCAN_JOB_MAX_ATTEMPTS=3)
+    def test_only_jobs_without_a_heartbeat_are_requeued(self):
+        now = timezone.now()
+        long_ago = now - timedelta(hours=1)
+
+        def running(name, heartbeat_at, attempts=1):
+            return ScanJob.objects.create(resume_filename=name, resume_data=b"x", status=ScanJob.RUNNING,
+                                          started_at=long_ago, heartbeat_at=heartbeat_at, attempts=attempts)
+
+        alive = running("long batch", now)
+        lost = running("lost", long_ago)
+        crashing = running("kills its worker", long_ago, attempts=3)
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        statuses = dict(ScanJob.objects.values_list("resume_filename", "status"))
+        self.assertEqual(statuses, {alive.resume_filename: ScanJob.RUNNING, lost.resume_filename: ScanJob.QUEUED,
+                                    crashing.resume_filename: ScanJob.FAILED})
+        self.assertEqual(bytes(ScanJob.objects.get(pk=crashing.pk).resume_data), b"")
+
+    def test_runs_are_counted(self):
+        self.upload()
+        jobs.run_pending()
+        job = ScanJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (ScanJob.DONE, 1))
+
+
+def make_pdf(path, pages):
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path)
+    for text in pages:
+        pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+
+
+class PDFExtractorTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "resume.pdf")
+        make_pdf(self.path, [f"Page {i} Python" for i in range(6)])
+
+    def test_pages_are_streamed_in_order(self):
+        self.assertEqual(list(extractor.iter_pdf_pages(self.path, parallel=False)),
+                         [f"Page {i} Python" for i in range(6)])
+
+    @override_settings(PDF_WORKERS=3, PDF_PARALLEL_MIN_PAGES=2)
+    def test_parallel_extraction_matches_sequential(self):
+        self.assertEqual(extractor.extract_text(self.path),
+                         extractor.extract_text(self.path, parallel=False))
+
+    @override_settings(PDF_MAX_PAGES=2)
+    def test_page_limit(self):
+        self.assertEqual(extractor.extract_text(self.path), "Page 0 Python\nPage 1 Python")
+
+    @override_settings(PDF_MAX_BYTES=100)
+    def test_oversized_file_is_not_read(self):
+        with self.assertRaises(extractor.PDFTooLarge):
+            next(extractor.iter_pdf_pages(self.path))
+        self.assertEqual(extractor.extract_text(self.path), "")
+
+    def test_bytes_and_file_sources(self):
+        with open(self.path, "rb") as f:
+            data = f.read()
+        expected = extractor.extract_text(self.path)
+        self.assertEqual(extractor.extract_text(data, "resume.pdf"), expected)
+        self.assertEqual(extractor.extract_text(io.BytesIO(data), "resume.pdf"), expected)
+        self.assertEqual(extractor.extract_text(b"  Python  ", "resume.txt"), "Python")
+
+    @override_settings(PDF_WORKERS=3, PDF_PARALLEL_MIN_PAGES=2)
+    def test_parallel_extraction_from_memory(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(extractor.extract_text(f.read(), "resume.pdf"),
+                             extractor.extract_text(self.path, parallel=False))
+
+    @override_settings(PDF_WORKERS=4, PDF_PARALLEL_MIN_PAGES=2, PDF_PAGE_TIMEOUT=2)
+    def test_readers_left_without_a_range_are_not_waited_on(self):
+        # 6 pages over 4 readers is 3 ranges of 2
+        readers = extractor._ReaderPool()
+        self.addCleanup(readers.close)
+        with mock.patch.object(extractor, "_readers", readers), self.assertNoLogs("scanner.extractor", "WARNING"):
+            start = time.monotonic()
+            self.assertEqual(extractor.extract_text(self.path), extractor.extract_text(self.path, parallel=False))
+            self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(readers._idle), readers._count)
+
+    def test_early_stop(self):
+        self.assertEqual(extractor.extract_text_from_pdf(self.path, stop_after_chars=20),
+                         "Page 0 Python\nPage 1 Python")
+
+    @override_settings(PDF_PAGE_TIMEOUT=0.5, PDF_WORKERS=1)
+    def test_stuck_page_kills_its_reader(self):
+        def stuck_on_page_2(page):
+            text = page.extract_text()
+            if "Page 2" in text:
+                time.sleep(60)
+            return text
+
+        # Fresh readers, forked with the slow page reader in place
+        readers = extractor._ReaderPool()
+        self.addCleanup(readers.close)
+        with mock.patch.object(extractor, "_readers", readers), \
+                mock.patch.object(extractor, "_page_text", stuck_on_page_2):
+            start = time.monotonic()
+            self.assertEqual(extractor.extract_text(self.path), "Page 0 Python\nPage 1 Python")
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(readers._count, 0)
+            # A new reader takes its place
+            self.assertEqual(extractor.extract_text(self.path, "resume.pdf").count("Python"), 2)
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+@mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")
+class UploadTests(TestCase):
+    def scan(self, size):
+        content = b"jane@example.com\nSkills: Python, Django\n" + b" " * size
+        return self.client.post('/', {
+            'resume': SimpleUploadedFile("resume.txt", content),
+            'jd_text': "Python developer with Django.",
+        })
+
+    def test_small_upload_is_scanned_from_memory(self):
+        before = dict(pipeline.UPLOAD_STATS)
+        with mock.patch("django.core.files.storage.FileSystemStorage.save") as save:
+            response = self.scan(10)
+        save.assert_not_called()
+        self.assertContains(response, "Jane Doe")
+        self.assertEqual(pipeline.UPLOAD_STATS["in_memory"], before["in_memory"] + 1)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_large_upload_is_scanned_from_the_spooled_file(self):
+        before = dict(pipeline.UPLOAD_STATS)
+        response = self.scan(1000)
+        self.assertContains(response, "Jane Doe")
+        self.assertEqual(pipeline.UPLOAD_STATS["spooled"], before["spooled"] + 1)
+
+
+class ScanCacheTests(TestCase):
+    def test_lru_eviction_and_hit_rate(self):
+        cache = ScanCache(max_entries=2)
+        cache.set("text", "a", "A")
+        cache.set("text", "b", "B")
+        cache.get("text", "a")
+        cache.set("text", "c", "C")
+        self.assertIsNone(cache.get("text", "b"))
+        self.assertEqual(cache.get("text", "a"), "A")
+        self.assertEqual(cache.stats()["text"], {"hits": 2, "misses": 1, "hit_rate": 0.667, "size": 2})
+
+    def test_backend_persistence(self):
+        from django.core.cache.backends.locmem import LocMemCache
+
+        backend = LocMemCache("scan-cache-test", {})
+        ScanCache(backend=backend).set("skills", "k", ["python"])
+        self.assertEqual(ScanCache(backend=backend).get("skills", "k"), ["python"])
+
+    @mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+    @mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+    @mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")
+    def test_repeat_scan_skips_extraction_and_models(self):
+        get_scan_cache().clear()
+        resume = b"jane@example.com\nSkills: Python, Django"
+        first = pipeline.cached_analysis(resume, "resume.txt", "Python developer with Django.")
+
+        with mock.patch("scanner.extractor.extract_text") as extract, \
+                mock.patch("scanner.parser.parse_basic_info") as parse, \
+                mock.patch("scanner.semantic_matcher.embed_skills") as embed:
+            again = pipeline.cached_analysis(resume, "resume.txt", "python developer   with DJANGO.")
+        extract.assert_not_called()
+        parse.assert_not_called()
+        embed.assert_not_called()
+        self.assertEqual(again, first)
+
+        # A new JD reuses the resume's text, basic info and skills
+        with mock.patch("scanner.extractor.extract_text") as extract:
+            other = pipeline.cached_analysis(resume, "resume.txt", "Django and Docker.")
+        extract.assert_not_called()
+        self.assertEqual(other["resume_skills"], first["resume_skills"])
+
+    @mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+    @mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+    def test_new_name_extractor_is_not_served_old_analyses(self):
+        get_scan_cache().clear()
+        resume = b"Jane Doe\njane@example.com\nSkills: Python"
+        with mock.patch("scanner.parser.extract_name", lambda text: "Old Heuristic"):
+            pipeline.cached_analysis(resume, "resume.txt", "Python developer.")
+        with mock.patch.object(name_extractor, "VERSION", "next"), \
+                mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe"):
+            analysis = pipeline.cached_analysis(resume, "resume.txt", "Python developer.")
+        self.assertEqual(analysis["basic_info"]["name"], "Jane Doe")
+
+    def test_sources_are_hashed_like_their_bytes(self):
+        data = b"jane@example.com\n" * 500
+        with tempfile.NamedTemporaryFile(suffix=".txt") as f:
+            f.write(data)
+            f.flush()
+            for source in (data, f.name, f, io.BytesIO(data)):
+                self.assertEqual(extractor.hash_source(source, chunk_size=1000), hash_bytes(data))
+
+    @override_settings(PDF_MAX_BYTES=100)
+    @mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+    @mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+    @mock.patch("scanner.parser.extract_name")
+    def test_oversized_upload_is_never_read(self, extract_name):
+        class Unreadable(io.BytesIO):
+            def read(self, *args):
+                raise AssertionError("read")
+
+        analysis = pipeline.cached_analysis(Unreadable(b"%PDF" + b"x" * 500), "resume.pdf", "Python developer.")
+        self.assertEqual(analysis["resume_skills"], [])
+        self.assertIsNone(analysis["basic_info"]["name"])
+        extract_name.assert_not_called()
+
+
+class StoredRecommendationsTests(TestCase):
+    def setUp(self):
+        for patcher in [mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills),
+                        mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix),
+                        mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job_index = recommender.JobIndex.from_database({
+            "Backend Developer.txt": ["python", "django", "sql"],
+            "Designer.txt": ["photoshop", "figma"],
+        })
+        patcher = mock.patch("scanner.jd_index.get_job_index", return_value=self.job_index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scan_stores_recommendations_with_catalog_version(self):
+        context = pipeline.run_scan(b"Skills: Python, Django", "resume.txt", "Python and Django.")
+        scan = ScanHistory.objects.get(pk=context["scan_id"])
+        self.assertEqual(scan.recommendations, context["jobs"])
+        self.assertEqual(scan.recommendations_version, self.job_index.version)
+
+        with mock.patch("scanner.recommender.recommend_jobs") as recommend:
+            response = self.client.get(f'/history/{scan.pk}/')
+        recommend.assert_not_called()
+        self.assertEqual(response.context["jobs"], scan.recommendations)
+
+    def test_refresh_recommends_from_the_same_skills_as_the_scan(self):
+        # Only Django matches the JD, but the resume's Figma counts for recommendations too
+        context = pipeline.run_scan(b"Skills: Django, Figma", "resume.txt", "Django developer.")
+        scan = ScanHistory.objects.get(pk=context["scan_id"])
+        self.assertEqual(scan.resume_skills, ["django", "figma"])
+        self.assertEqual(scan.matched_skills, ["django"])
+
+        pipeline.refresh_recommendations(scan.pk)
+        scan.refresh_from_db()
+        self.assertEqual(scan.recommendations, context["jobs"])
+
+    def test_stale_rows_are_refreshed_in_the_background(self):
+        scan = ScanHistory.objects.create(resume_filename="old.txt", ats_score=50,
+                                          matched_skills=["python"], recommendations=[{"job_title": "Gone"}],
+                                          recommendations_version="old")
+        with mock.patch("scanner.pipeline.schedule_refresh") as schedule:
+            self.assertEqual(pipeline.stored_recommendations(scan), [{"job_title": "Gone"}])
+        schedule.assert_called_once_with(scan.pk)
+
+        pipeline.refresh_recommendations(scan.pk)
+        scan.refresh_from_db()
+        self.assertEqual(scan.recommendations_version, self.job_index.version)
+        self.assertEqual(scan.recommendations[0]["job_title"], "Backend Developer")
+
+    def test_catalog_version_changes_with_the_catalog(self):
+        version = self.job_index.version
+        self.job_index.add("Data Engineer.txt", ["python", "spark"])
+        self.assertNotEqual(self.job_index.version, version)
+
+
+class ReportTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_patch = override_settings(REPORT_CACHE_DIR=self.tmp, REPORT_WORKERS=2)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        # The stored recommendations are current
+        patcher = mock.patch("scanner.jd_index.get_job_index", return_value=mock.Mock(version="v1"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+        self.scans = [
+            ScanHistory.objects.create(user=self.user, candidate_name=name, resume_filename=f"{name}.pdf",
+                                       ats_score=70, matched_skills=["python"], missing_skills=["docker"],
+                                       recommendations=[{"job_title": "Backend Developer", "match_score": 80}],
+                                       recommendations_version="v1")
+            for name in ["Jane Doe", "John Roe"]
+        ]
+
+    def test_report_is_rendered_once_and_revalidated(self):
+        url = f'/history/{self.scans[0].pk}/download/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        etag = response['ETag']
+
+        with mock.patch("scanner.reports.render_pdf") as render_pdf:
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        render_pdf.assert_not_called()
+
+    def test_report_of_scan_saved_before_stored_recommendations(self):
+        # The first download computes the recommendations, which changes the report key
+        scan = self.scans[0]
+        ScanHistory.objects.filter(pk=scan.pk).update(recommendations=[], recommendations_version="")
+        jobs = [{"job_title": "Data Engineer", "match_score": 75}]
+        with mock.patch("scanner.recommender.recommend_jobs", return_value=jobs):
+            response = self.client.get(f'/history/{scan.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+        scan.refresh_from_db()
+        self.assertEqual(scan.recommendations_version, "v1")
+        self.assertEqual(response['ETag'], f'"{reports.report_key(scan)}"')
+
+    def test_export_zip_has_every_report(self):
+        response = self.client.get('/history/export/')
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            names = archive.namelist()
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all(name.endswith(".pdf") for name in names))
+
+
+class HistoryPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+        for i in range(5):
+            ScanHistory.objects.create(user=self.user, candidate_name=f"Candidate {i}",
+                                       resume_filename=f"{i}.pdf", ats_score=50)
+        # Same timestamp for everyone: ties are broken by id
+        ScanHistory.objects.update(scan_date=ScanHistory.objects.first().scan_date)
+
+    @override_settings(HISTORY_PAGE_SIZE=2)
+    def test_pages_walk_every_scan_once(self):
+        seen, cursor = [], None
+        while True:
+            response = self.client.get('/history/', {'cursor': cursor} if cursor else {})
+            # Only the first page pays for the count
+            self.assertEqual(response.context['total'], None if cursor else 5)
+            seen += [scan.candidate_name for scan in response.context['scans']]
+            cursor = response.context['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [f"Candidate {i}" for i in reversed(range(5))])
+
+    def test_list_skips_json_columns(self):
+        scan = self.client.get('/history/').context['scans'][0]
+        self.assertEqual(scan.get_deferred_fields() & {'matched_skills', 'missing_skills', 'recommendations'},
+                         {'matched_skills', 'missing_skills', 'recommendations'})
+
+
+class SkillSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+        people = {
+            "Ops": (["kubernetes", "terraform", "aws"], ["python"]),
+            "Half Ops": (["kubernetes"], ["terraform"]),
+            "Dev": (["python", "gcp"], ["kubernetes"]),
+        }
+        scans = [ScanHistory.objects.create(user=self.user, candidate_name=name, resume_filename="r.pdf",
+                                            ats_score=50, matched_skills=matched, missing_skills=missing)
+                 for name, (matched, missing) in people.items()]
+        skill_search.sync_scan_skills(scans)
+
+    def names(self, **kwargs):
+        return sorted(skill_search.search_scans(**kwargs).values_list("candidate_name", flat=True))
+
+    def test_and_or_queries(self):
+        self.assertEqual(self.names(all_skills=["kubernetes", "Terraform"]), ["Ops"])
+        self.assertEqual(self.names(any_skills=["aws", "gcp"]), ["Dev", "Ops"])
+        self.assertEqual(self.names(all_skills=["kubernetes"], any_skills=["aws", "gcp"]), ["Ops"])
+        self.assertEqual(self.names(all_skills=["kubernetes"], matched=False), ["Dev"])
+
+    def test_sync_replaces_rows(self):
+        scan = ScanHistory.objects.get(candidate_name="Dev")
+        scan.matched_skills = ["rust"]
+        skill_search.sync_scan_skills([scan])
+        self.assertEqual(ScanSkill.objects.filter(scan=scan, matched=True).count(), 1)
+
+    def test_search_endpoint(self):
+        response = self.client.get('/candidates/search/', {'all': 'kubernetes', 'any': 'aws,gcp'})
+        self.assertEqual([row['candidate_name'] for row in response.json()['results']], ["Ops"])
+        self.assertEqual(self.client.get('/candidates/search/').status_code, 400)
+        self.assertEqual(self.client.get('/candidates/search/', {'all': 'aws', 'since': 'soon'}).status_code, 400)
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+class CandidateRankerTests(TestCase):
+    def test_scores_match_semantic_skill_match(self):
+        import random
+
+        rng = random.Random(1)
+        skills = ["python", "django", "flask", "sql", "postgresql", "docker", "kubernetes", "aws", "react", "java"]
+        candidates = [rng.sample(skills, rng.randint(1, 5)) for _ in range(40)]
+        jd_skills = ["python", "docker", "aws", "go"]
+
+        index = candidate_ranker.CandidateIndex(list(range(100, 140)), candidates, vocab=skills)
+        ranked = index.rank(jd_skills, top_k=40)
+
+        expected = {}
+        for scan_id, resume_skills in zip(range(100, 140), candidates):
+            match_scores = semantic_matcher.semantic_skill_match(resume_skills, jd_skills)["match_scores"]
+            if match_scores:
+                similarities = [match["score"] for match in match_scores.values()]
+                expected[scan_id] = scorer.combine_scores(
+                    len(match_scores) / len(jd_skills), sum(similarities) / len(similarities))["score"]
+        self.assertEqual(len(ranked), len(expected))
+        for row in ranked:
+            self.assertAlmostEqual(row["score"], expected[row["scan_id"]], places=1)
+        self.assertEqual([row["score"] for row in ranked], sorted((row["score"] for row in ranked), reverse=True))
+
+    def test_rank_endpoint(self):
+        user = User.objects.create_user(username='recruiter', password='password123')
+        self.client.login(username='recruiter', password='password123')
+        scans = [ScanHistory.objects.create(user=user, candidate_name=name, resume_filename="r.pdf", ats_score=50,
+                                            matched_skills=matched)
+                 for name, matched in [("Ops", ["docker", "aws"]), ("Dev", ["react"])]]
+        skill_search.sync_scan_skills(scans)
+
+        response = self.client.get('/candidates/rank/', {'jd_text': "Docker and AWS engineer", 'top': 5})
+        self.assertEqual(response.json()['results'][0]['candidate_name'], "Ops")
+
+    def test_candidates_are_found_by_skills_outside_their_first_jd(self):
+        user = User.objects.create_user(username='recruiter')
+        # Scanned against a Python JD: Kubernetes was on the resume but never matched
+        ScanHistory.objects.create(user=user, candidate_name="Ops", resume_filename="r.pdf", ats_score=50,
+                                   matched_skills=["python"], resume_skills=["kubernetes", "python"])
+        ScanHistory.objects.create(user=user, candidate_name="Legacy", resume_filename="r.pdf", ats_score=50,
+                                   matched_skills=["kubernetes"])
+
+        index = candidate_ranker.CandidateIndex.from_scans(ScanHistory.objects.filter(user=user))
+        names = ScanHistory.objects.in_bulk([row["scan_id"] for row in index.rank(["kubernetes"])])
+        self.assertEqual({scan.candidate_name for scan in names.values()}, {"Ops", "Legacy"})
+
+    @override_settings(CANDIDATE_INDEX_CACHE_SIZE=2)
+    def test_index_cache_keeps_the_most_recent_users(self):
+        users = [User.objects.create_user(username=f"recruiter{i}") for i in range(3)]
+        with mock.patch.dict(candidate_ranker._INDEXES, clear=True):
+            for user in [users[0], users[1], users[0], users[2]]:
+                candidate_ranker.get_candidate_index(user)
+            self.assertEqual(list(candidate_ranker._INDEXES), [users[0].pk, users[2].pk])
+
+    def test_index_build_does_not_hold_the_cache_lock(self):
+        user = User.objects.create_user(username='recruiter')
+        building = []
+
+        def from_scans(scans):
+            building.append(candidate_ranker._INDEXES_LOCK.locked())
+            return candidate_ranker.CandidateIndex([], [])
+
+        with mock.patch.dict(candidate_ranker._INDEXES, clear=True), \
+                mock.patch.object(candidate_ranker.CandidateIndex, "from_scans", from_scans):
+            candidate_ranker.get_candidate_index(user)
+        self.assertEqual(building, [False])
+
+
+class SkillSimilarityTests(TestCase):
+    SKILLS = ["python", "django", "flask", "sql", "docker", "aws"]
+
+    def setUp(self):
+        with mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills):
+            self.similarity = SimilarityMatrix.build(self.SKILLS)
+
+    def test_scores_match_cosine_similarity(self):
+        vectors = semantic_matcher.normalize(fake_embed_skills(self.SKILLS))
+        np.testing.assert_allclose(self.similarity.matrix, vectors @ vectors.T, atol=1e-5)
+
+        scores = self.similarity.scores(["aws", "python"], ["django", "aws", "sql"])
+        np.testing.assert_allclose(scores, self.similarity.matrix[np.ix_([5, 0], [1, 5, 3])])
+
+    def test_neighbors_are_thresholded_and_sorted(self):
+        for i, skill in enumerate(self.SKILLS):
+            neighbors = self.similarity.neighbors(skill)
+            self.assertEqual(neighbors[0], skill)
+            row = [self.similarity.matrix[i, self.similarity.index[other]] for other in neighbors]
+            self.assertEqual(row, sorted(row, reverse=True))
+            self.assertEqual(set(neighbors), {other for j, other in enumerate(self.SKILLS)
+                                              if self.similarity.matrix[i, j] >= 0.70})
+        self.assertEqual(self.similarity.neighbors("cobol"), [])
+
+    def test_unknown_skills_fall_back_to_embeddings(self):
+        with mock.patch("scanner.semantic_matcher.embed_skills", side_effect=fake_embed_skills) as embed:
+            scores = self.similarity.scores(["python", "cobol"], ["django"])
+        embed.assert_called_once_with(["cobol"])
+        vectors = semantic_matcher.normalize(fake_embed_skills(["python", "cobol", "django"]))
+        np.testing.assert_allclose(scores, vectors[:2] @ vectors[2:].T, atol=1e-5)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "matrix.npz")
+            self.similarity.save(path)
+            loaded = SimilarityMatrix.load(path)
+        self.assertEqual(loaded.skills, self.SKILLS)
+        np.testing.assert_array_equal(loaded.matrix, self.similarity.matrix)
+        self.assertEqual(loaded.neighbors("python"), self.similarity.neighbors("python"))
+
+
+class EncoderBackendTests(TestCase):
+    def test_backend_is_passed_to_sentence_transformers(self):
+        with mock.patch("sentence_transformers.SentenceTransformer") as model_class, \
+                self.settings(SBERT_ONNX_FILE="onnx/model_qint8_avx512_vnni.onnx"):
+            semantic_matcher.load_encoder("onnx")
+        self.assertEqual(model_class.call_args.kwargs["backend"], "onnx")
+        self.assertEqual(model_class.call_args.kwargs["model_kwargs"],
+                         {"file_name": "onnx/model_qint8_avx512_vnni.onnx"})
+
+        with self.assertRaises(ImproperlyConfigured):
+            semantic_matcher.load_encoder("fp16")
+        # Vectors of different backends never share a cache
+        versions = {semantic_matcher.model_version(backend) for backend in semantic_matcher.BACKENDS}
+        self.assertEqual(len(versions), len(semantic_matcher.BACKENDS))
+
+    def test_decision_parity(self):
+        reference = fake_embed_skills(["python", "django", "sql", "docker", "aws", "react"])
+        same = semantic_matcher.decision_parity(reference, reference.copy())
+        self.assertEqual((same["pairs"], same["flipped"], same["agreement"]), (15, 0, 1.0))
+
+        noisy = reference + np.random.default_rng(0).normal(0, 0.5, reference.shape).astype(np.float32)
+        parity = semantic_matcher.decision_parity(reference, noisy)
+        self.assertGreater(parity["max_abs_diff"], 0)
+        self.assertAlmostEqual(parity["agreement"], 1 - parity["flipped"] / 15)
+
+    @unittest.skipUnless(os.environ.get("SCANNER_MODEL_TESTS") == "1",
+                         "needs the real SBERT weights (set SCANNER_MODEL_TESTS=1)")
+    def test_quantized_backends_keep_fp32_match_decisions(self):
+        skills = skill_extractor.get_skill_taxonomy().skill_list
+        reference = semantic_matcher.load_encoder("torch").encode(skills, convert_to_numpy=True)
+        for backend in ("onnx", "int8"):
+            with self.subTest(backend=backend):
+                try:
+                    model = semantic_matcher.load_encoder(backend)
+                except ImportError as e:
+                    self.skipTest(f"{backend} backend not installed: {e}")
+                parity = semantic_matcher.decision_parity(reference, model.encode(skills, convert_to_numpy=True))
+                # Only pairs right at the threshold may flip
+                self.assertGreaterEqual(parity["agreement"], 0.999)
+                self.assertLessEqual(parity["max_flip_margin"], 0.02)
+
+
+class EncodeBatcherTests(TestCase):
+    def test_concurrent_requests_share_a_forward_pass(self):
+        calls = []
+
+        def encode(texts):
+            calls.append(list(texts))
+            return fake_embed_skills(texts)
+
+        batcher = EncodeBatcher(encode, max_batch=64, max_wait=0.2)
+        requests = [["python", "django"], ["sql"], ["python", "docker", "aws"]]
+        futures = [batcher.submit(texts) for texts in requests]
+        for texts, future in zip(requests, futures):
+            np.testing.assert_array_equal(future.result(timeout=5), fake_embed_skills(texts))
+
+        # One pass, duplicates encoded once
+        self.assertEqual(calls, [["python", "django", "sql", "docker", "aws"]])
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["requests"], stats["texts"]), (1, 3, 6))
+        self.assertLessEqual(stats["queue_delay_p99_ms"], 1000)
+
+    def test_full_batch_runs_without_waiting(self):
+        batcher = EncodeBatcher(fake_embed_skills, max_batch=2, max_wait=30)
+        vectors = batcher.submit(["python", "django", "sql"]).result(timeout=5)
+        self.assertEqual(vectors.shape, (3, 4))
+
+    def test_errors_reach_every_caller(self):
+        batcher = EncodeBatcher(mock.Mock(side_effect=RuntimeError("model crashed")), max_wait=0.05)
+        with self.assertLogs("scanner.encode_batcher", "ERROR"):
+            futures = [batcher.submit(["python"]), batcher.submit(["sql"])]
+            for future in futures:
+                with self.assertRaises(RuntimeError):
+                    future.result(timeout=5)
+
+
+class NameExtractorTests(TestCase):
+    def ner(self, person):
+        """A stand-in NER pipeline that finds `person` in every text it is given."""
+        seen = []
+
+        def nlp(text):
+            seen.append(text)
+            return mock.Mock(ents=[mock.Mock(label_="PERSON", text=person)] if person else [])
+
+        def pipe(texts, **kwargs):
+            return [nlp(text) for text in texts]
+
+        return seen, mock.Mock(side_effect=nlp, pipe=pipe)
+
+    def test_headings_and_places_are_left_to_ner(self):
+        # Title-case first lines that aren't names: NER decides, never the line itself
+        for first_line in ["Work History", "Machine Learning", "Bangalore India", "Jane Doe"]:
+            seen, nlp = self.ner("Ravi Kumar")
+            with mock.patch("scanner.name_extractor.get_nlp", return_value=nlp):
+                self.assertEqual(name_extractor.extract_name(f"{first_line}\nRavi Kumar\nPython"), "Ravi Kumar")
+            self.assertEqual(seen, [f"{first_line} Ravi Kumar Python"])
+
+        seen, nlp = self.ner(None)
+        with mock.patch("scanner.name_extractor.get_nlp", return_value=nlp):
+            self.assertIsNone(name_extractor.extract_name("Work History\nPython"))
+
+    def test_names_are_extracted_in_one_batch(self):
+        seen, nlp = self.ner("Ravi Kumar")
+        with mock.patch("scanner.name_extractor.get_nlp", return_value=nlp):
+            names = name_extractor.extract_names(["Work History\nPython", "RESUME\nRavi Kumar\t\n  Python"])
+        self.assertEqual(names, ["Ravi Kumar", "Ravi Kumar"])
+        # The whitespace-collapsed heads, through nlp.pipe (not one call each)
+        self.assertEqual(seen, ["Work History Python", "RESUME Ravi Kumar Python"])
+        nlp.assert_not_called()
+
+    def test_parse_basic_infos(self):
+        with mock.patch("scanner.parser.extract_names", return_value=["Jane Doe", None]):
+            infos = parser.parse_basic_infos(["Jane Doe\njane@example.com", "no name here"])
+        self.assertEqual(infos[0], {"name": "Jane Doe", "email": "jane@example.com", "phone": None})
+        self.assertIsNone(infos[1]["name"])
+
+
+class TextAnalyzerTests(TestCase):
+    RESUME = ("Jane Doe\njane@example.com | +91 98765 43210\n\nSKILLS\nPython, Django, Docker, JavaScript\n\n"
+              "Work Experience\nDeveloped REST APIs on AWS.\n\nEducation\nB.Tech, 2019\n")
+
+    def test_one_pass_matches_the_separate_scans(self):
+        taxonomy = skill_extractor.get_skill_taxonomy()
+        doc = text_analyzer.analyze(self.RESUME, taxonomy)
+
+        self.assertEqual(doc.skills, skill_extractor.extract_skills_from_text_regex(self.RESUME, taxonomy))
+        self.assertEqual(doc.normalized, parser.clean_text(self.RESUME))
+        self.assertEqual((doc.email, doc.phone), (parser.extract_email(doc.normalized),
+                                                  parser.extract_phone(doc.normalized)))
+        self.assertEqual(list(doc.sections), ["skills", "experience", "education"])
+        self.assertEqual(doc.action_verbs, ["developed"])
+        self.assertEqual(doc.section_text("experience"), "experience\ndeveloped rest apis on aws.\n\n")
+        self.assertEqual(doc.section_text("projects"), "")
+
+    def test_keywords_share_the_taxonomy_automaton(self):
+        taxonomy = skill_extractor.get_skill_taxonomy()
+        with mock.patch.object(taxonomy.matcher, "scan", wraps=taxonomy.matcher.scan) as scan:
+            text_analyzer.analyze(self.RESUME, taxonomy)
+        scan.assert_called_once()
+        # Keywords never leak into the skills
+        self.assertEqual(taxonomy.matcher.find_all("Developed projects; Python skills"), {"python"})
+
+    def test_suggestions_use_the_document(self):
+        doc = text_analyzer.analyze(self.RESUME)
+        tips = suggestions.generate_resume_suggestions(self.RESUME, {"name": "Jane Doe", "email": "x", "phone": "y"},
+                                                       doc.skills, doc=doc)
+        self.assertEqual(len(tips), 1)
+        self.assertIn("'Projects'", tips[0])
+
+
+@mock.patch("scanner.semantic_matcher.embed_skills", fake_embed_skills)
+@mock.patch("scanner.skill_similarity.get_similarity_matrix", fake_similarity_matrix)
+@mock.patch("scanner.parser.extract_name", lambda text: "Jane Doe")
+class TracingTests(TestCase):
+    def scan(self, body=b"jane@example.com\nSkills: Python, Django"):
+        get_scan_cache().clear()
+        with mock.patch("scanner.jd_index.get_job_index", return_value=recommender.JobIndex.from_database({})):
+            return self.client.post('/', {'resume': SimpleUploadedFile("resume.txt", body),
+                                          'jd_text': "Python developer with Django."})
+
+    def test_scan_response_has_server_timing_and_metrics(self):
+        tracing.metrics.reset()
+        response = self.scan()
+        timing = response["Server-Timing"]
+        for stage in ("extract", "basic_info", "match", "recommend", "db_insert", "total"):
+            self.assertIn(f"{stage};dur=", timing)
+        # Pages that run no stage get no header
+        self.assertFalse(self.client.get('/about/').has_header("Server-Timing"))
+
+        text = tracing.metrics.render()
+        self.assertIn('scan_stage_seconds_count{stage="extract"} 1', text)
+        self.assertIn('scan_request_seconds_count{view="home"} 1', text)
+
+    def test_failed_scan_is_counted_and_reported(self):
+        tracing.metrics.reset()
+        with mock.patch("scanner.recommender.recommend_jobs", side_effect=ValueError("broken")), \
+                self.assertLogs("scanner.tracing", "ERROR"):
+            response = self.scan()
+        self.assertContains(response, "could not scan this resume")
+        self.assertEqual(tracing.metrics.errors, {"recommend": 1, "scan": 1})
+
+    def test_metrics_endpoint_is_staff_only(self):
+        User.objects.create_user(username='recruiter', password='password123')
+        User.objects.create_user(username='admin', password='password123', is_staff=True)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.login(username='recruiter', password='password123')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        self.client.login(username='admin', password='password123')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE scan_stage_seconds histogram", response.content.decode())
+
+    def test_profiler_keeps_the_slowest_requests(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = tracing.SamplingProfiler(keep=2, interval=0.001, directory=tmp)
+            profiler.start(threading.get_ident())
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+            samples = profiler.stop(threading.get_ident())
+            self.assertTrue(any("test_profiler_keeps_the_slowest_requests" in stack for stack in samples))
+
+            for seconds in (0.3, 0.1, 0.5, 0.2):
+                profiler.record(seconds, "/", samples)
+            kept = sorted(os.listdir(tmp))
+            self.assertEqual([name.split("-")[0] for name in kept], ["0000300ms", "0000500ms"])
+            with open(os.path.join(tmp, kept[0]), encoding="utf-8") as f:
+                stack, count = f.readline().rsplit(" ", 1)
+            self.assertTrue(stack.count(";") > 0 and int(count) > 0)
+
+
+class BenchPipelineTests(TestCase):
+    def result(self, p50, docs_per_second, stages):
+        stats = lambda ms: {"count": 1, "p50": ms, "p95": ms, "p99": ms, "mean": ms}
+        return {"summary": {"end_to_end": stats(p50), "docs_per_second": docs_per_second,
+                            "stages": {stage: stats(ms) for stage, ms in stages.items()}}}
+
+    def test_regression_gate(self):
+        from scanner.management.commands.bench_pipeline import regressions
+
+        baseline = self.result(100, 10, {"extract": 60, "score": 0.2})
+        self.assertEqual(regressions(baseline, self.result(105, 9.6, {"extract": 64, "score": 0.9}), 0.10), [])
+
+        found = regressions(baseline, self.result(130, 7.5, {"extract": 80, "score": 0.2}), 0.10)
+        self.assertEqual([line.split(":")[0] for line in found],
+                         ["end-to-end p50 ms", "end-to-end p95 ms", "docs/s", "extract p50 ms"])
+
+
+class LoadTestTests(TestCase):
+    def test_multipart_body_is_parsed_by_django(self):
+        from django.core.files.uploadhandler import MemoryFileUploadHandler
+        from django.http.multipartparser import MultiPartParser
+        from scanner.management.commands.load_test import multipart_body
+
+        body, content_type = multipart_body({"jd_text": "Python developer"},
+                                            {"resume": ("cv.txt", b"Jane Doe\nPython")})
+        meta = {"CONTENT_TYPE": content_type, "CONTENT_LENGTH": str(len(body))}
+        post, files = MultiPartParser(meta, io.BytesIO(body), [MemoryFileUploadHandler()]).parse()
+        self.assertEqual(post["jd_text"], "Python developer")
+        self.assertEqual(files["resume"].name, "cv.txt")
+        self.assertEqual(files["resume"].read(), b"Jane Doe\nPython")
+
+    def test_arrivals(self):
+        from itertools import islice
+        from scanner.management.commands.load_test import arrivals
+
+        self.assertEqual(list(islice(arrivals(4), 4)), [0.0, 0.25, 0.5, 0.75])
+        offsets = list(islice(arrivals(10, poisson=True, seed=1), 2001))
+        self.assertEqual(offsets, list(islice(arrivals(10, poisson=True, seed=1), 2001)))
+        self.assertAlmostEqual(offsets[-1] / 2000, 0.1, delta=0.01)
+
+    def test_summary_counts_errors_and_latency_from_due_time(self):
+        from scanner.management.commands.load_test import summarize
+
+        samples = [
+            {"at": 0.0, "latency": 1.0, "service": 0.5, "outcome": "ok"},
+            {"at": 0.5, "latency": 2.0, "service": 1.0, "outcome": "ok"},
+            {"at": 1.0, "latency": 0.1, "service": 0.1, "outcome": "http_502"},
+            {"at": 1.5, "latency": 9.0, "service": 9.0, "outcome": "timeout"},
+        ]
+        result = summarize(samples, 4.0)
+        self.assertEqual(result["errors"], {"http_502": 1, "timeout": 1})
+        self.assertEqual(result["error_rate"], 0.5)
+        self.assertEqual(result["ok_per_second"], 0.5)
+        self.assertEqual(result["latency_ms"]["max"], 2000.0)
+        self.assertEqual(result["service_ms"]["max"], 1000.0)
+        self.assertEqual(result["ok_per_second_timeline"], [0, 1, 1, 0, 0])
@@ -0,0 +1,61 @@
+# backend/text_analyzer.py
+
+from . import parser
+from .skill_extractor import ACTION_VERBS, SECTION_KEYWORDS, get_skill_taxonomy
+
+
+class AnalyzedDocument:
+    """
+    Everything the scan needs from a resume's text, from one pass:
+
+    - `lower`       the lowercased text (offsets below refer to it)
+    - `normalized`  whitespace collapsed, as parser.clean_text
+    - `email`, `phone`
+    - `skills`      taxonomy skills found as whole words, sorted
+    - `sections`    {section: offset of its first header word}, in text order
+    - `action_verbs` the ACTION_VERBS that occur
+
+    parser, skill_extractor and suggestions all read from it instead of
+    each lowercasing and scanning the text again.
+    """
+
+    def __init__(self, text: str, lower: str, normalized: str, skills: list, keyword_offsets: dict):
+        self.text = text
+        self.lower = lower
+        self.normalized = normalized
+        self.skills = skills
+
+        self.email = parser.extract_email(normalized)
+        self.phone = parser.extract_phone(normalized)
+
+        sections = {}
+        for section, words in SECTION_KEYWORDS.items():
+            offsets = [keyword_offsets[word] for word in words if word in keyword_offsets]
+            if offsets:
+                sections[section] = min(offsets)
+        self.sections = dict(sorted(sections.items(), key=lambda item: item[1]))
+        self.action_verbs = [verb for verb in ACTION_VERBS if verb in keyword_offsets]
+
+    def has_section(self, section: str) -> bool:
+        return section in self.sections
+
+    def section_text(self, section: str) -> str:
+        """Lowercased text from the section's header to the next section's ("" if absent)."""
+        start = self.sections.get(section)
+        if start is None:
+            return ""
+        later = [offset for offset in self.sections.values() if offset > start]
+        return self.lower[start:min(later) if later else len(self.lower)]
+
+
+def analyze(text: str, taxonomy=None) -> AnalyzedDocument:
+    """Lowercases and scans `text` once; see AnalyzedDocument."""
+    text = text or ""
+    if taxonomy is None:
+        taxonomy = get_skill_taxonomy()
+    lower = text.lower()
+    # The taxonomy's own automaton also reports the section and action-verb keywords
+    skills, keyword_offsets = taxonomy.matcher.scan(lower)
+    # Same as parser.clean_text, in one copy
+    normalized = " ".join(text.split())
+    return AnalyzedDocument(text, lower, normalized, sorted(skills), keyword_offsets)
@@ -0,0 +1,310 @@
+# backend/tracing.py
+
+import contextvars
+import heapq
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .model_registry import current_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets: seconds for wall time, bytes for memory deltas
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (0, 2**20, 4 * 2**20, 16 * 2**20, 64 * 2**20, 256 * 2**20)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Per-stage wall time, CPU time and RSS delta, per-view request time
+    and error counts, for every scan in this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wall = {}
+            self.cpu = Counter()
+            self.rss = {}
+            self.errors = Counter()
+            self.requests = {}
+
+    def observe(self, stage: str, wall: float, cpu: float, rss_delta: int):
+        with self._lock:
+            self.wall.setdefault(stage, Histogram(SECONDS_BUCKETS)).observe(wall)
+            self.cpu[stage] += cpu
+            self.rss.setdefault(stage, Histogram(BYTES_BUCKETS)).observe(rss_delta)
+
+    def observe_request(self, view: str, seconds: float):
+        with self._lock:
+            self.requests.setdefault(view, Histogram(SECONDS_BUCKETS)).observe(seconds)
+
+    def stage_count(self, stage: str) -> int:
+        """How many times the stage ran."""
+        with self._lock:
+            histogram = self.wall.get(stage)
+            return histogram.count if histogram is not None else 0
+
+    def error(self, stage: str):
+        with self._lock:
+            self.errors[stage] += 1
+
+    def _histogram_lines(self, name: str, label: str, histograms: dict) -> list:
+        lines = []
+        for key, histogram in sorted(histograms.items()):
+            labels = f'{label}="{_label(key)}"'
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return lines
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP scan_stage_seconds Wall time of each scan pipeline stage.",
+                "# TYPE scan_stage_seconds histogram",
+                *self._histogram_lines("scan_stage_seconds", "stage", self.wall),
+                "# HELP scan_stage_cpu_seconds_total CPU time of the thread running each stage.",
+                "# TYPE scan_stage_cpu_seconds_total counter",
+                *(f'scan_stage_cpu_seconds_total{{stage="{_label(stage)}"}} {seconds}'
+                  for stage, seconds in sorted(self.cpu.items())),
+                "# HELP scan_stage_rss_delta_bytes Resident memory change over each stage.",
+                "# TYPE scan_stage_rss_delta_bytes histogram",
+                *self._histogram_lines("scan_stage_rss_delta_bytes", "stage", self.rss),
+                "# HELP scan_stage_errors_total Errors raised (or caught and logged) in each stage.",
+                "# TYPE scan_stage_errors_total counter",
+                *(f'scan_stage_errors_total{{stage="{_label(stage)}"}} {count}'
+                  for stage, count in sorted(self.errors.items())),
+                "# HELP scan_request_seconds Wall time of each request, by view.",
+                "# TYPE scan_request_seconds histogram",
+                *self._histogram_lines("scan_request_seconds", "view", self.requests),
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class Trace:
+    """The stages one request ran, in the order they finished."""
+
+    def __init__(self):
+        self.spans = []
+
+    def server_timing(self, total: float = None) -> str:
+        """Server-Timing header value: summed duration per stage, in ms."""
+        durations = {}
+        for stage, wall in self.spans:
+            durations[stage] = durations.get(stage, 0.0) + wall
+        entries = [f"{re.sub(r'[^A-Za-z0-9_-]', '_', stage)};dur={wall * 1000:.1f}"
+                   for stage, wall in durations.items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace = contextvars.ContextVar("scan_trace", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a pipeline stage: wall and thread CPU time and the RSS change
+    go to the process metrics, and to the current request's Trace.
+    Exceptions are counted for the stage and re-raised.
+    """
+    rss_before = current_rss_bytes()
+    cpu_before = time.thread_time()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics.error(name)
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        metrics.observe(name, wall, time.thread_time() - cpu_before, current_rss_bytes() - rss_before)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((name, wall))
+
+
+@contextmanager
+def collect():
+    """Records the stages run inside the block (in this context) into a new Trace."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_error(name: str, message: str, *args):
+    """For errors a stage catches and recovers from: logged with the traceback, and counted."""
+    metrics.error(name)
+    logger.exception(message, *args)
+
+
+# --- Sampling profiler ---
+
+def _fold(frame) -> str:
+    """A stack as one line of frames, outermost first ("file:function;...")."""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class SamplingProfiler:
+    """
+    While a request runs, a background thread samples its stack every
+    `interval` seconds. The samples of the `keep` slowest requests are
+    written to `directory` in the folded format ("frame;frame;... count"
+    per line), which flamegraph.pl, inferno and speedscope read.
+    """
+
+    def __init__(self, keep: int, interval: float, directory: str):
+        self.keep = keep
+        self.interval = interval
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._active = {}
+        self._has_work = threading.Event()
+        self._thread = None
+        # (seconds, path) of the profiles on disk, slowest kept
+        self._slowest = []
+
+    def start(self, thread_id: int):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="scan-profiler", daemon=True)
+                self._thread.start()
+        self._has_work.set()
+
+    def stop(self, thread_id: int) -> Counter:
+        with self._lock:
+            samples = self._active.pop(thread_id, Counter())
+            if not self._active:
+                self._has_work.clear()
+        return samples
+
+    def _run(self):
+        while True:
+            self._has_work.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold(frame)] += 1
+
+    def record(self, seconds: float, label: str, samples: Counter):
+        """Writes the profile if the request is among the slowest `keep` so far."""
+        if not samples:
+            return
+        with self._lock:
+            if len(self._slowest) >= self.keep and seconds <= self._slowest[0][0]:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "root"
+            path = os.path.join(self.directory, f"{int(seconds * 1000):07d}ms-{slug}-{time.time_ns()}.folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            heapq.heappush(self._slowest, (seconds, path))
+            while len(self._slowest) > self.keep:
+                _, dropped = heapq.heappop(self._slowest)
+                try:
+                    os.remove(dropped)
+                except OSError:
+                    pass
+
+
+_profiler = None
+
+
+def get_profiler():
+    """The process-wide SamplingProfiler, or None unless SCAN_PROFILE_SLOWEST is set."""
+    global _profiler
+    keep = getattr(settings, "SCAN_PROFILE_SLOWEST", 0)
+    if not keep:
+        return None
+    if _profiler is None:
+        _profiler = SamplingProfiler(
+            keep,
+            getattr(settings, "SCAN_PROFILE_INTERVAL_MS", 5) / 1000,
+            str(settings.SCAN_PROFILE_DIR),
+        )
+    return _profiler
+
+
+class TracingMiddleware:
+    """
+    Traces every request: its duration goes to the metrics, and
+    responses that ran pipeline stages get a Server-Timing header.
+    With the profiler on, the request's stack is sampled as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = get_profiler()
+        thread_id = threading.get_ident()
+        if profiler is not None:
+            profiler.start(thread_id)
+        start = time.perf_counter()
+        try:
+            with collect() as trace:
+                response = self.get_response(request)
+        finally:
+            seconds = time.perf_counter() - start
+            samples = profiler.stop(thread_id) if profiler is not None else None
+
+        match = request.resolver_match
+        metrics.observe_request((match.url_name or match.view_name) if match else "unmatched", seconds)
+        if trace.spans:
+            response["Server-Timing"] = trace.server_timing(seconds)
+        if samples:
+            profiler.record(seconds, request.path, samples)
+        return response
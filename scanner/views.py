@@ -1,24 +1,27 @@
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
 import os
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+import tempfile
+from concurrent.futures import TimeoutError as FuturesTimeout
+from datetime import datetime
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 
 # Import our AI modules
-from . import extractor, parser, skill_extractor, jd_processor, semantic_matcher, scorer, suggestions, recommender
+from . import pipeline, batch, extractor, jobs, pagination, reports, skill_search, candidate_ranker, jd_processor, tracing
 
 # 1. IMPORT THE DATABASE MODEL
-from .models import ScanHistory
+from .models import ScanHistory, ScanJob
 
-# Load data once when the server starts
-SKILL_LIST = skill_extractor.load_skill_taxonomy()
-JD_PATH = os.path.join(settings.BASE_DIR, 'dataset', 'sample_jds')
-JD_DATABASE = recommender.load_sample_jds(JD_PATH)
+# Nothing heavy is loaded at import: the spaCy/SBERT models are loaded on first use
+# (see model_registry, or preload them with gunicorn.conf.py), the skill taxonomy is
+# cached in skill_extractor and the JD catalog is loaded by jd_index.get_job_index
 
 def home(request):
     context = {}
@@ -28,77 +31,241 @@ def home(request):
         resume_file = request.FILES['resume']
         jd_text = request.POST.get('jd_text', '')
 
-        # 2. Save file temporarily so we can read it
-        fs = FileSystemStorage()
-        filename = fs.save(resume_file.name, resume_file)
-        uploaded_file_url = fs.path(filename)
+        if settings.SCAN_ASYNC:
+            # The upload is stored in the job row: refuse what the scan would not read anyway
+            if (resume_file.size > settings.BATCH_MAX_FILE_BYTES
+                    or extractor.is_too_large(resume_file, resume_file.name)):
+                context = {'error': "This resume is too large to scan. Please upload a smaller file."}
+                return render(request, 'scanner/index.html', context, status=413)
+            # Queue the scan and answer right away, the result page polls for it
+            try:
+                job = jobs.enqueue(resume_file.name, resume_file.read(), jd_text, request.user)
+            except jobs.QueueFull:
+                context = {'error': "The scanner is busy right now. Please try again in a minute."}
+                return render(request, 'scanner/index.html', context, status=503)
+            return redirect('scan_job', token=job.token)
 
         try:
-            # 3. Run the AI Pipeline
-            resume_content = extractor.extract_text(uploaded_file_url)
-            basic_info = parser.parse_basic_info(resume_content)
-            resume_skills = skill_extractor.extract_skills_from_text(resume_content, SKILL_LIST)
-            jd_data = jd_processor.process_jd_text(jd_text)
-            
-            match_results = semantic_matcher.semantic_skill_match(resume_skills, jd_data)
-            ats_score = scorer.calculate_ats_score(match_results)
-            tips = suggestions.generate_resume_suggestions(resume_content, basic_info, resume_skills)
-            jobs = recommender.recommend_jobs(resume_skills, JD_DATABASE)
-
-            # ---------------------------------------------------------
-            # 4. NEW: SAVE SCAN TO DATABASE
-            # ---------------------------------------------------------
-            ScanHistory.objects.create(
-                candidate_name=basic_info.get('name') or "Unknown Candidate",
-                email=basic_info.get('email') or "No Email",
-                resume_filename=resume_file.name,
-                ats_score=ats_score.get('score', 0),
-                matched_skills=match_results.get('matched_skills', []),
-                missing_skills=match_results.get('missing_skills', []),
-                user=request.user if request.user.is_authenticated else None,
-            )
-            # ---------------------------------------------------------
-
-            # 5. Pack data to send to HTML
-            context = {
-                'result': True,
-                'basic_info': basic_info,
-                'ats_score': ats_score,
-                'matched_skills': match_results['matched_skills'],
-                'missing_skills': match_results['missing_skills'],
-                'tips': tips,
-                'jobs': jobs
-            }
-
-        except Exception as e:
-            print(f"Error: {e}")
+            # 2. Run the AI Pipeline on the upload where it already is (memory or
+            #    Django's temp file), save the scan to the database and pack data
+            #    to send to HTML (see pipeline.run_scan)
+            source = pipeline.upload_source(resume_file)
+            context = pipeline.run_scan(source, resume_file.name, jd_text, request.user)
 
-        finally:
-            # Cleanup: delete the temp file
-            if os.path.exists(uploaded_file_url):
-                os.remove(uploaded_file_url)
+        except Exception:
+            tracing.record_error("scan", "Scan of %s failed", resume_file.name)
+            context = {'error': "Sorry, we could not scan this resume."}
 
     return render(request, 'scanner/index.html', context)
 
+# ---------------------------------------------------------
+# ASYNC SCAN STATUS: polled until the queued scan is done
+# ---------------------------------------------------------
+def scan_job(request, token):
+    # Found by its random token, never by the sequential id
+    job = get_object_or_404(ScanJob.objects.defer('resume_data'), token=token)
+    if job.user_id and job.user_id != request.user.id:
+        raise Http404
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'queue_seconds': job.queue_seconds,
+            'run_seconds': job.run_seconds,
+            'error': job.error,
+            'scan_id': (job.result or {}).get('scan_id'),
+        })
+
+    if job.kind == ScanJob.BATCH:
+        if job.status == ScanJob.DONE:
+            if request.GET.get('download'):
+                return _batch_response(job.result['rows'], request.GET['download'])
+            return render(request, 'scanner/batch.html', {'job': job})
+        if job.status == ScanJob.FAILED:
+            return render(request, 'scanner/batch.html', {'error': "Sorry, we could not scan this batch."})
+    elif job.status == ScanJob.DONE:
+        return render(request, 'scanner/index.html', job.result)
+    elif job.status == ScanJob.FAILED:
+        return render(request, 'scanner/index.html', {'error': "Sorry, we could not scan this resume."})
+
+    queue_position = ScanJob.objects.filter(status=ScanJob.QUEUED, pk__lt=job.pk).count()
+    return render(request, 'scanner/scan_job.html', {'job': job, 'queue_position': queue_position})
+
+# ---------------------------------------------------------
+# BATCH SCAN: many resumes (files or a .zip) against one JD
+# ---------------------------------------------------------
+def _batch_response(results, output_format):
+    # Stream the ranked results back
+    if output_format == 'json':
+        response = StreamingHttpResponse(batch.iter_json(results), content_type='application/json')
+        response['Content-Disposition'] = 'attachment; filename="batch_scan.json"'
+    else:
+        response = StreamingHttpResponse(batch.iter_csv(results), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="batch_scan.csv"'
+    return response
+
+
+@login_required(login_url='/login/')
+def batch_scan(request):
+    resume_files = request.FILES.getlist('resumes')
+    if request.method != 'POST' or not resume_files:
+        return render(request, 'scanner/batch.html')
+
+    jd_text = request.POST.get('jd_text', '')
+    output_format = request.POST.get('format', 'csv')
+
+    with tempfile.TemporaryDirectory(prefix="ats-batch-") as workdir:
+        # Files and zip members are counted against the BATCH_MAX_* limits as they are unpacked
+        limits = batch.UploadLimits()
+        resumes = []
+        try:
+            for i, uploaded in enumerate(resume_files):
+                is_zip = uploaded.name.lower().endswith('.zip')
+                if is_zip and uploaded.size > settings.BATCH_MAX_TOTAL_BYTES:
+                    raise batch.BatchTooLarge(f"{uploaded.name} is too large")
+                if not is_zip:
+                    limits.add_file(uploaded.name, uploaded.size)
+                path = os.path.join(workdir, f"{i:05d}_{os.path.basename(uploaded.name)}")
+                with open(path, 'wb') as f:
+                    for chunk in uploaded.chunks():
+                        f.write(chunk)
+                if is_zip:
+                    zip_dir = tempfile.mkdtemp(dir=workdir)
+                    resumes.extend(batch.collect_resumes(path, zip_dir, limits))
+                else:
+                    resumes.append((uploaded.name, path))
+        except batch.BatchTooLarge as e:
+            return render(request, 'scanner/batch.html', {'error': f"{e}. Please upload fewer or smaller resumes."},
+                          status=413)
+
+        if len(resumes) > settings.BATCH_INLINE_MAX:
+            # Too many to scan while the browser waits: the job queue takes it
+            try:
+                job = jobs.enqueue(f"{len(resumes)} resumes", batch.pack_resumes(resumes), jd_text,
+                                   request.user, kind=ScanJob.BATCH)
+            except jobs.QueueFull:
+                context = {'error': "The scanner is busy right now. Please try again in a minute."}
+                return render(request, 'scanner/batch.html', context, status=503)
+            return redirect('scan_job', token=job.token)
+
+        # A small batch: scanned here, without a process pool in the web worker
+        results = batch.scan_batch(resumes, jd_text, user=request.user, workers=1)
+
+    return _batch_response(results, output_format)
+
 # ---------------------------------------------------------
 # 2. NEW: HISTORY VIEW FUNCTION
 # ---------------------------------------------------------
 @login_required(login_url='/login/')
 def history(request):
-    # Only show scans belonging to the current user
-    scans = ScanHistory.objects.filter(user=request.user).order_by('-scan_date')
-    return render(request, 'scanner/history.html', {'scans': scans})
+    # Only show scans belonging to the current user, one page at a time
+    scans = ScanHistory.objects.filter(user=request.user)
+    page, next_cursor = pagination.keyset_page(
+        scans.only(*pagination.HISTORY_LIST_FIELDS),
+        cursor=request.GET.get('cursor'),
+        page_size=settings.HISTORY_PAGE_SIZE,
+    )
+    is_first_page = not request.GET.get('cursor')
+    context = {
+        'scans': page,
+        # Counting is a full scan of the user's rows: only the first page shows it
+        'total': scans.count() if is_first_page else None,
+        'next_cursor': next_cursor,
+        'is_first_page': is_first_page,
+    }
+    return render(request, 'scanner/history.html', context)
+
+@login_required(login_url='/login/')
+def search_candidates(request):
+    """
+    JSON search over the user's scans by skill:
+    ?all=kubernetes,terraform  every one of these skills
+    ?any=aws,gcp               at least one of these
+    ?status=matched|missing|any, ?since=/?until=YYYY-MM-DD, ?cursor= for the next page
+    """
+    def skill_list(param):
+        return [skill for skill in request.GET.get(param, '').split(',') if skill.strip()]
+
+    all_skills, any_skills = skill_list('all'), skill_list('any')
+    if not all_skills and not any_skills:
+        return JsonResponse({'error': "Give at least one skill in 'all' or 'any'."}, status=400)
+
+    matched = {'matched': True, 'missing': False, 'any': None}.get(request.GET.get('status', 'matched'), True)
+    bounds = []
+    for param in ('since', 'until'):
+        value = request.GET.get(param)
+        try:
+            day = parse_date(value) if value else None
+        except ValueError:
+            day = None
+        if value and day is None:
+            return JsonResponse({'error': "Dates must be YYYY-MM-DD."}, status=400)
+        # Start of that day in the current time zone
+        bounds.append(timezone.make_aware(datetime.combine(day, datetime.min.time())) if day else None)
+    since, until = bounds
+
+    scans = skill_search.search_scans(
+        ScanHistory.objects.filter(user=request.user),
+        all_skills=all_skills, any_skills=any_skills, matched=matched, since=since, until=until,
+    )
+    page, next_cursor = pagination.keyset_page(
+        scans.only(*pagination.HISTORY_LIST_FIELDS),
+        cursor=request.GET.get('cursor'),
+        page_size=settings.HISTORY_PAGE_SIZE,
+    )
+    return JsonResponse({
+        'results': [
+            {
+                'id': scan.pk,
+                'candidate_name': scan.candidate_name,
+                'email': scan.email,
+                'ats_score': scan.ats_score,
+                'resume_filename': scan.resume_filename,
+                'scan_date': scan.scan_date.isoformat(),
+            }
+            for scan in page
+        ],
+        'next_cursor': next_cursor,
+    })
+
+@login_required(login_url='/login/')
+def rank_candidates(request):
+    """
+    JSON: the user's stored candidates ranked against a new JD,
+    ?jd_text=... (or POST), ?top=20 (see candidate_ranker).
+    """
+    jd_text = request.POST.get('jd_text') or request.GET.get('jd_text', '')
+    jd_skills = jd_processor.process_jd_text(jd_text)
+    if not jd_skills:
+        return JsonResponse({'error': "No known skills found in the job description."}, status=400)
+    try:
+        top_k = max(1, min(int(request.GET.get('top', 20)), 500))
+    except ValueError:
+        return JsonResponse({'error': "'top' must be a number."}, status=400)
+
+    ranked = candidate_ranker.get_candidate_index(request.user).rank(jd_skills, top_k=top_k)
+    scans = ScanHistory.objects.only(*pagination.HISTORY_LIST_FIELDS).in_bulk([row['scan_id'] for row in ranked])
+    return JsonResponse({
+        'jd_skills': jd_skills,
+        'results': [
+            {
+                **row,
+                'candidate_name': scans[row['scan_id']].candidate_name,
+                'email': scans[row['scan_id']].email,
+                'resume_filename': scans[row['scan_id']].resume_filename,
+            }
+            for row in ranked if row['scan_id'] in scans
+        ],
+    })
 
 def view_scan(request, pk):
     # 1. Fetch the specific scan from DB or 404
     scan = get_object_or_404(ScanHistory, pk=pk)
 
-    # 2. PRO FEATURE: Re-generate Job Recommendations dynamically!
-    # Since we saved the 'matched_skills', we can run them against the DB again.
-    # We combine matched + missing to get the full list of skills the resume had (roughly)
-    # OR just use matched_skills if that's what we stored. 
-    # Let's use matched_skills for safe recommendations.
-    suggested_jobs = recommender.recommend_jobs(scan.matched_skills, JD_DATABASE)
+    # 2. Job recommendations were stored with the scan (and are refreshed
+    #    in the background when the JD catalog changes)
+    suggested_jobs = pipeline.stored_recommendations(scan)
 
     context = {
         'scan': scan,
@@ -110,29 +277,47 @@ def view_scan(request, pk):
 def download_report(request, pk):
     # 1. Fetch data (same as view_scan)
     scan = get_object_or_404(ScanHistory, pk=pk)
-    suggested_jobs = recommender.recommend_jobs(scan.matched_skills, JD_DATABASE)
-
-    # 2. Load the special PDF template
-    template_path = 'scanner/pdf_report.html'
-    context = {'scan': scan, 'jobs': suggested_jobs}
 
-    # 3. Render PDF
-    response = HttpResponse(content_type='application/pdf')
-    # Set filename to include candidate name
-    filename = f"Report_{scan.candidate_name.replace(' ', '_')}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # 2. Reports are rendered once and stored (see scanner/reports.py);
+    #    the ETag changes when the template or the recommendations do.
+    #    Recommendations first: for old scans that computes them and
+    #    changes the row's version, so the key must be taken after
+    jobs = pipeline.stored_recommendations(scan)
+    etag = f'"{reports.report_key(scan)}"'
+    path = reports.report_path(scan)
+    last_modified = os.path.getmtime(path) if os.path.exists(path) else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
 
-    template = get_template(template_path)
-    html = template.render(context)
-
-    # Create PDF
-    pisa_status = pisa.CreatePDF(html, dest=response)
+    # 3. Render it in the background if it isn't stored yet
+    if last_modified is None:
+        future = reports.render_async(scan, jobs)
+        try:
+            future.result(timeout=settings.REPORT_RENDER_WAIT)
+        except FuturesTimeout:
+            # Still rendering: this page reloads until the report is ready
+            return render(request, 'scanner/report_pending.html', {'scan': scan}, status=202)
+        except reports.ReportError as e:
+            return HttpResponse('We had some errors <pre>' + e.html + '</pre>')
+        path = future.result()
+        last_modified = os.path.getmtime(path)
 
-    if pisa_status.err:
-        return HttpResponse('We had some errors <pre>' + html + '</pre>')
+    # 4. Send the stored PDF, named after the candidate
+    response = FileResponse(open(path, 'rb'), as_attachment=True,
+                            filename=reports.report_filename(scan), content_type='application/pdf')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
     return response
 
 
+@login_required(login_url='/login/')
+def export_reports(request):
+    # Every report of the current user in one zip, missing ones rendered in parallel
+    scans = ScanHistory.objects.filter(user=request.user).order_by('-scan_date')
+    archive = reports.export_zip([(scan, pipeline.stored_recommendations(scan)) for scan in scans])
+    return FileResponse(archive, as_attachment=True, filename='ats_reports.zip', content_type='application/zip')
+
 
 # --- AUTHENTICATION VIEWS ---
 
@@ -163,4 +348,12 @@ def logout_view(request):
     return redirect('home')
 
 def about(request):
-    return render(request, 'scanner/about.html')
\ No newline at end of file
+    return render(request, 'scanner/about.html')
+
+# ---------------------------------------------------------
+# METRICS: per-stage scan timings for Prometheus (staff only)
+# ---------------------------------------------------------
+def metrics(request):
+    if not request.user.is_staff:
+        return HttpResponseForbidden("Staff only")
+    return HttpResponse(tracing.metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")